@@ -0,0 +1,254 @@
+"""
+accounts.py: 여러 계좌 등록 및 동시 조회/취소 모듈
+- accounts.json에 계좌 목록을 등록 (없으면 기존 기본 계좌 1개 사용)
+- 잔고 / 미체결 조회와 일괄 취소를 모든 계좌에 대해 동시에 실행 (kis_http 공용 연결 풀 사용)
+- 계좌별 결과를 합쳐 하나의 통합 포트폴리오로 출력 → 계좌 수와 무관하게 왕복 1회 시간
+
+accounts.json 예:
+    [
+        {"name": "main", "cano": "43407510", "acnt_prdt_cd": "01"},
+        {"name": "isa", "cano": "12345678", "acnt_prdt_cd": "01",
+         "app_key": "...", "app_secret": "...", "token_file": "token-isa.json"}
+    ]
+    (app_key/app_secret을 생략하면 key.py 설정과 토큰 파일(token-expire.json)을 사용,
+     앱키를 따로 쓰는 계좌는 token_file을 생략하면 token-{name}.json - 앱키가 다른 계좌끼리 토큰을 덮어쓰지 않도록)
+
+실행:
+    python accounts.py                 # 전체 계좌 통합 잔고
+    python accounts.py --pending       # 전체 계좌 미체결 주문
+    python accounts.py --cancel-all    # 전체 계좌 미체결 일괄 취소
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from rate_limit import default_limiter
+from token_manage import TOKEN_FILE, get_token_for_api
+
+ACCOUNTS_FILE = "accounts.json"
+DEFAULT_CANO = "43407510"    # accounts.json이 없을 때 사용하는 기본 계좌
+DEFAULT_ACNT_PRDT_CD = "01"
+MAX_WORKERS = 10
+
+
+@dataclass
+class Account:
+    name: str
+    cano: str
+    acnt_prdt_cd: str = "01"
+    app_key: Optional[str] = None
+    app_secret: Optional[str] = None
+    url_base: Optional[str] = None
+    token_file: Optional[str] = None
+
+    def __post_init__(self):
+        if self.token_file is None:
+            self.token_file = f"token-{self.name}.json" if self.app_key else TOKEN_FILE
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}({self.cano}-{self.acnt_prdt_cd})"
+
+    def credentials(self):
+        """(app_key, app_secret, url_base) - 계좌별 설정이 없으면 key.py 값 사용"""
+        import key
+        return (self.app_key or key.APP_KEY, self.app_secret or key.APP_SECRET, self.url_base or key.URL_BASE)
+
+    def token(self) -> Optional[str]:
+        app_key, app_secret, url_base = self.credentials()
+        return get_token_for_api(app_key, app_secret, url_base, self.token_file)
+
+
+# -----------------------------------------------------------
+# 1. 계좌 등록부
+# -----------------------------------------------------------
+def load_accounts(path: str = ACCOUNTS_FILE) -> List[Account]:
+    if not os.path.exists(path):
+        return [Account("default", DEFAULT_CANO, DEFAULT_ACNT_PRDT_CD)]
+    with open(path, "r", encoding="utf-8") as f:
+        accounts = [Account(**item) for item in json.load(f)]
+
+    # 토큰 파일(과 메모리 캐시)은 token_file 기준이라 앱키가 다른 계좌가 같은 파일을 쓰면 서로 토큰을 덮어씀
+    owners: Dict[str, Optional[str]] = {}
+    for account in accounts:
+        owner = owners.setdefault(account.token_file, account.app_key)
+        if owner != account.app_key:
+            raise ValueError(f"{path}: 앱키가 다른 계좌가 같은 토큰 파일({account.token_file})을 사용합니다.")
+    return accounts
+
+
+def default_account(path: str = ACCOUNTS_FILE) -> Account:
+    """등록부의 첫 번째 계좌 (단일 계좌용 스크립트에서 사용)"""
+    return load_accounts(path)[0]
+
+
+def run_all(accounts: List[Account], func: Callable[[Account], Any]) -> Dict[str, Any]:
+    """모든 계좌에 func를 동시에 실행. {계좌 label: 결과 또는 예외}"""
+    def guarded(account):
+        try:
+            return func(account)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(accounts)) or 1) as pool:
+        results = pool.map(guarded, accounts)
+        return {account.label: result for account, result in zip(accounts, results)}
+
+
+# -----------------------------------------------------------
+# 2. 잔고 조회 및 통합 포트폴리오
+# -----------------------------------------------------------
+def fetch_balance(account: Account) -> Optional[Dict]:
+    from check_acc import fetch_deposit_balance
+
+    token = account.token()
+    if not token:
+        raise RuntimeError("토큰 발급 실패")
+    app_key, app_secret, url_base = account.credentials()
+    default_limiter.acquire()
+    status, data = fetch_deposit_balance(token, app_key, account.cano, account.acnt_prdt_cd,
+                                         app_secret=app_secret, url_base=url_base)
+    if status != 200 or data.get("rt_cd") != "0":
+        raise RuntimeError(data.get("msg1", "API 오류"))
+    return data
+
+
+def consolidate(balances: Dict[str, Any]) -> Dict[str, Any]:
+    """계좌별 잔고 응답을 하나의 포트폴리오로 합침 (종목코드 기준)"""
+    portfolio = {"cash": 0, "total_eval": 0, "positions": {}, "accounts": {}, "errors": {}}
+    for label, data in balances.items():
+        if isinstance(data, Exception) or not data:
+            portfolio["errors"][label] = str(data)
+            continue
+
+        cash_info = (data.get("output2") or [{}])[0]
+        cash = int(cash_info.get("dnca_tot_amt", 0) or 0)
+        total_eval = int(cash_info.get("tot_evlu_amt", 0) or 0)
+        portfolio["cash"] += cash
+        portfolio["total_eval"] += total_eval
+        portfolio["accounts"][label] = {"cash": cash, "total_eval": total_eval}
+
+        for stock in data.get("output1") or []:
+            qty = int(stock.get("hldg_qty", 0) or 0)
+            if qty <= 0:
+                continue
+            pos = portfolio["positions"].setdefault(stock.get("pdno"), {
+                "name": stock.get("prdt_name", "N/A"), "qty": 0, "eval_amt": 0, "by_account": {},
+            })
+            pos["qty"] += qty
+            pos["eval_amt"] += int(stock.get("evlu_amt", 0) or 0)
+            pos["by_account"][label] = qty
+    return portfolio
+
+
+def print_portfolio(portfolio: Dict[str, Any]) -> None:
+    print("=" * 60)
+    print(f"💼 [통합 포트폴리오] 계좌 {len(portfolio['accounts'])}개")
+    for label, info in portfolio["accounts"].items():
+        print(f"   {label}: 예수금 {info['cash']:>13,} 원 | 총평가 {info['total_eval']:>13,} 원")
+    for label, error in portfolio["errors"].items():
+        print(f"   ❌ {label}: {error}")
+    print("-" * 60)
+    print(f"   💰 예수금 합계: {portfolio['cash']:>15,} 원")
+    print(f"   📊 총평가 합계: {portfolio['total_eval']:>15,} 원")
+
+    if portfolio["positions"]:
+        print(f"\n📈 [보유 종목] {len(portfolio['positions'])}개")
+        ordered = sorted(portfolio["positions"].items(), key=lambda kv: -kv[1]["eval_amt"])
+        for code, pos in ordered:
+            weight = pos["eval_amt"] / portfolio["total_eval"] * 100 if portfolio["total_eval"] else 0
+            print(f"   {pos['name']} ({code}): {pos['qty']:>8,} 주 | {pos['eval_amt']:>13,} 원 | {weight:5.1f}%")
+    else:
+        print("\n📊 보유 주식이 없습니다.")
+    print("=" * 60)
+
+
+# -----------------------------------------------------------
+# 3. 미체결 조회 / 일괄 취소
+# -----------------------------------------------------------
+def fetch_pending(account: Account) -> List[Dict]:
+    """미체결 주문 전체 (연속조회 포함). 조회 실패는 빈 목록이 아니라 예외 - 미체결 없음과 구분"""
+    from remove_order import get_pending_orders
+
+    token = account.token()
+    if not token:
+        raise RuntimeError("토큰 발급 실패")
+    app_key, app_secret, url_base = account.credentials()
+    default_limiter.acquire()
+    data = get_pending_orders(token, app_key, app_secret, account.cano, account.acnt_prdt_cd,
+                              url_base, verbose=False, raise_on_error=True)
+    return (data or {}).get("output") or []
+
+
+def cancel_all_accounts(accounts: List[Account], confirm: bool = True) -> int:
+    """전체 계좌의 미체결 주문을 조회한 뒤 한 번에 동시 취소. 취소된 주문 수 반환"""
+    from remove_order import cancel_order
+
+    pending = run_all(accounts, fetch_pending)
+    jobs = []
+    for account in accounts:
+        orders = pending[account.label]
+        if isinstance(orders, Exception):
+            print(f"❌ [{account.label}] 미체결 조회 실패: {orders}")
+            continue
+        jobs += [(account, order) for order in orders]
+
+    if not jobs:
+        print("\n취소할 미체결 주문이 없습니다.")
+        return 0
+
+    if confirm:
+        print(f"\n⚠️ {len(accounts)}개 계좌, {len(jobs)}건의 미체결 주문을 모두 취소하시겠습니까? (y/n): ", end="")
+        if input().strip().lower() != "y":
+            print("⏭️ 주문 취소를 건너뜁니다.")
+            return 0
+
+    def cancel(job) -> bool:
+        account, order = job
+        app_key, app_secret, url_base = account.credentials()
+        default_limiter.acquire()  # time.sleep(0.2) 대신 공용 호출 예산 사용
+        return cancel_order(account.token(), app_key, app_secret, account.cano, account.acnt_prdt_cd,
+                            url_base, order.get("odno"), order.get("rmn_qty"), order.get("ord_unpr"),
+                            verbose=False, code=order.get("pdno"))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        cancelled = sum(pool.map(cancel, jobs))
+    print(f"\n✅ {cancelled}/{len(jobs)}건의 주문이 취소되었습니다.")
+    return cancelled
+
+
+if __name__ == "__main__":
+    import argparse
+    import profiler
+
+    parser = argparse.ArgumentParser(description="여러 계좌 통합 조회/취소")
+    parser.add_argument("--pending", action="store_true", help="전체 계좌 미체결 주문 조회")
+    parser.add_argument("--cancel-all", action="store_true", help="전체 계좌 미체결 일괄 취소")
+    parser.add_argument("--yes", action="store_true", help="취소 확인 질문 생략")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args, "accounts")
+
+    accounts = load_accounts()
+    print(f"👥 등록 계좌: {', '.join(a.label for a in accounts)}")
+
+    with profiler.iteration("accounts"):
+        if args.cancel_all:
+            cancel_all_accounts(accounts, confirm=not args.yes)
+        elif args.pending:
+            for label, orders in run_all(accounts, fetch_pending).items():
+                if isinstance(orders, Exception):
+                    print(f"❌ [{label}] {orders}")
+                    continue
+                print(f"\n📋 [{label}] 미체결 {len(orders)}건")
+                for order in orders:
+                    print(f"   {order.get('prdt_name', 'N/A')} | {order.get('sll_buy_dvsn_cd_name', 'N/A')} | "
+                          f"{int(order.get('ord_unpr', 0)):,}원 x {int(order.get('rmn_qty', 0)):,}주 | "
+                          f"주문번호 {order.get('odno', 'N/A')}")
+        else:
+            print_portfolio(consolidate(run_all(accounts, fetch_balance)))
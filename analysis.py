@@ -1,16 +1,17 @@
 import sqlite3
-import pandas as pd
+import daemon
+import profiler
+from delta_store import read_price_log, PRICE_LOG_COLUMNS
 
-# 1. DB에서 데이터 꺼내오기
-conn = sqlite3.connect("trading.db")
-query = "SELECT * FROM price_log ORDER BY timestamp ASC"
-df = pd.read_sql(query, conn)
-conn.close()
+DB_FILE = "trading.db"
+STOCK_CODE = "069500"  # KODEX 200 (save_data.py 기본 수집 종목)
+MIN_ROWS = 15  # RSI(14) 계산에 필요한 최소 데이터 수
 
-# 데이터가 너무 적으면 분석 불가 (최소 15개 필요)
-if len(df) < 15:
-    print("⚠️ 분석을 위한 데이터가 부족합니다. (수집기를 좀 더 돌려주세요)")
-    exit()
+# 1. DB에서 데이터 꺼내오기 (델타 저장분도 원래 행으로 복원해서 합침)
+#    price_log에는 여러 종목(save_data.py --codes, backfill.py)이 섞여 있으므로 한 종목만 꺼냄
+def load_price_log(conn, since=None, code=STOCK_CODE):
+    import pandas as pd
+    return pd.DataFrame(read_price_log(conn, since=since, code=code), columns=PRICE_LOG_COLUMNS)
 
 # 2. RSI (상대강도지수) 계산하기 - 매수 타이밍 잡는 핵심 지표
 def calculate_rsi(data, period=14):
@@ -20,34 +21,82 @@ def calculate_rsi(data, period=14):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
-df['RSI'] = calculate_rsi(df['price'])
+def analyze(df):
+    """
+    RSI/호가 힘을 계산하고 가장 최근 1개 결과를 dict로 반환
+    (데이터가 부족하면 None) - daemon.py에서도 재사용
+    """
+    # 데이터가 너무 적으면 분석 불가 (최소 15개 필요)
+    if len(df) < MIN_ROWS:
+        return None
 
-# 3. 호가 잔량 비율 계산 - 힘의 균형
-# (매수잔량이 많으면 > 1, 매도잔량이 많으면 < 1)
-df['Power'] = df['total_bid_qty'] / df['total_ask_qty']
+    df['RSI'] = calculate_rsi(df['price'])
+
+    # 3. 호가 잔량 비율 계산 - 힘의 균형
+    # (매수잔량이 많으면 > 1, 매도잔량이 많으면 < 1, 매도잔량이 0이면 NaN - 0으로 나누지 않음)
+    df['Power'] = df['total_bid_qty'] / df['total_ask_qty'].where(df['total_ask_qty'] > 0)
+
+    latest = df.iloc[-1]
+    return {
+        "timestamp": str(latest['timestamp']),
+        "code": str(latest['code']),
+        "price": int(latest['price']),
+        "rsi": float(latest['RSI']),
+        "power": float(latest['Power']),
+    }
 
 # 4. 분석 결과 출력 (가장 최근 1개)
-latest = df.iloc[-1]
-rsi = latest['RSI']
-power = latest['Power']
-
-print("\n📊 [현재 시장 분석 결과]")
-print(f"시간: {latest['timestamp']}")
-print(f"현재가: {latest['price']} 원")
-print("-" * 30)
-
-#전략 1: RSI 판단
-if rsi < 30:
-    print(f"🔵 RSI: {rsi:.1f} → [과매도 구간] 줍줍 찬스! (적극 매수 고려)")
-elif rsi > 70:
-    print(f"🔴 RSI: {rsi:.1f} → [과매수 구간] 너무 올랐음 (매도 고려)")
-else:
-    print(f"⚪ RSI: {rsi:.1f} → [중립 구간] 관망")
-
-#전략 2: 호가 힘 판단
-if power > 1.5:
-    print(f"🔥 호가: 매수세가 {power:.1f}배 강함 (상승 압력)")
-elif power < 0.7:
-    print(f"💧 호가: 매도세가 더 강함 (하락 압력)")
-else:
-    print(f"⚖️ 호가: 팽팽한 균형 상태")
\ No newline at end of file
+def print_report(latest):
+    rsi = latest['rsi']
+    power = latest['power']
+
+    print(f"\n📊 [현재 시장 분석 결과] {latest.get('code', STOCK_CODE)}")
+    print(f"시간: {latest['timestamp']}")
+    print(f"현재가: {latest['price']} 원")
+    print("-" * 30)
+
+    #전략 1: RSI 판단
+    if rsi < 30:
+        print(f"🔵 RSI: {rsi:.1f} → [과매도 구간] 줍줍 찬스! (적극 매수 고려)")
+    elif rsi > 70:
+        print(f"🔴 RSI: {rsi:.1f} → [과매수 구간] 너무 올랐음 (매도 고려)")
+    else:
+        print(f"⚪ RSI: {rsi:.1f} → [중립 구간] 관망")
+
+    #전략 2: 호가 힘 판단
+    if power is None or power != power:  # NaN: 매도잔량 없음 (상한가 등)
+        print(f"❔ 호가: 매도잔량이 없어 판단 불가")
+    elif power > 1.5:
+        print(f"🔥 호가: 매수세가 {power:.1f}배 강함 (상승 압력)")
+    elif power < 0.7:
+        print(f"💧 호가: 매도세가 더 강함 (하락 압력)")
+    else:
+        print(f"⚖️ 호가: 팽팽한 균형 상태")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RSI / 호가 힘 분석")
+    parser.add_argument("--code", default=STOCK_CODE, help="분석할 종목코드 (기본: KODEX 200)")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args, "analysis")
+
+    with profiler.iteration("analysis"):
+        # 상주 데몬이 떠 있으면 미리 계산된 지표 상태를 바로 받아옴
+        reply = daemon.call("analysis", code=args.code)
+
+        if reply is not None:
+            latest = reply.get("latest")
+        else:
+            conn = sqlite3.connect(DB_FILE)
+            df = load_price_log(conn, code=args.code)
+            conn.close()
+            latest = analyze(df)
+    profiler.stop()
+
+    if latest is None:
+        print("⚠️ 분석을 위한 데이터가 부족합니다. (수집기를 좀 더 돌려주세요)")
+        exit()
+
+    print_report(latest)
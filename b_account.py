@@ -1,10 +1,12 @@
-import requests
+import kis_http
+import profiler
 import json
 import time
 import urllib.parse
 import os
 from datetime import datetime, timedelta, timezone
 from token_manage import get_token_for_api
+from accounts import default_account
 import key  # key.py 파일에서 설정 불러오기
 
 # =========================================================
@@ -16,9 +18,10 @@ URL_BASE = key.URL_BASE
 TOKEN_FILE = key.TOKEN_FILE
 SECURITY_MARGIN = 60 * 10  # 토큰 만료 10분 전이면 갱신 시도 (안전 여유 시간)
 
-# 잔고 조회용 설정
-CANO = "43407510"  # 고객님의 계좌번호 8자리
-ACNT_PRDT_CD = "01" # 계좌 상품 코드 (일반적으로 '01' 사용)
+# 잔고 조회용 설정 (accounts.json 등록부의 첫 번째 계좌, 전체 계좌는 accounts.py 사용)
+ACCOUNT = default_account()
+CANO = ACCOUNT.cano  # 고객님의 계좌번호 8자리
+ACNT_PRDT_CD = ACCOUNT.acnt_prdt_cd # 계좌 상품 코드 (일반적으로 '01' 사용)
 # =========================================================
 
 
@@ -26,20 +29,21 @@ ACNT_PRDT_CD = "01" # 계좌 상품 코드 (일반적으로 '01' 사용)
 # --- 2. 위탁계좌(일반 주식계좌) 잔고 조회 ---
 # =========================================================
 
-def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
+def get_deposit_balance(token, app_key, cano, acnt_prdt_cd, app_secret=None, url_base=None):
     """
     위탁계좌(일반 주식계좌)의 예수금 잔고 조회
+    app_secret/url_base를 생략하면 key.py 설정 사용
     """
     print("\n🔍 위탁계좌 예수금 잔고 조회를 시작합니다...")
     
     PATH = "/uapi/domestic-stock/v1/trading/inquire-balance"
-    URL = URL_BASE + PATH
+    URL = (url_base or URL_BASE) + PATH
     
     HEADERS = {
         "Content-Type": "application/json",
         "authorization": f"Bearer {token}",
         "appkey": app_key,
-        "appsecret": APP_SECRET,
+        "appsecret": app_secret or APP_SECRET,
         "tr_id": "TTTC8434R"  # 주식잔고조회 TR_ID
     }
     
@@ -59,7 +63,7 @@ def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
     }
 
     try:
-        res = requests.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
+        res = kis_http.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
         response_data = res.json()
         
         print(f"📡 응답 상태: {res.status_code}")
@@ -123,23 +127,33 @@ def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
 # =========================================================
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="위탁계좌 예수금/잔고 조회")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args, "b_account")
+
     print("🚀 한국투자증권 계좌 조회 프로그램")
-    print(f"📁 토큰 파일: {TOKEN_FILE}")
+    print(f"📁 토큰 파일: {ACCOUNT.token_file}")
     print(f"👤 계좌번호: {CANO}-{ACNT_PRDT_CD}")
     
-    # 토큰 관리 시스템을 통해 유효한 토큰을 가져옵니다.
-    final_token = get_token_for_api(APP_KEY, APP_SECRET, URL_BASE)
+    with profiler.iteration("balance"):
+        # 토큰 관리 시스템을 통해 유효한 토큰을 가져옵니다. (계좌별 앱키가 있으면 그 앱키/토큰 파일 사용)
+        app_key, app_secret, url_base = ACCOUNT.credentials()
+        final_token = ACCOUNT.token()
     
-    if final_token:
-        print(f"🔑 토큰 획득 성공: {final_token[:30]}...")
-        
-        # 위탁계좌 잔고 조회
-        result = get_deposit_balance(final_token, APP_KEY, CANO, ACNT_PRDT_CD)
+        if final_token:
+            print(f"🔑 토큰 획득 성공: {final_token[:30]}...")
         
-        if result:
-            print("\n🎉 계좌 조회가 완료되었습니다.")
-            print("✅ 프로그램이 정상적으로 작동하고 있습니다!")
-        else:
-            print("\n❌ 계좌 조회에 실패했습니다.")
+            # 위탁계좌 잔고 조회
+            result = get_deposit_balance(final_token, app_key, CANO, ACNT_PRDT_CD,
+                                         app_secret=app_secret, url_base=url_base)
+    
+    if not final_token:
+        print("💥 프로그램을 종료합니다. 유효한 토큰을 확보하지 못했음. ")
+    elif result:
+        print("\n🎉 계좌 조회가 완료되었습니다.")
+        print("✅ 프로그램이 정상적으로 작동하고 있습니다!")
     else:
-        print("💥 프로그램을 종료합니다. 유효한 토큰을 확보하지 못했음. ")
\ No newline at end of file
+        print("\n❌ 계좌 조회에 실패했습니다.")
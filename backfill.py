@@ -0,0 +1,420 @@
+"""
+backfill.py: 과거 시세 일괄 적재 및 price_log 공백(gap) 보충 도구
+- 종목별 price_log 공백 구간 탐지 (장중 수집 누락, 수집기 중단 구간) - 리포트 전용, price_log는 채우지 않음
+  (KRX 달력의 휴장일/특수 개장일과 수집기 주기 정책(market_calendar.MarketCadence) 기준)
+- KIS 일봉(FHKST03010100) / 당일 분봉(FHKST03010200) 차트 API를 여러 종목 동시에 조회
+- rate_limit.py의 호출 예산을 지키며, 종목별로 적재가 끝난 일봉 기간을 체크포인트 파일에 저장
+  (중단 후 재실행 시 이어서 진행, 다음 날/더 긴 --years로 다시 실행하면 빠진 앞뒤 기간만 조회)
+- 일봉은 daily_price, 분봉은 minute_price 테이블에 일괄 적재
+  (분봉에는 호가 잔량이 없어 price_log에 넣지 않음 - Power 계산에 빈 잔량이 섞이지 않도록)
+
+주의: KIS 분봉 API는 당일 데이터만 제공하고 호가 잔량이 없어 price_log 공백을 메울 수 없습니다.
+      --gaps는 공백을 보여 주고 당일 분봉을 minute_price에 적재할 뿐, price_log 공백은 그대로 남습니다.
+
+사용 예:
+    python backfill.py --codes 069500 005930 --years 5   # 일봉 5년 + 당일 분봉
+    python backfill.py --gaps                            # price_log 종목별 공백 리포트 후 당일 분봉 적재
+    python backfill.py --gaps --interval 10 --after-hours # 수집기를 이 옵션으로 돌렸을 때 기준
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import kis_http
+from market_calendar import MarketCadence, MarketCalendar, now_kst, to_kst
+from rate_limit import default_limiter
+
+DB_FILE = "trading.db"
+CHECKPOINT_FILE = "backfill-checkpoint.json"
+MAX_WORKERS = 8
+COLLECT_INTERVAL = 60    # save_data.py --interval 기본값 (공백 판단 기준 주기)
+GAP_SLACK = 2.0          # 예상 수집 주기의 이 배수보다 오래 비면 공백
+SESSION_OPEN = "09:00:00"
+SESSION_CLOSE = "15:30:00"
+
+DAILY_PATH = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+INTRADAY_PATH = "/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
+
+
+# -----------------------------------------------------------
+# 1. 체크포인트 (진행 상황 저장)
+# -----------------------------------------------------------
+class Checkpoint:
+    """
+    {"ranges": {code: {"from": YYYYMMDD, "to": YYYYMMDD}}} 형태로 저장
+    from~to: 일봉 적재가 끝난 연속 구간 (과거 방향 페이지를 받을 때마다 from을 앞당김)
+    """
+
+    def __init__(self, path: str = CHECKPOINT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data: Dict[str, Dict] = {"ranges": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                # 예전 형식({"daily": 종료일 커서, "done": 완료 표시})은 기간을 알 수 없어 버림 → 한 번 다시 조회
+                self.data["ranges"] = json.load(f).get("ranges", {})
+
+    def get(self, code: str) -> Optional[Tuple[str, str]]:
+        covered = self.data["ranges"].get(code)
+        return (covered["from"], covered["to"]) if covered else None
+
+    def set(self, code: str, first: str, last: str) -> None:
+        with self._lock:
+            self.data["ranges"][code] = {"from": first, "to": last}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=4, ensure_ascii=False)
+            os.replace(tmp, self.path)  # 중간에 죽어도 파일이 깨지지 않도록 교체 방식으로 저장
+
+
+def _day(value: str, days: int) -> str:
+    """YYYYMMDD 날짜를 days일 이동"""
+    return (datetime.datetime.strptime(value, "%Y%m%d") + datetime.timedelta(days=days)).strftime("%Y%m%d")
+
+
+# -----------------------------------------------------------
+# 2. 공백 탐지
+# -----------------------------------------------------------
+def _windows(cadence: MarketCadence, day: datetime.date) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """그날 수집기가 도는 구간 (KST, 이어지는 구간은 합침 - 장전 동시호가~마감 동시호가)"""
+    windows = []
+    for start, end, name in cadence.calendar.phases(day):
+        if name not in cadence.active:
+            continue
+        if windows and windows[-1][1] == start:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def detect_gaps(conn, code: str, cadence: Optional[MarketCadence] = None,
+                now: Optional[datetime.datetime] = None) -> List[Tuple[str, str]]:
+    """
+    종목의 price_log에서 수집 구간 안의 공백 탐지 (리포트 전용 - price_log를 채우지 않음)
+
+    Args:
+        conn: sqlite3 연결
+        code: 종목코드
+        cadence: 수집기 주기 정책 (기본값: krx_holidays.json 달력 + COLLECT_INTERVAL초, save_data.py 기본값과 같음)
+                 휴장일은 건너뛰고, 개장 직후/동시호가처럼 주기가 짧은 구간은 그 주기로 판단
+        now: 기준 시각 (기본값: 현재 KST) - 아직 오지 않은 구간은 공백이 아님
+
+    Returns:
+        [(공백 시작 timestamp, 공백 끝 timestamp), ...] (price_log와 같은 KST 문자열)
+    """
+    cadence = cadence or MarketCadence(MarketCalendar(), COLLECT_INTERVAL)
+    now = to_kst(now) if now else now_kst()
+    by_day: Dict[datetime.date, List[datetime.datetime]] = {}
+    for (ts,) in conn.execute("SELECT timestamp FROM price_log WHERE code = ? ORDER BY timestamp", (code,)):
+        when = to_kst(datetime.datetime.strptime(ts[:19], "%Y-%m-%d %H:%M:%S"))
+        by_day.setdefault(when.date(), []).append(when)
+    if not by_day:
+        return []
+
+    def expected(when: datetime.datetime) -> float:
+        return cadence.interval_at(when.timestamp()) or cadence.base
+
+    def fmt(when: datetime.datetime) -> str:
+        return when.strftime("%Y-%m-%d %H:%M:%S")
+
+    gaps = []
+    day, last_day = min(by_day), max(by_day)
+    while day <= last_day:   # 첫 수집일 ~ 마지막 수집일 (그 사이 통째로 빠진 영업일 포함)
+        for window_start, window_end in _windows(cadence, day):
+            window_end = min(window_end, now)
+            if window_end <= window_start:
+                continue
+            prev = window_start
+            for when in [t for t in by_day.get(day, []) if window_start <= t < window_end] + [window_end]:
+                # 주기가 바뀌는 경계(개장 직후 → 정규장)에서는 긴 쪽 주기 기준
+                allowed = GAP_SLACK * max(expected(prev), expected(when - datetime.timedelta(milliseconds=1)))
+                if (when - prev).total_seconds() > allowed:
+                    gaps.append((fmt(prev), fmt(when)))
+                prev = when
+        day += datetime.timedelta(days=1)
+    return gaps
+
+
+# -----------------------------------------------------------
+# 3. 차트 API 조회
+# -----------------------------------------------------------
+def _headers(token: str, app_key: str, app_secret: str, tr_id: str) -> Dict[str, str]:
+    return {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {token}",
+        "appkey": app_key,
+        "appsecret": app_secret,
+        "tr_id": tr_id,
+    }
+
+
+def fetch_daily_page(token, app_key, app_secret, url_base, code, start, end) -> Optional[List[Dict]]:
+    """일봉 1페이지 조회 (end부터 과거 방향으로 최대 100건)"""
+    params = {
+        "FID_COND_MRKT_DIV_CODE": "J",
+        "FID_INPUT_ISCD": code,
+        "FID_INPUT_DATE_1": start,   # 조회 시작일 (YYYYMMDD)
+        "FID_INPUT_DATE_2": end,     # 조회 종료일 (YYYYMMDD)
+        "FID_PERIOD_DIV_CODE": "D",  # 일봉
+        "FID_ORG_ADJ_PRC": "0",      # 수정주가 반영
+    }
+    default_limiter.acquire()
+    res = kis_http.get(url_base + DAILY_PATH, headers=_headers(token, app_key, app_secret, "FHKST03010100"),
+                       params=params, timeout=10)
+    data = res.json()
+    if res.status_code != 200 or data.get("rt_cd") != "0":
+        print(f"❌ [일봉 {code}] {data.get('msg1', 'API 오류')}")
+        return None
+    return [row for row in data.get("output2", []) if row.get("stck_bsop_date")]
+
+
+def fetch_intraday_page(token, app_key, app_secret, url_base, code, hour) -> Optional[List[Dict]]:
+    """당일 분봉 1페이지 조회 (hour(HHMMSS)부터 과거 방향으로 최대 30건)"""
+    params = {
+        "FID_ETC_CLS_CODE": "",
+        "FID_COND_MRKT_DIV_CODE": "J",
+        "FID_INPUT_ISCD": code,
+        "FID_INPUT_HOUR_1": hour,
+        "FID_PW_DATA_INCU_YN": "Y",  # 과거 데이터 포함
+    }
+    default_limiter.acquire()
+    res = kis_http.get(url_base + INTRADAY_PATH, headers=_headers(token, app_key, app_secret, "FHKST03010200"),
+                       params=params, timeout=10)
+    data = res.json()
+    if res.status_code != 200 or data.get("rt_cd") != "0":
+        print(f"❌ [분봉 {code}] {data.get('msg1', 'API 오류')}")
+        return None
+    return [row for row in data.get("output2", []) if row.get("stck_cntg_hour")]
+
+
+# -----------------------------------------------------------
+# 4. 적재
+# -----------------------------------------------------------
+class Loader:
+    def __init__(self, token, app_key, app_secret, url_base, db_file=DB_FILE, checkpoint=None):
+        self.token = token
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.url_base = url_base
+        self.checkpoint = checkpoint or Checkpoint()
+        self.db_lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_price (
+            code TEXT,
+            date TEXT,
+            open INTEGER,
+            high INTEGER,
+            low INTEGER,
+            close INTEGER,
+            volume INTEGER,
+            PRIMARY KEY (code, date)
+        )
+        """)
+        # 당일 분봉 (호가 잔량이 없어 수집기의 price_log와 분리)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS minute_price (
+            code TEXT,
+            timestamp TEXT,
+            price INTEGER,
+            volume INTEGER,
+            PRIMARY KEY (code, timestamp)
+        )
+        """)
+        self.conn.commit()
+
+    def _daily_pages(self, code: str, start: str, end: str, on_page=None) -> Optional[int]:
+        """
+        start~end 일봉을 end부터 과거 방향으로 페이지 단위 적재
+        on_page(oldest): 페이지를 저장할 때마다 호출 (oldest = 여기까지 적재 완료, 마지막 페이지면 start)
+
+        Returns:
+            적재 건수 (조회 실패로 중단되면 None)
+        """
+        cursor_end = end
+        total = 0
+        while cursor_end >= start:
+            rows = fetch_daily_page(self.token, self.app_key, self.app_secret, self.url_base,
+                                    code, start, cursor_end)
+            if rows is None:
+                return None  # 체크포인트까지는 남아 있으므로 다음 실행에서 이어서 진행
+            records = [
+                (code, r["stck_bsop_date"], int(r["stck_oprc"]), int(r["stck_hgpr"]),
+                 int(r["stck_lwpr"]), int(r["stck_clpr"]), int(r["acml_vol"]))
+                for r in rows if start <= r["stck_bsop_date"] <= end
+            ]
+            with self.db_lock:
+                self.conn.executemany("INSERT OR REPLACE INTO daily_price VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                self.conn.commit()
+            total += len(records)
+
+            # 마지막 페이지(100건 미만)면 start까지 끝, 아니면 가장 오래된 날 전날부터 이어서
+            oldest = start
+            if len(rows) >= 100:
+                oldest = max(start, min(r["stck_bsop_date"] for r in rows))
+            if on_page is not None:
+                on_page(oldest)
+            cursor_end = _day(oldest, -1) if oldest > start else ""
+        return total
+
+    def load_daily(self, code: str, start: str, end: str) -> int:
+        """
+        start~end 일봉 적재. 체크포인트의 적재 완료 구간(from~to)은 건너뛰고 앞뒤로 빠진 기간만 조회
+        - to 이후 (새 영업일): to+1~end 를 받은 뒤 to를 end로
+        - from 이전 (더 긴 기간): from-1부터 과거 방향으로 페이지마다 from을 앞당김 (중단 후 이어서 진행)
+        (오늘 일봉은 장중에 바뀌므로 적재해도 to는 어제까지로 기록 → 다음 실행에서 다시 받음)
+        """
+        today = datetime.date.today().strftime("%Y%m%d")
+        settled_end = min(end, _day(today, -1))
+        covered = self.checkpoint.get(code)
+        total = 0
+
+        if covered is None:
+            # 처음: end부터 과거 방향으로, 페이지마다 적재 완료 구간 기록
+            count = self._daily_pages(code, start, end,
+                                      lambda oldest: self.checkpoint.set(code, oldest, settled_end))
+            return count or 0
+
+        first, last = covered
+        if last < end:
+            newer_start = max(_day(last, 1), start)
+            count = self._daily_pages(code, newer_start, end)
+            if count is None:
+                return total
+            total += count
+            last = max(last, settled_end)
+            self.checkpoint.set(code, first, last)
+        if first > start:
+            count = self._daily_pages(code, start, _day(first, -1),
+                                      lambda oldest: self.checkpoint.set(code, oldest, last))
+            total += count or 0
+        return total
+
+    def load_intraday(self, code: str) -> int:
+        """당일 분봉 전체를 minute_price에 적재 (이미 있는 행은 유지)"""
+        hour = now_kst().strftime("%H%M%S")   # 분봉 시각은 KST
+        if hour > SESSION_CLOSE.replace(":", ""):
+            hour = SESSION_CLOSE.replace(":", "")
+        total = 0
+        while hour >= SESSION_OPEN.replace(":", ""):
+            rows = fetch_intraday_page(self.token, self.app_key, self.app_secret, self.url_base, code, hour)
+            if not rows:
+                break
+            records = [
+                (code,
+                 f"{r['stck_bsop_date'][:4]}-{r['stck_bsop_date'][4:6]}-{r['stck_bsop_date'][6:]} "
+                 f"{r['stck_cntg_hour'][:2]}:{r['stck_cntg_hour'][2:4]}:{r['stck_cntg_hour'][4:]}",
+                 int(r["stck_prpr"]), int(r["cntg_vol"]))
+                for r in rows
+            ]
+            with self.db_lock:
+                self.conn.executemany("INSERT OR IGNORE INTO minute_price VALUES (?, ?, ?, ?)", records)
+                self.conn.commit()
+            total += len(records)
+
+            oldest = datetime.datetime.strptime(min(r["stck_cntg_hour"] for r in rows), "%H%M%S")
+            hour = (oldest - datetime.timedelta(minutes=1)).strftime("%H%M%S")
+            if len(rows) < 30:
+                break
+        return total
+
+    def run(self, codes: List[str], start: str, end: str, intraday: bool = True,
+            max_workers: int = MAX_WORKERS) -> Dict[str, int]:
+        """여러 종목을 동시에 적재. 체크포인트에 적재 완료로 기록된 기간은 다시 조회하지 않음"""
+        print(f"🚚 [백필] {len(codes)}개 종목 적재 시작 ({start}~{end}, 동시 {max_workers}개)")
+
+        def work(code):
+            count = self.load_daily(code, start, end)
+            if intraday:
+                count += self.load_intraday(code)
+            return count
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(work, code): code for code in codes}
+            for future in as_completed(futures):
+                code = futures[future]
+                try:
+                    results[code] = future.result()
+                    print(f"✅ [백필] {code}: {results[code]:,}건")
+                except Exception as e:
+                    print(f"❌ [백필] {code} 오류 (다음 실행에서 이어서 진행): {e}")
+        return results
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# -----------------------------------------------------------
+# CLI
+# -----------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+    from token_manage import get_token_for_api
+    import key
+
+    parser = argparse.ArgumentParser(description="과거 시세 백필 도구")
+    parser.add_argument("--codes", nargs="*", default=[], help="종목코드 목록")
+    parser.add_argument("--codes-file", help="종목코드 파일 (한 줄에 하나)")
+    parser.add_argument("--years", type=int, default=1, help="일봉 조회 기간 (년)")
+    parser.add_argument("--no-intraday", action="store_true", help="당일 분봉 적재 생략")
+    parser.add_argument("--gaps", action="store_true",
+                        help="price_log 공백 리포트 후 당일 분봉 적재 (minute_price, price_log 공백은 채우지 않음)")
+    parser.add_argument("--interval", type=float, default=COLLECT_INTERVAL,
+                        help="공백 판단 기준: 수집기(save_data.py) --interval")
+    parser.add_argument("--after-hours", action="store_true", help="공백 판단 기준: 수집기를 --after-hours로 돌림")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="동시 작업 종목 수")
+    parser.add_argument("--reset", action="store_true", help="체크포인트를 지우고 처음부터 진행")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    codes = list(args.codes)
+    if args.codes_file:
+        with open(args.codes_file, "r", encoding="utf-8") as f:
+            codes += [line.strip() for line in f if line.strip()]
+
+    if args.gaps:
+        conn = sqlite3.connect(DB_FILE)
+        if not codes:
+            codes = [row[0] for row in conn.execute("SELECT DISTINCT code FROM price_log")]
+        cadence = MarketCadence(MarketCalendar(), args.interval, after_hours=args.after_hours)
+        print("ℹ️ 공백 리포트 전용: price_log 공백은 채워지지 않습니다. (분봉은 호가 잔량이 없어 minute_price에만 적재)")
+        for code in codes:
+            gaps = detect_gaps(conn, code, cadence)
+            print(f"🔎 [{code}] 공백 {len(gaps)}구간")
+            for gap_start, gap_end in gaps[-10:]:
+                print(f"   {gap_start} ~ {gap_end}")
+        conn.close()
+
+    if not codes:
+        print("❌ 종목코드를 지정하세요. (--codes 또는 --codes-file)")
+        exit(1)
+
+    token = get_token_for_api(key.APP_KEY, key.APP_SECRET, key.URL_BASE)
+    if not token:
+        print("💥 토큰 발급 실패. 프로그램을 종료합니다.")
+        exit(1)
+
+    loader = Loader(token, key.APP_KEY, key.APP_SECRET, key.URL_BASE)
+    if args.gaps:
+        # 공백 보충 모드: 당일 분봉만 빠르게 적재
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            counts = list(pool.map(loader.load_intraday, codes))
+        print(f"🎉 분봉 {sum(counts):,}건 적재 완료 (minute_price)")
+    else:
+        today = datetime.date.today()
+        start = (today - datetime.timedelta(days=365 * args.years)).strftime("%Y%m%d")
+        results = loader.run(codes, start, today.strftime("%Y%m%d"),
+                             intraday=not args.no_intraday, max_workers=args.workers)
+        print(f"🎉 백필 완료: {len(results)}개 종목, {sum(results.values()):,}건")
+    loader.close()
@@ -0,0 +1,264 @@
+"""
+benchmark.py: 로컬 저장/분석 경로 마이크로 벤치마크 (오프라인, 결과는 JSON)
+- 임시 디렉터리에 합성 price_log(영업일 09:00~15:30, 수집 주기 간격, 종목별 랜덤워크)를 만들어 측정
+- 측정 항목
+    insert:   save_data.save_to_db 경로의 저장 처리량 (행/초) + 저널/델타 저장 방식 비교
+    latest:   view_db/daemon 최근 N건 조회 지연 (read_price_log latest=N)
+    analysis: analysis.py 한 종목 전체 이력 로드 + calculate_rsi 시간 (pandas 필요)
+    size:     DB 파일 크기, 행당 바이트
+- 스키마/저장 방식을 바꾼 전후로 실행해서 JSON 결과를 비교
+
+실행:
+    python benchmark.py                            # small, medium 규모
+    python benchmark.py --scale large --out bench.json
+    python benchmark.py --days 5 --codes 20 --json # 직접 규모 지정, JSON만 출력
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import save_data
+from delta_store import DeltaWriter, read_price_log
+from tick_journal import TickJournal, format_ts
+
+# 이름: (영업일 수, 종목 수)
+SCALES = {
+    "small": (1, 1),
+    "medium": (30, 50),
+    "large": (250, 500),
+}
+DEFAULT_SCALES = ("small", "medium")
+INTERVAL = 60          # 합성 데이터 수집 주기 (초, save_data.py --interval 기본값)
+INSERT_ROWS = 2000     # 저장 경로별 측정 행 수
+LATEST_N = 5
+LATEST_REPEAT = 200
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _dist(values_ms: List[float]) -> Dict[str, float]:
+    return {"p50_ms": round(_percentile(values_ms, 0.5), 4), "p99_ms": round(_percentile(values_ms, 0.99), 4),
+            "max_ms": round(max(values_ms), 4) if values_ms else 0.0}
+
+
+# -----------------------------------------------------------
+# 1. 합성 데이터
+# -----------------------------------------------------------
+def trading_days(days: int, end: Optional[datetime.date] = None) -> List[datetime.date]:
+    """end(기본값: 어제) 이전 최근 영업일 days개 (주말만 제외)"""
+    day = end or datetime.date.today() - datetime.timedelta(days=1)
+    out = []
+    while len(out) < days:
+        if day.weekday() < 5:
+            out.append(day)
+        day -= datetime.timedelta(days=1)
+    return out[::-1]
+
+
+def generate_rows(days: int, codes: int, interval: int = INTERVAL, seed: int = 42):
+    """(timestamp, code, price, volume, total_ask_qty, total_bid_qty) 행을 시간순으로 생성"""
+    rng = random.Random(seed)
+    code_list = [f"{900000 + i:06d}" for i in range(codes)]
+    prices = {c: rng.randrange(5000, 100000, 5) for c in code_list}
+    volumes = dict.fromkeys(code_list, 0)
+    per_day = int(6.5 * 3600 // interval) + 1
+    for day in trading_days(days):
+        start = datetime.datetime.combine(day, datetime.time(9, 0)).timestamp()
+        for c in code_list:
+            volumes[c] = 0
+        for k in range(per_day):
+            ts = format_ts(start + k * interval)
+            for c in code_list:
+                prices[c] = max(5, prices[c] + 5 * rng.randint(-3, 3))
+                volumes[c] += rng.randint(0, 5000)
+                yield ts, c, prices[c], volumes[c], rng.randint(10000, 500000), rng.randint(10000, 500000)
+
+
+def build_db(path: str, days: int, codes: int, interval: int = INTERVAL) -> int:
+    """save_data.init_db 스키마로 DB를 만들고 합성 행 적재. 적재 행 수 반환"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_data.init_db(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    rows = 0
+    batch = []
+    for row in generate_rows(days, codes, interval):
+        batch.append(row)
+        if len(batch) >= 50000:
+            conn.executemany("INSERT OR REPLACE INTO price_log VALUES (?, ?, ?, ?, ?, ?)", batch)
+            rows += len(batch)
+            batch.clear()
+    conn.executemany("INSERT OR REPLACE INTO price_log VALUES (?, ?, ?, ?, ?, ?)", batch)
+    rows += len(batch)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+# -----------------------------------------------------------
+# 2. 측정
+# -----------------------------------------------------------
+def bench_insert(path: str, workdir: str, n: int = INSERT_ROWS) -> Dict[str, Dict]:
+    """적재된 DB 위에 오늘 날짜 행을 n건씩 저장 (save_to_db / 저널+save_to_db / 델타)"""
+    base = datetime.datetime.combine(datetime.date.today(), datetime.time(9, 0)).timestamp()
+    rng = random.Random(7)
+    samples = [(base + i, rng.randrange(30000, 40000, 5), i * 10, rng.randint(1, 9) * 1000,
+                rng.randint(1, 9) * 1000) for i in range(n)]
+    results = {}
+
+    def timed(label, fn):
+        latencies = []
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):   # 저장 시 출력은 측정에서 제외
+            for i, sample in enumerate(samples):
+                t0 = time.perf_counter()
+                fn(i, sample)
+                latencies.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+        results[label] = {"rows": n, "rows_per_s": round(n / elapsed, 1), **_dist(latencies)}
+
+    timed("save_to_db", lambda i, s: save_data.save_to_db("800000", s[1], s[2], s[3], s[4], ts=format_ts(s[0]),
+                                                         db_file=path))
+
+    journal = TickJournal(os.path.join(workdir, "bench.journal"), fsync=False)
+    timed("journal+save_to_db", lambda i, s: save_data.store_snapshot(journal, None, "800001", *s[1:],
+                                                                         sampled_at=s[0], db_file=path))
+    journal.close()
+
+    writer = DeltaWriter(path)
+    timed("delta", lambda i, s: writer.append(s[0], "800002", *s[1:]))
+    writer.close()
+    return results
+
+
+def bench_latest(path: str, n: int = LATEST_N, repeat: int = LATEST_REPEAT) -> Dict:
+    conn = sqlite3.connect(path)
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        read_price_log(conn, latest=n)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    conn.close()
+    return {"n": n, "repeat": repeat, **_dist(latencies)}
+
+
+def bench_analysis(path: str) -> Dict:
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return {"skipped": "pandas 없음"}
+    from analysis import analyze, calculate_rsi, load_price_log
+
+    conn = sqlite3.connect(path)
+    t0 = time.perf_counter()
+    df = load_price_log(conn, code=f"{900000:06d}")   # 분석은 종목 하나 기준 (합성 첫 종목)
+    t1 = time.perf_counter()
+    calculate_rsi(df["price"])
+    t2 = time.perf_counter()
+    analyze(df)
+    t3 = time.perf_counter()
+    conn.close()
+    return {"rows": len(df), "load_ms": round((t1 - t0) * 1000, 2), "rsi_ms": round((t2 - t1) * 1000, 2),
+            "analyze_ms": round((t3 - t2) * 1000, 2)}
+
+
+def bench_size(path: str, rows: int) -> Dict:
+    conn = sqlite3.connect(path)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    size = os.path.getsize(path)
+    return {"bytes": size, "pages": pages, "page_size": page_size,
+            "bytes_per_row": round(size / rows, 1) if rows else 0.0}
+
+
+def run_scale(name: str, days: int, codes: int, interval: int = INTERVAL, insert_rows: int = INSERT_ROWS,
+              keep: bool = False) -> Dict:
+    workdir = tempfile.mkdtemp(prefix=f"hantu-bench-{name}-")
+    path = os.path.join(workdir, "trading.db")
+    try:
+        t0 = time.perf_counter()
+        rows = build_db(path, days, codes, interval)
+        result = {"scale": name, "days": days, "codes": codes, "interval": interval, "rows": rows,
+                  "build_s": round(time.perf_counter() - t0, 2)}
+        result["size"] = bench_size(path, rows)             # 적재 직후 크기 (저장 측정 전)
+        result["latest"] = bench_latest(path)
+        result["analysis"] = bench_analysis(path)
+        result["insert"] = bench_insert(path, workdir, insert_rows)
+        return result
+    finally:
+        if keep:
+            print(f"📁 [벤치마크] DB 보존: {path}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def environment() -> Dict:
+    return {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")}
+
+
+def print_result(r: Dict) -> None:
+    print(f"\n📊 [{r['scale']}] {r['days']}일 x {r['codes']}종목 = {r['rows']:,}행 (생성 {r['build_s']}초)")
+    print(f"   💾 DB 크기: {r['size']['bytes'] / 1024 / 1024:.1f}MB ({r['size']['bytes_per_row']}B/행)")
+    lat = r["latest"]
+    print(f"   🔍 최근 {lat['n']}건 조회: p50 {lat['p50_ms']:.3f}ms / p99 {lat['p99_ms']:.3f}ms")
+    a = r["analysis"]
+    if "skipped" in a:
+        print(f"   📈 분석: 생략 ({a['skipped']})")
+    else:
+        print(f"   📈 분석: 로드 {a['load_ms']}ms + RSI {a['rsi_ms']}ms (analyze {a['analyze_ms']}ms, {a['rows']:,}행)")
+    for label, ins in r["insert"].items():
+        print(f"   ✍️ {label}: {ins['rows_per_s']:,.0f}행/초 (p50 {ins['p50_ms']:.3f}ms / p99 {ins['p99_ms']:.3f}ms)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 저장/분석 경로 벤치마크")
+    parser.add_argument("--scale", nargs="*", choices=sorted(SCALES), help="측정 규모 (기본: small medium)")
+    parser.add_argument("--days", type=int, help="직접 지정: 영업일 수")
+    parser.add_argument("--codes", type=int, help="직접 지정: 종목 수")
+    parser.add_argument("--interval", type=int, default=INTERVAL, help="합성 데이터 수집 주기 (초)")
+    parser.add_argument("--insert-rows", type=int, default=INSERT_ROWS, help="저장 경로별 측정 행 수")
+    parser.add_argument("--keep", action="store_true", help="측정에 쓴 DB를 지우지 않음")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로만 출력")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.days or args.codes:
+        scales = {"custom": (args.days or 1, args.codes or 1)}
+    else:
+        scales = {name: SCALES[name] for name in (args.scale or DEFAULT_SCALES)}
+
+    report = {"environment": environment(), "results": []}
+    for name, (days, codes) in scales.items():
+        result = run_scale(name, days, codes, args.interval, args.insert_rows, args.keep)
+        report["results"].append(result)
+        if not args.json:
+            print_result(result)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if not args.json:
+            print(f"\n📁 결과 저장: {args.out}")
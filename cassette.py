@@ -0,0 +1,229 @@
+"""
+cassette.py: KIS REST 응답 녹화/재생 (오프라인 재현용 HTTP 전송 계층)
+- 녹화(Recorder): 실제 API 호출을 그대로 보내고 요청/응답/소요시간을 카세트 파일에 기록
+- 재생(Player): 네트워크 없이 카세트의 응답을 돌려줌 (녹화 당시 속도 또는 최대 속도)
+- 카세트 형식: gzip 압축 JSON Lines (1줄 = 요청 1건)
+- 키/시크릿/토큰은 기록하지 않음 (요청 헤더 제외, 발급 응답의 토큰은 가짜 값으로 치환)
+- 캐시된 토큰으로 녹화해서 카세트에 토큰/접속키 발급이 없으면 재생 시 가짜 발급 응답을 만들어 줌
+  (재생하는 PC에 유효한 token-expire.json이 없어도 재현 가능)
+- kis_http를 거치는 모든 TR_ID(호가, 잔고, 미체결, 취소, 일봉/분봉, 토큰 발급)에 적용
+
+사용 예 (환경변수로 켜기):
+    KIS_RECORD=collector.cassette.gz python save_data.py          # 실제 API 호출 + 녹화
+    KIS_REPLAY=collector.cassette.gz python save_data.py          # 녹화 속도로 재생
+    KIS_REPLAY=collector.cassette.gz KIS_REPLAY_SPEED=0 python save_data.py   # 최대 속도 재생
+    python cassette.py collector.cassette.gz                      # 카세트 내용 요약
+
+    (재생 시에도 trading.db 등은 실제로 기록되므로 별도 폴더에서 실행 권장)
+
+코드에서 켜기:
+    import kis_http
+    from cassette import Player
+    kis_http.use_transport(Player("collector.cassette.gz", speed=0))
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+VERSION = 1
+SECRET_FIELDS = ("appkey", "appsecret", "secretkey")   # 요청 본문에서 지우는 항목
+TOKEN_FIELDS = ("access_token", "approval_key")        # 발급 응답에서 가짜 값으로 바꾸는 항목
+ISSUE_RESPONSES = {                                    # 카세트에 발급 기록이 없을 때 재생할 응답
+    "/oauth2/tokenP": {"access_token": "REPLAY-access_token", "token_type": "Bearer", "expires_in": 86400},
+    "/oauth2/Approval": {"approval_key": "REPLAY-approval_key"},
+}
+
+
+class CassetteMiss(Exception):
+    """재생할 응답이 카세트에 없음"""
+
+
+def _body(kwargs: Dict[str, Any]) -> Optional[Dict]:
+    data = kwargs.get("json")
+    if data is None and kwargs.get("data"):
+        try:
+            data = json.loads(kwargs["data"])
+        except (TypeError, ValueError):
+            return None
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k not in SECRET_FIELDS}
+    return data
+
+
+def _describe(method: str, url: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    headers = {k.lower(): v for k, v in (kwargs.get("headers") or {}).items()}
+    return {
+        "method": method.upper(),
+        "path": urlsplit(url).path,
+        "tr_id": headers.get("tr_id", ""),
+        "params": kwargs.get("params") or None,
+        "body": _body(kwargs),
+    }
+
+
+def _keys(req: Dict[str, Any]) -> Tuple[tuple, tuple]:
+    """(요청 내용까지 같은 키, 경로/TR_ID만 같은 키)"""
+    loose = (req["method"], req["path"], req["tr_id"])
+    exact = loose + (json.dumps(req["params"], sort_keys=True), json.dumps(req["body"], sort_keys=True))
+    return exact, loose
+
+
+class ReplayResponse:
+    """requests.Response 중 이 저장소에서 쓰는 부분만 흉내 냄"""
+
+    def __init__(self, status_code: int, text: str, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.ok = status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+# -----------------------------------------------------------
+# 1. 녹화
+# -----------------------------------------------------------
+class Recorder:
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"version": VERSION, "recorded_at": self._started}) + "\n")
+        atexit.register(self.close)
+
+    def request(self, method: str, url: str, **kwargs: Any):
+        from kis_http import get_session
+
+        started = time.time()
+        res = get_session().request(method, url, **kwargs)
+        elapsed = time.time() - started
+
+        req = _describe(method, url, kwargs)
+        text = res.text
+        if req["path"].startswith("/oauth2/"):
+            try:
+                data = json.loads(text)
+                for field in TOKEN_FIELDS:
+                    if field in data:
+                        data[field] = f"REPLAY-{field}"
+                text = json.dumps(data, ensure_ascii=False)
+            except ValueError:
+                pass
+
+        entry = dict(req, t=round(started - self._started, 6), elapsed=round(elapsed, 6),
+                     status=res.status_code, headers={k: v for k, v in res.headers.items() if k.lower() == "tr_cont"},
+                     response=text)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.count += 1
+        return res
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                print(f"📼 [카세트] 녹화 {self.count}건 저장: {self.path}")
+
+
+# -----------------------------------------------------------
+# 2. 재생
+# -----------------------------------------------------------
+def read_cassette(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != VERSION:
+            raise ValueError(f"카세트 형식이 다릅니다: {path}")
+        for line in f:
+            yield json.loads(line)
+
+
+class Player:
+    replay = True   # kis_http.replaying() 확인용
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True):
+        """
+        Args:
+            speed: 1.0이면 녹화 당시 응답 시간만큼 대기, 2.0이면 2배속, 0이면 대기 없이 즉시 응답
+            loop: 같은 요청의 녹화분을 다 쓰면 처음부터 다시 사용 (수집기 장시간 재생용)
+        """
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.served = 0
+        self._exact: Dict[tuple, deque] = defaultdict(deque)
+        self._loose: Dict[tuple, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        for entry in read_cassette(path):
+            exact, loose = _keys(entry)
+            self._exact[exact].append(entry)
+            self._loose[loose].append(entry)
+
+    def _next(self, queue: deque) -> Optional[Dict]:
+        while queue:
+            entry = queue.popleft()
+            if self.loop:
+                queue.append(entry)
+                return entry
+            if not entry.get("_used"):   # 두 대기열에 같이 들어 있으므로 한 번만 사용
+                entry["_used"] = True
+                return entry
+        return None
+
+    def request(self, method: str, url: str, **kwargs: Any) -> ReplayResponse:
+        req = _describe(method, url, kwargs)
+        exact, loose = _keys(req)
+        with self._lock:
+            # 요청 내용까지 같은 녹화분 우선, 없으면 같은 TR_ID의 녹화분을 순서대로 사용
+            entry = self._next(self._exact[exact]) or self._next(self._loose[loose])
+            if entry is not None:
+                self.served += 1
+        if entry is None and req["path"] in ISSUE_RESPONSES:
+            return ReplayResponse(200, json.dumps(ISSUE_RESPONSES[req["path"]]))
+        if entry is None:
+            raise CassetteMiss(f"카세트에 없는 요청: {req['method']} {req['path']} ({req['tr_id'] or '-'})")
+
+        if self.speed > 0:
+            time.sleep(entry["elapsed"] / self.speed)
+        return ReplayResponse(entry["status"], entry["response"], entry.get("headers"))
+
+
+def summarize(path: str) -> Dict[tuple, Dict[str, float]]:
+    """(경로, TR_ID)별 녹화 건수와 평균/최대 응답 시간"""
+    stats: Dict[tuple, Dict[str, float]] = {}
+    for entry in read_cassette(path):
+        s = stats.setdefault((entry["path"], entry["tr_id"]), {"count": 0, "total": 0.0, "max": 0.0})
+        s["count"] += 1
+        s["total"] += entry["elapsed"]
+        s["max"] = max(s["max"], entry["elapsed"])
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="카세트 파일 요약")
+    parser.add_argument("path", help="카세트 파일 경로")
+    args = parser.parse_args()
+
+    print(f"📼 [카세트] {args.path}")
+    for (path, tr_id), s in sorted(summarize(args.path).items()):
+        print(f"   {tr_id or '-':<14} {path:<60} {s['count']:>6}건 | "
+              f"평균 {s['total'] / s['count'] * 1000:7.1f}ms | 최대 {s['max'] * 1000:7.1f}ms")
@@ -1,10 +1,13 @@
-import requests
+import kis_http
+import daemon
+import profiler
 import json
 import time
 import urllib.parse
 import os
 from datetime import datetime, timedelta, timezone
 from token_manage import get_token_for_api
+from accounts import default_account
 import key  # key.py 파일에서 설정 불러오기
 
 # =========================================================
@@ -16,9 +19,10 @@ URL_BASE = key.URL_BASE
 TOKEN_FILE = key.TOKEN_FILE
 SECURITY_MARGIN = 60 * 10  # 토큰 만료 10분 전이면 갱신 시도 (안전 여유 시간)
 
-# 잔고 조회용 설정
-CANO = "43407510"  # 고객님의 계좌번호 8자리
-ACNT_PRDT_CD = "01" # 계좌 상품 코드 (일반적으로 '01' 사용)
+# 잔고 조회용 설정 (accounts.json 등록부의 첫 번째 계좌, 전체 계좌는 accounts.py 사용)
+ACCOUNT = default_account()
+CANO = ACCOUNT.cano  # 고객님의 계좌번호 8자리
+ACNT_PRDT_CD = ACCOUNT.acnt_prdt_cd # 계좌 상품 코드 (일반적으로 '01' 사용)
 # =========================================================
 
 
@@ -26,20 +30,20 @@ ACNT_PRDT_CD = "01" # 계좌 상품 코드 (일반적으로 '01' 사용)
 # --- 2. 위탁계좌(일반 주식계좌) 잔고 조회 ---
 # =========================================================
 
-def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
+def fetch_deposit_balance(token, app_key, cano, acnt_prdt_cd, app_secret=None, url_base=None):
     """
-    위탁계좌(일반 주식계좌)의 예수금 잔고 조회
+    잔고 조회 API 호출만 수행 (출력 없음)
+    (HTTP 상태코드, 응답 JSON) 튜플 반환 - daemon.py, accounts.py에서도 재사용
+    app_secret/url_base를 생략하면 key.py 설정 사용
     """
-    print("\n🔍 위탁계좌 예수금 잔고 조회를 시작합니다...")
-    
     PATH = "/uapi/domestic-stock/v1/trading/inquire-balance"
-    URL = URL_BASE + PATH
+    URL = (url_base or URL_BASE) + PATH
     
     HEADERS = {
         "Content-Type": "application/json",
         "authorization": f"Bearer {token}",
         "appkey": app_key,
-        "appsecret": APP_SECRET,
+        "appsecret": app_secret or APP_SECRET,
         "tr_id": "TTTC8434R"  # 주식잔고조회 TR_ID
     }
     
@@ -58,69 +62,85 @@ def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
         "CTX_AREA_NK100": ""
     }
 
-    try:
-        res = requests.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
-        response_data = res.json()
-        
-        print(f"📡 응답 상태: {res.status_code}")
+    res = kis_http.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
+    return res.status_code, res.json()
+
+
+def report_deposit_balance(status_code, response_data):
+    """
+    잔고 조회 응답을 화면에 출력하고, 성공 시 응답 데이터를 반환
+    """
+    print(f"📡 응답 상태: {status_code}")
+    
+    if status_code == 200 and response_data.get('rt_cd') == '0':
+        print("✅ [위탁계좌 잔고 조회 성공]")
+        print("=" * 60)
         
-        if res.status_code == 200 and response_data.get('rt_cd') == '0':
-            print("✅ [위탁계좌 잔고 조회 성공]")
-            print("=" * 60)
+        # output2 (예수금 정보) 분석
+        if response_data.get('output2') and len(response_data['output2']) > 0:
+            cash_info = response_data['output2'][0]
+            print("💰 [위탁계좌 예수금 정보]")
             
-            # output2 (예수금 정보) 분석
-            if response_data.get('output2') and len(response_data['output2']) > 0:
-                cash_info = response_data['output2'][0]
-                print("💰 [위탁계좌 예수금 정보]")
-                
-                # 주요 필드 출력
-                important_fields = {
-                    'dnca_tot_amt': '예수금 총액',
-                    'nxdy_excc_amt': '출금가능금액',
-                    'prvs_rcdl_excc_amt': '예수금',
-                    'tot_evlu_amt': '총평가금액'
-                }
-                
-                for field, description in important_fields.items():
-                    value = cash_info.get(field, '0')
-                    if value and str(value) != '0':
-                        print(f"   {description}: {int(value):>15,} 원")
-                
-                # 투자가능 금액 및 6% 계산``
-                tot_evlu_amt = int(cash_info.get('tot_evlu_amt', '0'))  # 총평가금액 (투자가능금액)
-                six_percent = int(tot_evlu_amt * 0.06)
-                
-                print(f"\n📊 [투자 가능 금액 분석]")
-                print(f"   투자가능금액: {tot_evlu_amt:>15,} 원")
-                print(f"   6% 투자금액: {six_percent:>15,} 원")
-                print(f"   (1회 최대 투자 권장금액)")
+            # 주요 필드 출력
+            important_fields = {
+                'dnca_tot_amt': '예수금 총액',
+                'nxdy_excc_amt': '출금가능금액',
+                'prvs_rcdl_excc_amt': '예수금',
+                'tot_evlu_amt': '총평가금액'
+            }
             
-            # output1 (주식 보유 내역) 분석
-            if response_data.get('output1'):
-                print(f"\n📈 [보유 주식] {len(response_data['output1'])}개 종목")
-                total_stock_value = 0
-                for i, stock in enumerate(response_data['output1'], 1):
-                    stock_qty = int(stock.get('hldg_qty', 0))
-                    stock_value = int(stock.get('evlu_amt', 0))
-                    
-                    if stock_qty > 0:
-                        print(f"   {i:2d}. {stock.get('prdt_name', 'N/A')}")
-                        print(f"       종목코드: {stock.get('pdno', 'N/A')}")
-                        print(f"       보유수량: {stock_qty:>8} 주")
-                        print(f"       평가금액: {stock_value:>8,} 원")
-                        total_stock_value += stock_value
+            for field, description in important_fields.items():
+                value = cash_info.get(field, '0')
+                if value and str(value) != '0':
+                    print(f"   {description}: {int(value):>15,} 원")
+            
+            # 투자가능 금액 및 6% 계산``
+            tot_evlu_amt = int(cash_info.get('tot_evlu_amt', '0'))  # 총평가금액 (투자가능금액)
+            six_percent = int(tot_evlu_amt * 0.06)
+            
+            print(f"\n📊 [투자 가능 금액 분석]")
+            print(f"   투자가능금액: {tot_evlu_amt:>15,} 원")
+            print(f"   6% 투자금액: {six_percent:>15,} 원")
+            print(f"   (1회 최대 투자 권장금액)")
+        
+        # output1 (주식 보유 내역) 분석
+        if response_data.get('output1'):
+            print(f"\n📈 [보유 주식] {len(response_data['output1'])}개 종목")
+            total_stock_value = 0
+            for i, stock in enumerate(response_data['output1'], 1):
+                stock_qty = int(stock.get('hldg_qty', 0))
+                stock_value = int(stock.get('evlu_amt', 0))
                 
-                if total_stock_value > 0:
-                    print(f"\n   💰 주식 총 평가금액: {total_stock_value:>15,} 원")
-            else:
-                print("\n📊 보유 주식이 없습니다.")
+                if stock_qty > 0:
+                    print(f"   {i:2d}. {stock.get('prdt_name', 'N/A')}")
+                    print(f"       종목코드: {stock.get('pdno', 'N/A')}")
+                    print(f"       보유수량: {stock_qty:>8} 주")
+                    print(f"       평가금액: {stock_value:>8,} 원")
+                    total_stock_value += stock_value
             
-            print("=" * 60)
-            return response_data
+            if total_stock_value > 0:
+                print(f"\n   💰 주식 총 평가금액: {total_stock_value:>15,} 원")
         else:
-            error_msg = response_data.get('msg1', 'API 오류')
-            print(f"❌ [위탁계좌 조회 실패]: {error_msg}")
-            return None
+            print("\n📊 보유 주식이 없습니다.")
+        
+        print("=" * 60)
+        return response_data
+    else:
+        error_msg = response_data.get('msg1', 'API 오류')
+        print(f"❌ [위탁계좌 조회 실패]: {error_msg}")
+        return None
+
+
+def get_deposit_balance(token, app_key, cano, acnt_prdt_cd, app_secret=None, url_base=None):
+    """
+    위탁계좌(일반 주식계좌)의 예수금 잔고 조회
+    """
+    print("\n🔍 위탁계좌 예수금 잔고 조회를 시작합니다...")
+
+    try:
+        status_code, response_data = fetch_deposit_balance(token, app_key, cano, acnt_prdt_cd,
+                                                           app_secret=app_secret, url_base=url_base)
+        return report_deposit_balance(status_code, response_data)
 
     except Exception as e:
         print(f"❌ [위탁계좌 조회 오류]: {e}")
@@ -132,23 +152,45 @@ def get_deposit_balance(token, app_key, cano, acnt_prdt_cd):
 # =========================================================
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="위탁계좌 예수금/잔고 조회")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args, "check_acc")
+
     print("🚀 한국투자증권 계좌 조회 프로그램")
-    print(f"📁 토큰 파일: {TOKEN_FILE}")
+    print(f"📁 토큰 파일: {ACCOUNT.token_file}")
     print(f"👤 계좌번호: {CANO}-{ACNT_PRDT_CD}")
     
-    # 토큰 관리 시스템을 통해 유효한 토큰을 가져옵니다.
-    final_token = get_token_for_api(APP_KEY, APP_SECRET, URL_BASE)
+    with profiler.iteration("balance"):
+        # 상주 데몬(daemon.py)이 떠 있으면 데몬의 토큰/세션으로 바로 조회 (콜드 스타트 생략)
+        reply = daemon.call("balance", cano=CANO, acnt_prdt_cd=ACNT_PRDT_CD)
     
-    if final_token:
-        print(f"🔑 토큰 획득 성공: {final_token[:30]}...")
+        if reply is not None:
+            print("\n🔍 위탁계좌 예수금 잔고 조회를 시작합니다... (daemon)")
+            if reply.get("error"):
+                print(f"❌ [위탁계좌 조회 오류]: {reply['error']}")
+                result = None
+            else:
+                result = report_deposit_balance(reply["status"], reply["data"])
+        else:
+            # 토큰 관리 시스템을 통해 유효한 토큰을 가져옵니다. (계좌별 앱키가 있으면 그 앱키/토큰 파일 사용)
+            app_key, app_secret, url_base = ACCOUNT.credentials()
+            final_token = ACCOUNT.token()
         
-        # 위탁계좌 잔고 조회
-        result = get_deposit_balance(final_token, APP_KEY, CANO, ACNT_PRDT_CD)
+            if not final_token:
+                print("💥 프로그램을 종료합니다. 유효한 토큰을 확보하지 못했음. ")
+                exit(1)
         
-        if result:
-            print("\n🎉 계좌 조회가 완료되었습니다.")
-            print("✅ 프로그램이 정상적으로 작동하고 있습니다!")
-        else:
-            print("\n❌ 계좌 조회에 실패했습니다.")
+            print(f"🔑 토큰 획득 성공: {final_token[:30]}...")
+        
+            # 위탁계좌 잔고 조회
+            result = get_deposit_balance(final_token, app_key, CANO, ACNT_PRDT_CD,
+                                         app_secret=app_secret, url_base=url_base)
+    
+    if result:
+        print("\n🎉 계좌 조회가 완료되었습니다.")
+        print("✅ 프로그램이 정상적으로 작동하고 있습니다!")
     else:
-        print("💥 프로그램을 종료합니다. 유효한 토큰을 확보하지 못했음. ")
\ No newline at end of file
+        print("\n❌ 계좌 조회에 실패했습니다.")
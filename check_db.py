@@ -1,9 +1,30 @@
 import sqlite3
-import pandas as pd
+import daemon
 
 DB_FILE = "trading.db"
 
+def check_data_via_daemon():
+    """상주 데몬이 있으면 데몬으로 조회. 데몬이 없으면 False 반환"""
+    reply = daemon.call("check")
+    if reply is None:
+        return False
+    
+    print(f"📂 현재 DB에 있는 테이블: {[tuple(t) for t in reply['tables']]}")
+    
+    if reply.get("error"):
+        print(f"테이블 조회 에러 (아직 데이터가 안 쌓였을 수 있음): {reply['error']}")
+        return True
+    
+    print("\n📊 [최근 저장된 데이터 5건]")
+    if not reply["empty"]:
+        print(reply["text"])
+    else:
+        print("데이터가 아직 없습니다. (장 운영 시간인지 확인하세요)")
+    return True
+
 def check_data():
+    import pandas as pd
+    
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
     
@@ -30,4 +51,5 @@ def check_data():
     conn.close()
 
 if __name__ == "__main__":
-    check_data()
\ No newline at end of file
+    if not check_data_via_daemon():
+        check_data()
\ No newline at end of file
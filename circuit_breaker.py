@@ -0,0 +1,156 @@
+"""
+circuit_breaker.py: KIS API 장애/호출 제한 대응용 서킷 브레이커
+- (API 경로, TR_ID)마다 상태를 따로 관리: closed(정상) → open(차단) → half_open(시험 호출 1건)
+- 오류 분류 (rt_cd / msg_cd 기준)
+    rate_limit: EGW00201 (초당 거래건수 초과) → 짧게 차단
+    auth:       EGW00121 / EGW00123 (유효하지 않은/만료된 토큰) → 차단하지 않음 (토큰 재발급 필요)
+    outage:     HTTP 5xx, 타임아웃, 연결 실패 → 연속 실패 시 차단
+    그 외 rt_cd != "0" 업무 오류(잔고 부족 등)는 API가 정상 응답한 것으로 봄
+- 차단 시간은 지수 증가 + 지터 (여러 프로세스가 동시에 재시도하지 않도록)
+- 차단 중에는 네트워크 호출 없이 바로 CircuitOpenError 발생 (호출 예산 낭비 방지)
+
+사용 예:
+    import circuit_breaker
+    try:
+        res = kis_http.get(URL, headers=HEADERS, params=PARAMS)   # kis_http가 자동으로 거침
+    except circuit_breaker.CircuitOpenError as e:
+        print(f"{e.retry_after:.1f}초 후 재시도")
+    print(circuit_breaker.states())   # 경로/TR_ID별 현재 상태
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+RATE_LIMIT_CODES = ("EGW00201",)
+AUTH_CODES = ("EGW00121", "EGW00123")
+
+# 오류 종류별 (차단까지의 연속 실패 수, 첫 차단 시간(초), 최대 차단 시간(초))
+POLICY = {
+    "rate_limit": (1, 1.0, 30.0),
+    "outage": (3, 5.0, 300.0),
+}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """차단 중인 엔드포인트 호출 (retry_after초 뒤 시험 호출 가능)"""
+
+    def __init__(self, key: Tuple[str, str], retry_after: float, reason: str):
+        self.key = key
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"{key[1] or key[0]} 차단 중 ({reason}, {retry_after:.1f}초 후 재시도)")
+
+
+def classify(status_code: Optional[int], data: Optional[dict] = None) -> Optional[str]:
+    """응답을 오류 종류로 분류 (정상/업무 오류면 None)"""
+    msg_cd = (data or {}).get("msg_cd", "")
+    if msg_cd in RATE_LIMIT_CODES:
+        return "rate_limit"
+    if msg_cd in AUTH_CODES:
+        return "auth"
+    if status_code is None or status_code >= 500:
+        return "outage"
+    return None
+
+
+class CircuitBreaker:
+    def __init__(self, key: Tuple[str, str]):
+        self.key = key
+        self.state = CLOSED
+        self.failures = 0          # 연속 실패 수
+        self.trips = 0             # 연속 차단 횟수 (차단 시간 지수 증가용)
+        self.open_until = 0.0
+        self.last_error = ""
+        self.counts: Dict[str, int] = {}
+        self._probe = False        # half_open 시험 호출 진행 중
+        self._lock = threading.Lock()
+
+    def retry_in(self, now: Optional[float] = None) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.open_until - (now or time.monotonic()))
+
+    def before(self) -> None:
+        """호출 전 확인. 차단 중이면 CircuitOpenError"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.open_until:
+                    raise CircuitOpenError(self.key, self.open_until - now, self.last_error)
+                self.state = HALF_OPEN
+                self._probe = False
+            if self.state == HALF_OPEN:
+                if self._probe:  # 시험 호출은 1건만
+                    raise CircuitOpenError(self.key, 0.0, "시험 호출 진행 중")
+                self._probe = True
+
+    def record(self, kind: Optional[str], detail: str = "") -> None:
+        """호출 결과 반영 (kind: classify() 결과)"""
+        with self._lock:
+            if kind is not None:
+                self.counts[kind] = self.counts.get(kind, 0) + 1
+            if kind is None or kind == "auth":
+                if self.state != CLOSED:
+                    print(f"✅ [서킷] {self._name()} 복구")
+                self.state = CLOSED
+                self.failures = 0
+                self.trips = 0
+                self._probe = False
+                return
+
+            self.failures += 1
+            self.last_error = f"{kind}: {detail}" if detail else kind
+            threshold, base, cap = POLICY[kind]
+            if self.state == HALF_OPEN or self.failures >= threshold:
+                self.trips += 1
+                delay = min(cap, base * 2 ** (self.trips - 1))
+                delay = delay / 2 + random.uniform(0, delay / 2)   # equal jitter
+                self.state = OPEN
+                self.open_until = time.monotonic() + delay
+                self._probe = False
+                print(f"🚧 [서킷] {self._name()} 차단 {delay:.1f}초 ({self.last_error})")
+
+    def _name(self) -> str:
+        path, tr_id = self.key
+        return tr_id or path
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in(), 3),
+            "last_error": self.last_error,
+            "counts": dict(self.counts),
+        }
+
+
+# -----------------------------------------------------------
+# 엔드포인트별 브레이커 등록부
+# -----------------------------------------------------------
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get(path: str, tr_id: str = "") -> CircuitBreaker:
+    key = (path, tr_id)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.setdefault(key, CircuitBreaker(key))
+    return breaker
+
+
+def states() -> Dict[str, Dict]:
+    """{"TR_ID 경로": 상태} - 호출 측에서 현재 차단 상태 확인용"""
+    return {f"{tr_id} {path}".strip(): b.snapshot() for (path, tr_id), b in list(_breakers.items())}
+
+
+def reset() -> None:
+    with _registry_lock:
+        _breakers.clear()
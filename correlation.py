@@ -0,0 +1,221 @@
+"""
+correlation.py: 보유/관심 종목 간 롤링 수익률 상관계수·공분산 행렬 (증분 갱신)
+- 최근 window개 봉의 로그수익률을 링버퍼에 유지하고, 합계(Σr)와 외적 합계(Σrrᵀ)를 봉마다 증분 갱신
+  → 새 봉 1개당 O(n²) (전체 재계산 O(window·n²) 불필요), 수백 종목도 봉당 1ms 미만
+- 누적 부동소수점 오차는 window 봉마다 한 번 링버퍼로 다시 계산해서 제거
+- 포트폴리오 변동성, 위험 기여도, 집중도(HHI, 유효 종목 수), 분산 비율 제공
+
+실행:
+    python correlation.py                        # 통합 포트폴리오(accounts.py) 보유 종목, 일봉 60개 기준
+    python correlation.py --codes 069500 005930 000660 --window 120
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DB_FILE = "trading.db"
+WINDOW = 60             # 롤링 구간 (봉 수)
+MIN_PERIODS = 20        # 이보다 적은 봉으로는 상관계수를 계산하지 않음
+BARS_PER_YEAR = 252     # 연환산 (일봉 기준)
+
+
+class RollingCovariance:
+    def __init__(self, codes: List[str], window: int = WINDOW):
+        self.codes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.window = window
+        self.returns = np.zeros((window, 0))      # 링버퍼 (window x n)
+        self.sum = np.zeros(0)                    # Σr
+        self.cross = np.zeros((0, 0))             # Σrrᵀ
+        self.last_price = np.full(0, np.nan)
+        self.count = 0                            # 채워진 봉 수 (≤ window)
+        self.pos = 0                              # 다음에 쓸 링버퍼 위치
+        self.updates = 0
+        self.add_codes(codes)
+
+    def add_codes(self, codes: List[str]) -> None:
+        """관심 종목 추가 (과거 수익률은 0으로 채움 → 충분히 쌓이기 전까지 상관계수가 과소평가될 수 있음)"""
+        new = [c for c in dict.fromkeys(codes) if c not in self.index]
+        if not new:
+            return
+        k = len(new)
+        for code in new:
+            self.index[code] = len(self.codes)
+            self.codes.append(code)
+        self.returns = np.hstack([self.returns, np.zeros((self.window, k))])
+        self.sum = np.concatenate([self.sum, np.zeros(k)])
+        n = len(self.codes)
+        cross = np.zeros((n, n))
+        cross[:n - k, :n - k] = self.cross
+        self.cross = cross
+        self.last_price = np.concatenate([self.last_price, np.full(k, np.nan)])
+
+    # -----------------------------------------------------------
+    # 1. 증분 갱신
+    # -----------------------------------------------------------
+    def update(self, prices: Dict[str, float]) -> None:
+        """새 봉의 종가 반영. 가격이 없는 종목은 직전 가격 유지(수익률 0)"""
+        price = self.last_price.copy()
+        for code, p in prices.items():
+            i = self.index.get(code)
+            if i is not None and p and p > 0:
+                price[i] = p
+
+        first = not np.isfinite(self.last_price).any()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.log(price / self.last_price)
+        r[~np.isfinite(r)] = 0.0   # 첫 가격이거나 가격 없음
+        self.last_price = price
+        if first:
+            return  # 첫 봉은 가격만 기록 (수익률은 다음 봉부터)
+
+        old = self.returns[self.pos]
+        if self.count == self.window:
+            self.sum -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.returns[self.pos] = r
+        self.sum += r
+        self.cross += np.outer(r, r)
+        self.pos = (self.pos + 1) % self.window
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._recompute()
+
+    def _recompute(self) -> None:
+        filled = self.returns if self.count == self.window else self.returns[:self.count]
+        self.sum = filled.sum(axis=0)
+        self.cross = filled.T @ filled
+
+    # -----------------------------------------------------------
+    # 2. 행렬 / 포트폴리오 지표
+    # -----------------------------------------------------------
+    def covariance(self) -> Optional[np.ndarray]:
+        k = self.count
+        if k < 2:
+            return None
+        return (self.cross - np.outer(self.sum, self.sum) / k) / (k - 1)
+
+    def correlation(self, min_periods: int = MIN_PERIODS) -> Optional[np.ndarray]:
+        if self.count < min_periods:
+            return None
+        cov = self.covariance()
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan   # 변동이 없는 종목
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+
+    def weight_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        w = np.zeros(len(self.codes))
+        for code, value in weights.items():
+            if code in self.index:
+                w[self.index[code]] = value
+        total = w.sum()
+        return w / total if total else w
+
+    def portfolio_risk(self, weights: Dict[str, float], bars_per_year: int = BARS_PER_YEAR) -> Optional[Dict]:
+        """포트폴리오 변동성(연환산), 종목별 위험 기여도, 집중도"""
+        cov = self.covariance()
+        if cov is None:
+            return None
+        w = self.weight_vector(weights)
+        marginal = cov @ w
+        variance = float(w @ marginal)
+        vol = math.sqrt(max(variance, 0.0))
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        hhi = float((w ** 2).sum())
+        return {
+            "volatility": vol * math.sqrt(bars_per_year),
+            "hhi": hhi,
+            "effective_n": 1 / hhi if hhi else 0.0,
+            "diversification_ratio": float(w @ std) / vol if vol else 0.0,
+            "risk_contribution": {code: float(w[i] * marginal[i] / variance) if variance else 0.0
+                                  for code, i in self.index.items() if w[i]},
+        }
+
+    def top_pairs(self, n: int = 10, min_periods: int = MIN_PERIODS) -> List[tuple]:
+        """상관계수 절대값이 큰 종목 쌍"""
+        corr = self.correlation(min_periods)
+        if corr is None:
+            return []
+        rows, cols = np.triu_indices(len(self.codes), k=1)
+        values = corr[rows, cols]
+        order = np.argsort(-np.abs(np.nan_to_num(values)))[:n]
+        return [(self.codes[rows[i]], self.codes[cols[i]], float(values[i])) for i in order]
+
+
+def seed_from_daily(engine: RollingCovariance, conn, bars: Optional[int] = None) -> int:
+    """daily_price(backfill.py 일봉)의 최근 bars+1개 종가로 상태 채우기. 반영한 봉 수 반환"""
+    bars = bars or engine.window
+    placeholders = ",".join("?" * len(engine.codes))
+    dates = [d for (d,) in conn.execute(
+        f"SELECT DISTINCT date FROM daily_price WHERE code IN ({placeholders}) ORDER BY date DESC LIMIT ?",
+        (*engine.codes, bars + 1))]
+    if not dates:
+        return 0
+    rows = conn.execute(
+        f"SELECT date, code, close FROM daily_price WHERE code IN ({placeholders}) AND date >= ? ORDER BY date",
+        (*engine.codes, min(dates)))
+
+    by_date: Dict[str, Dict[str, float]] = {}
+    for date, code, close in rows:
+        by_date.setdefault(date, {})[code] = close
+    for date in sorted(by_date):
+        engine.update(by_date[date])
+    return len(by_date)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="보유/관심 종목 상관관계 및 포트폴리오 위험")
+    parser.add_argument("--codes", nargs="*", default=[], help="관심 종목 (보유 종목에 추가)")
+    parser.add_argument("--window", type=int, default=WINDOW, help="롤링 구간 (일봉 수)")
+    parser.add_argument("--no-holdings", action="store_true", help="계좌 조회 없이 --codes 동일 비중으로 계산")
+    args = parser.parse_args()
+
+    weights: Dict[str, float] = {}
+    if not args.no_holdings:
+        from accounts import consolidate, fetch_balance, load_accounts, run_all
+        portfolio = consolidate(run_all(load_accounts(), fetch_balance))
+        weights = {code: pos["eval_amt"] for code, pos in portfolio["positions"].items()}
+    if not weights:
+        weights = {code: 1.0 for code in args.codes}
+    codes = list(dict.fromkeys(list(weights) + args.codes))
+    if len(codes) < 2:
+        print("⚠️ 종목이 2개 이상 필요합니다. (--codes 로 관심 종목 추가)")
+        exit()
+
+    engine = RollingCovariance(codes, args.window)
+    conn = sqlite3.connect(DB_FILE)
+    start = time.perf_counter()
+    bars = seed_from_daily(engine, conn)
+    conn.close()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"📈 [상관관계] {len(codes)}종목, 일봉 {bars}개 반영 ({elapsed_ms:.1f}ms)")
+
+    risk = engine.portfolio_risk(weights)
+    if risk is None or engine.count < MIN_PERIODS:
+        print("⚠️ 일봉 데이터가 부족합니다. (backfill.py 로 일봉을 먼저 적재하세요)")
+        exit()
+
+    print("\n🔗 [상관계수 상위 종목 쌍]")
+    for a, b, c in engine.top_pairs():
+        print(f"   {a} - {b}: {c:+.2f}")
+
+    print("\n📊 [포트폴리오 위험]")
+    print(f"   연환산 변동성: {risk['volatility'] * 100:.1f}%")
+    print(f"   HHI 집중도: {risk['hhi']:.3f} (유효 종목 수 {risk['effective_n']:.1f}개)")
+    print(f"   분산 비율: {risk['diversification_ratio']:.2f} (1보다 클수록 분산 효과)")
+    for code, rc in sorted(risk["risk_contribution"].items(), key=lambda kv: -kv[1]):
+        print(f"   {code}: 위험 기여 {rc * 100:5.1f}%")
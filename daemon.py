@@ -0,0 +1,231 @@
+"""
+daemon.py: 조회 도구용 상주(warm) 서비스
+- trading.db 연결, API 토큰, HTTP 세션, 지표 상태를 메모리에 유지
+- Unix 소켓(hantu.sock)으로 view_db / check_db / analysis / check_acc 요청을 처리
+- 데몬이 떠 있지 않으면 각 스크립트는 기존 방식(직접 조회)으로 동작
+- 소켓 파일은 데몬을 띄운 사용자만 접속 가능(0600) - balance 명령이 계좌 정보를 돌려주므로
+
+실행:
+    python daemon.py            # 데몬 시작 (Ctrl+C 로 종료)
+    python daemon.py --status   # 동작 여부 확인
+    python daemon.py --stop     # 종료 요청
+
+클라이언트 사용 예:
+    import daemon
+    reply = daemon.call("latest", table="price_log", limit=5)  # 데몬이 없으면 None
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional
+
+SOCKET_PATH = "hantu.sock"
+DB_FILE = "trading.db"
+CLIENT_TIMEOUT = 30   # 잔고 조회처럼 API를 거치는 요청까지 고려한 대기 시간 (초)
+ANALYSIS_TAIL = 200   # 지표 계산을 위해 메모리에 유지할 최근 행 수 (RSI 14 기준 충분)
+
+
+# -----------------------------------------------------------
+# 1. 클라이언트: 스크립트에서 호출하는 가벼운 함수 (무거운 import 없음)
+# -----------------------------------------------------------
+def call(cmd: str, socket_path: str = SOCKET_PATH, **args: Any) -> Optional[Any]:
+    """데몬에 명령을 보내고 결과 반환. 데몬이 없거나 실패하면 None (→ 직접 조회로 대체)"""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"cmd": cmd, "args": args}).encode("utf-8") + b"\n")
+            line = sock.makefile("rb").readline()
+    except OSError:
+        return None  # 소켓 파일만 남아있는 경우 등
+
+    if not line:
+        return None
+
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        print(f"⚠️ [daemon] 요청 실패 ({cmd}): {reply.get('error')}")
+        return None
+    return reply["result"]
+
+
+# -----------------------------------------------------------
+# 2. 서버: 메모리에 유지하는 상태
+# -----------------------------------------------------------
+class WarmState:
+    def __init__(self, db_file: str = DB_FILE):
+        import pandas as pd  # 데몬 시작 시 한 번만 로드
+
+        self.pd = pd
+        self.db_lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.price_tails: Dict[str, Any] = {}  # 종목별 price_log 최근 구간 캐시 (지표 상태)
+
+    def _tables(self):
+        cursor = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        return cursor.fetchall()
+
+    def latest(self, table: str = "price_log", limit: int = 5) -> Dict[str, Any]:
+        with self.db_lock:
+            if (table,) not in self._tables():
+                raise ValueError(f"테이블이 없습니다: {table}")
+            if table == "price_log":
+                # 델타 저장분까지 합친 최근 N건
+                from delta_store import read_price_log, PRICE_LOG_COLUMNS
+                df = self.pd.DataFrame(read_price_log(self.conn, latest=int(limit)), columns=PRICE_LOG_COLUMNS)
+            else:
+                query = f"SELECT * FROM {table} ORDER BY timestamp DESC LIMIT ?"
+                df = self.pd.read_sql(query, self.conn, params=(int(limit),))
+        return {"text": str(df), "empty": bool(df.empty)}
+
+    def check(self) -> Dict[str, Any]:
+        with self.db_lock:
+            tables = self._tables()
+        result: Dict[str, Any] = {"tables": tables}
+        try:
+            result.update(self.latest("realtime_log", 5))
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def analysis(self, code: Optional[str] = None) -> Dict[str, Any]:
+        import analysis
+
+        code = code or analysis.STOCK_CODE
+        # 종목별로 새로 쌓인 행만 읽어서 캐시 뒤에 붙임 (매번 전체 테이블을 읽지 않음)
+        with self.db_lock:
+            tail = self.price_tails.get(code)
+            if tail is None or tail.empty:
+                tail = analysis.load_price_log(self.conn, code=code)
+            else:
+                last_ts = tail["timestamp"].iloc[-1]
+                new_rows = analysis.load_price_log(self.conn, since=last_ts, code=code)
+                if not new_rows.empty:
+                    tail = self.pd.concat([tail, new_rows], ignore_index=True)
+            tail = tail.tail(ANALYSIS_TAIL).reset_index(drop=True)
+            self.price_tails[code] = tail
+            tail = tail.copy()
+
+        return {"latest": analysis.analyze(tail)}
+
+    def balance(self, cano: str, acnt_prdt_cd: str) -> Dict[str, Any]:
+        """등록부(accounts.json)에 있는 계좌만 조회 - 그 계좌의 앱키/토큰 파일 사용"""
+        import check_acc
+        from accounts import load_accounts
+
+        account = next((a for a in load_accounts() if a.cano == cano and a.acnt_prdt_cd == acnt_prdt_cd), None)
+        if account is None:
+            return {"error": f"등록되지 않은 계좌입니다: {cano}-{acnt_prdt_cd}"}
+        token = account.token()
+        if not token:
+            return {"error": "유효한 토큰을 확보하지 못했습니다."}
+        app_key, app_secret, url_base = account.credentials()
+        try:
+            status, data = check_acc.fetch_deposit_balance(token, app_key, cano, acnt_prdt_cd,
+                                                           app_secret=app_secret, url_base=url_base)
+        except Exception as e:
+            return {"error": str(e)}
+        return {"status": status, "data": data}
+
+
+# -----------------------------------------------------------
+# 3. 서버: Unix 소켓 처리
+# -----------------------------------------------------------
+def serve(socket_path: str = SOCKET_PATH, db_file: str = DB_FILE) -> None:
+    import socketserver
+    import circuit_breaker
+    import kis_http
+
+    if call("ping", socket_path=socket_path) is not None:
+        print(f"ℹ️ 데몬이 이미 실행 중입니다: {socket_path}")
+        return
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # 비정상 종료로 남은 소켓 파일 정리
+
+    print("🔥 [daemon] 워밍업: pandas / DB / HTTP 세션 준비 중...")
+    state = WarmState(db_file)
+    kis_http.get_session()
+    try:
+        state.analysis()
+    except Exception as e:
+        print(f"⚠️ [daemon] 지표 상태 초기화 건너뜀: {e}")
+
+    commands: Dict[str, Callable[..., Any]] = {
+        "ping": lambda: "pong",
+        "latest": state.latest,
+        "check": state.check,
+        "analysis": state.analysis,
+        "balance": state.balance,
+        "breakers": circuit_breaker.states,
+    }
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                cmd = request.get("cmd")
+                if cmd == "stop":
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    result = "bye"
+                elif cmd in commands:
+                    result = commands[cmd](**request.get("args", {}))
+                else:
+                    raise ValueError(f"알 수 없는 명령: {cmd}")
+                reply = {"ok": True, "result": result}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # 잔고 조회 결과가 오가는 소켓이라 소유자만 접속하도록 (bind 순간부터 0600으로 생성되게 umask 적용)
+    old_umask = os.umask(0o177)
+    try:
+        server = Server(socket_path, Handler)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)
+    print(f"🚀 [daemon] 대기 중: {socket_path} (Ctrl+C 로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        state.conn.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("👋 [daemon] 종료되었습니다.")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="조회 도구용 상주 데몬")
+    parser.add_argument("--status", action="store_true", help="데몬 동작 여부 확인")
+    parser.add_argument("--stop", action="store_true", help="실행 중인 데몬 종료")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix 소켓 경로")
+    args = parser.parse_args()
+
+    if args.status:
+        breakers = call("breakers", socket_path=args.socket)
+        print("✅ 데몬 실행 중" if breakers is not None else "❌ 데몬이 실행 중이 아닙니다.")
+        for name, b in (breakers or {}).items():
+            retry = f", {b['retry_in']:.1f}초 후 재시도" if b["retry_in"] else ""
+            print(f"   [{b['state']}] {name}{retry} {b['last_error']}")
+    elif args.stop:
+        print("👋 종료 요청 완료" if call("stop", socket_path=args.socket) else "❌ 데몬이 실행 중이 아닙니다.")
+    else:
+        serve(args.socket)
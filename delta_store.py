@@ -0,0 +1,269 @@
+"""
+delta_store.py: 변경분만 저장하는 델타 인코딩 시세 저장소
+- 직전 스냅샷과 가격/거래량/호가잔량이 모두 같으면 저장하지 않음 (비유동 종목에서 효과 큼)
+- 변경된 스냅샷은 종목별 직전 값과의 차이(delta)를 zigzag varint로 기록하고,
+  최대 BLOCK_ROWS 행씩 묶어 zlib 압축한 블록(price_delta_block)으로 저장
+- 열린 블록은 FLUSH_INTERVAL마다 DB에 반영 (그 사이 크래시는 틱 저널이 보장, 재시작 시 replay()로 이어 붙임)
+- read_price_log()는 price_log 행과 델타 블록을 합쳐 원래 형태의 행으로 복원해 반환
+
+사용 예:
+    from delta_store import DeltaWriter, read_price_log
+
+    writer = DeltaWriter("trading.db")
+    writer.append(time.time(), "069500", price, volume, ask_qty, bid_qty)  # 변경 없으면 False
+    writer.flush()
+
+    rows = read_price_log(conn, latest=5)   # [(timestamp, code, price, volume, ask, bid), ...]
+"""
+
+from __future__ import annotations
+
+import datetime
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tick_journal import format_ts
+
+DB_FILE = "trading.db"
+BLOCK_ROWS = 256       # 블록 하나에 담는 최대 행 수
+FLUSH_INTERVAL = 10.0  # 열린 블록을 DB에 반영하는 최소 간격 (초, 0이면 매 저장마다 - 블록 전체 재압축이라 느림)
+
+PRICE_LOG_COLUMNS = ["timestamp", "code", "price", "volume", "total_ask_qty", "total_bid_qty"]
+
+# (ts_ms, price, volume, ask_qty, bid_qty)
+DeltaRow = Tuple[int, int, int, int, int]
+
+
+# -----------------------------------------------------------
+# 1. 블록 인코딩 / 디코딩
+# -----------------------------------------------------------
+def _put_varint(out: bytearray, value: int) -> None:
+    value = (value << 1) ^ (value >> 63)  # zigzag: 음수도 작은 양수로
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_block(rows: List[DeltaRow]) -> bytes:
+    out = bytearray()
+    prev = (0, 0, 0, 0, 0)
+    for row in rows:
+        for value, base in zip(row, prev):
+            _put_varint(out, value - base)
+        prev = row
+    return zlib.compress(bytes(out), 6)
+
+
+def decode_block(payload: bytes, n_rows: int) -> List[DeltaRow]:
+    data = zlib.decompress(payload)
+    rows = []
+    prev = [0, 0, 0, 0, 0]
+    pos = 0
+    for _ in range(n_rows):
+        for i in range(5):
+            shift = 0
+            value = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            prev[i] += (value >> 1) ^ -(value & 1)
+        rows.append(tuple(prev))
+    return rows
+
+
+def init_delta_table(conn) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS price_delta_block (
+        code TEXT,
+        start_ms INTEGER,
+        end_ms INTEGER,
+        n_rows INTEGER,
+        payload BLOB,
+        PRIMARY KEY (code, start_ms)
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_delta_end ON price_delta_block (end_ms)")
+
+
+# -----------------------------------------------------------
+# 2. 저장 (수집기용)
+# -----------------------------------------------------------
+class DeltaWriter:
+    def __init__(self, db_file: str = DB_FILE, block_rows: int = BLOCK_ROWS,
+                 flush_interval: float = FLUSH_INTERVAL):
+        # 수집기는 스케줄러 작업 스레드에서 저장하므로 스레드 검사 해제 (동시에 한 스레드만 사용)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        # 틱 저널(tick_journal.py)이 내구성을 보장하므로 커밋마다 fsync 하지 않음 (save_to_db와 같음)
+        self.conn.execute("PRAGMA synchronous=OFF")
+        init_delta_table(self.conn)
+        self.conn.commit()
+        self.block_rows = block_rows
+        self.flush_interval = flush_interval
+        self.stored = 0
+        self.skipped = 0
+        self._open: Dict[str, List[DeltaRow]] = {}   # 종목별 아직 가득 차지 않은 블록
+        self._last: Dict[str, Tuple[int, int, int, int]] = {}
+        self._last_ms: Dict[str, int] = {}           # 종목별 마지막 저장 시각 (재적재 시 중복 방지)
+        self._dirty = set()
+        self._last_flush = time.monotonic()
+
+    def _resume(self, code: str) -> None:
+        """재시작 시 종목의 마지막 블록을 이어서 사용 (직전 값도 복원)"""
+        row = self.conn.execute(
+            "SELECT n_rows, payload FROM price_delta_block WHERE code = ? ORDER BY start_ms DESC LIMIT 1",
+            (code,),
+        ).fetchone()
+        self._open[code] = []
+        if row:
+            rows = decode_block(row[1], row[0])
+            self._last[code] = rows[-1][1:]
+            self._last_ms[code] = rows[-1][0]
+            if len(rows) < self.block_rows:
+                self._open[code] = rows
+
+    def append(self, ts: float, code: str, price: int, volume: int, ask_qty: int, bid_qty: int) -> bool:
+        """스냅샷 저장. 직전과 같거나 이미 저장된 시각 이전이라 건너뛰었으면 False"""
+        if code not in self._open:
+            self._resume(code)
+
+        ts_ms = int(round(ts * 1000))
+        snapshot = (price, volume or 0, ask_qty, bid_qty)
+        if self._last.get(code) == snapshot or ts_ms <= self._last_ms.get(code, -1):
+            self.skipped += 1
+            return False
+
+        self._last[code] = snapshot
+        self._last_ms[code] = ts_ms
+        rows = self._open[code]
+        rows.append((ts_ms,) + snapshot)
+        self._dirty.add(code)
+        self.stored += 1
+
+        if len(rows) >= self.block_rows:
+            self._write_block(code)
+            self.conn.commit()
+            self._dirty.discard(code)
+            self._open[code] = []
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+
+    def _write_block(self, code: str) -> None:
+        rows = self._open[code]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO price_delta_block VALUES (?, ?, ?, ?, ?)",
+            (code, rows[0][0], rows[-1][0], len(rows), encode_block(rows)),
+        )
+
+    def flush(self) -> None:
+        """열린 블록들을 DB에 반영 (수집기 종료/저널 체크포인트 전에 호출)"""
+        for code in self._dirty:
+            self._write_block(code)
+        self.conn.commit()
+        self._dirty.clear()
+        self._last_flush = time.monotonic()
+
+    def replay(self, records) -> int:
+        """
+        틱 저널 레코드(tick_journal.read_records)를 델타 블록에 다시 적재 후 flush
+        (이미 저장된 시각 이전/변동 없는 틱은 건너뜀 → 여러 번 호출해도 같은 결과). 새로 저장된 행 수 반환
+        """
+        stored = 0
+        for ts_ms, code, price, volume, ask_qty, bid_qty, _ in records:
+            stored += self.append(ts_ms / 1000, code, price, volume, ask_qty, bid_qty)
+        self.flush()
+        return stored
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+
+# -----------------------------------------------------------
+# 3. 조회 (분석/조회 도구용) - price_log + 델타 블록을 합쳐 원래 행으로 복원
+# -----------------------------------------------------------
+def _to_ms(timestamp: str) -> int:
+    return int(datetime.datetime.strptime(timestamp[:19], "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+
+
+def _iter_blocks(conn, since_ms: Optional[int], code: Optional[str] = None) -> Iterator[Tuple[str, int, int, bytes]]:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='price_delta_block'"
+    ).fetchone()
+    if not exists:
+        return iter(())
+    conditions, params = [], []
+    if since_ms is not None:
+        conditions.append("end_ms > ?")
+        params.append(since_ms)
+    if code is not None:
+        conditions.append("code = ?")
+        params.append(code)
+    query = "SELECT code, end_ms, n_rows, payload FROM price_delta_block"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return conn.execute(query + " ORDER BY end_ms DESC", params)
+
+
+def read_price_log(conn, since: Optional[str] = None, latest: Optional[int] = None,
+                   code: Optional[str] = None) -> List[tuple]:
+    """
+    price_log 형식의 행 목록 반환 (델타 블록을 투명하게 복원하여 합침)
+
+    Args:
+        conn: sqlite3 연결
+        since: 이 timestamp 이후의 행만 반환
+        latest: 지정하면 가장 최근 N건을 최신순(DESC)으로 반환
+        code: 지정하면 이 종목의 행만 반환
+
+    Returns:
+        [(timestamp, code, price, volume, total_ask_qty, total_bid_qty), ...]
+        (latest 미지정 시 timestamp 오름차순)
+    """
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("timestamp > ?")
+        params.append(since)
+    if code is not None:
+        conditions.append("code = ?")
+        params.append(code)
+    query = "SELECT * FROM price_log"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if latest is not None:
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(int(latest))
+    else:
+        query += " ORDER BY timestamp ASC"
+    rows = conn.execute(query, params).fetchall()
+
+    since_ms = _to_ms(since) if since is not None else None
+    seen = {(r[0], r[1]) for r in rows}  # 비정상 종료 후 저널 복구로 price_log에도 들어간 행은 한 번만
+    decoded = []
+    for block_code, end_ms, n_rows, payload in _iter_blocks(conn, since_ms, code):
+        # 최근 N건 조회 시, 이미 확보한 N번째 행보다 오래된 블록은 더 볼 필요 없음
+        if latest is not None and len(rows) + len(decoded) >= latest:
+            candidates = sorted([r[0] for r in rows] + [r[0] for r in decoded], reverse=True)
+            if format_ts(end_ms / 1000) < candidates[latest - 1]:
+                break
+        for ts_ms, price, volume, ask_qty, bid_qty in decode_block(payload, n_rows):
+            timestamp = format_ts(ts_ms / 1000)
+            if (since is None or timestamp > since) and (timestamp, block_code) not in seen:
+                decoded.append((timestamp, block_code, price, volume, ask_qty, bid_qty))
+
+    if not decoded:
+        return rows
+
+    rows = rows + decoded
+    if latest is not None:
+        rows.sort(key=lambda r: r[0], reverse=True)
+        return rows[:latest]
+    rows.sort(key=lambda r: r[0])
+    return rows
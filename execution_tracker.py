@@ -0,0 +1,412 @@
+"""
+execution_tracker.py: 주문 체결 품질 추적 (주문 단계별 시각 + 그 순간의 호가)
+- 주문 1건의 단계(signal → send → ack/reject → amend → fill → cancel → cancel_ack)를 ms 단위로 기록
+  (정정으로 주문번호가 바뀌어도 같은 주문 키로 묶음)
+- 각 단계에 그 시점 직전의 최우선 호가(orderbook_log, save_data.py --depth)를 붙여서 저장
+  (호출 측이 이미 가진 호가를 book=으로 넘기면 DB 조회 없이 그대로 사용)
+- record()는 주문 키만 정하고 바로 반환, 호가 조회/DB 기록은 백그라운드 스레드가 처리 (측정 대상인 주문 경로를 늦추지 않음)
+- 시그널은 signal_engine.py, 전송/접수/취소/정정은 remove_order.py, 체결은 FillPoller(당일 주문체결 조회)가 기록
+- order_event 테이블 한 곳에 쌓아 두고 SQL로 집계
+- 리포트: 접수(ack) 지연 백분위, 체결률, 최우선 호가 대비 슬리피지
+  (호가가 없어 슬리피지를 못 구한 체결 건수와 조인된 호가의 나이도 같이 표시)
+
+사용 예:
+    import execution_tracker as et
+    key = et.record("signal", code="069500", side="buy", qty=10, price=35000)
+    et.record("send", key)
+    et.record("ack", key, odno="0000123456")
+    et.record("fill", key, fill_qty=10, fill_price=35005)
+
+실행:
+    python execution_tracker.py --days 5      # 최근 5일 체결 품질 리포트
+    python execution_tracker.py --fills       # 당일 체결을 조회해 기록한 뒤 리포트
+    python execution_tracker.py --watch 5     # 5초마다 당일 체결을 조회해 기록 (Ctrl+C 로 종료)
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from orderbook import MAX_BOOK_AGE_MS, init_orderbook_table, latest_book
+
+DB_FILE = "trading.db"
+FILL_POLL_INTERVAL = 5.0   # 체결 조회 주기 (초)
+STEPS = ("signal", "send", "ack", "reject", "fill", "cancel", "cancel_ack", "cancel_reject",
+         "amend", "amend_ack", "amend_reject")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ExecutionTracker:
+    def __init__(self, db_file: str = DB_FILE, max_book_age_ms: int = MAX_BOOK_AGE_MS):
+        """max_book_age_ms: 이보다 오래된 호가는 붙이지 않음 (save_data.py --depth 수집 주기에 맞춤)"""
+        self.max_book_age_ms = max_book_age_ms
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=OFF")   # 분석용 기록 (유실돼도 주문에는 영향 없음)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS order_event (
+            order_key TEXT,
+            step TEXT,
+            ts_ms INTEGER,
+            code TEXT,
+            side TEXT,
+            qty INTEGER,
+            price INTEGER,
+            odno TEXT,
+            fill_qty INTEGER,
+            fill_price INTEGER,
+            bid1 INTEGER,
+            ask1 INTEGER,
+            book_ts_ms INTEGER,
+            note TEXT
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_order_event_key ON order_event (order_key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_order_event_ts ON order_event (ts_ms)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_order_event_odno ON order_event (odno)")
+        init_orderbook_table(self.conn)
+        self.conn.commit()
+        self._lock = threading.Lock()      # 주문 키/진행 중 주문 상태
+        self._db_lock = threading.Lock()   # DB 연결 (기록 스레드와 조회/리포트가 공유)
+        self._seq = itertools.count(1)
+        self._orders: Dict[str, Dict] = {}   # 진행 중 주문의 종목/방향 (이후 단계에서 생략 가능)
+        self._by_odno: Dict[str, str] = {}   # 주문번호 → 주문 키
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="execution-tracker", daemon=True)
+        self._writer.start()
+
+    def _key_for_odno(self, odno: str) -> Optional[str]:
+        key = self._by_odno.get(odno)
+        if key is None or key not in self._orders:
+            with self._db_lock:
+                row = self.conn.execute("SELECT order_key, code, side, qty, price FROM order_event "
+                                        "WHERE odno = ? ORDER BY ts_ms LIMIT 1", (odno,)).fetchone()
+            if row is None:
+                return key
+            key = row[0]
+            self._by_odno[odno] = key
+            self._orders.setdefault(key, {k: v for k, v in zip(("code", "side", "qty", "price"), row[1:])
+                                          if v is not None})
+        return key
+
+    def knows(self, odno: str) -> bool:
+        """이 기록기(또는 같은 DB를 쓰는 다른 프로세스)가 기록한 주문번호인지"""
+        with self._lock:
+            return self._key_for_odno(odno) is not None
+
+    def record(self, step: str, key: Optional[str] = None, code: Optional[str] = None,
+               side: Optional[str] = None, qty: Optional[int] = None, price: Optional[int] = None,
+               odno: Optional[str] = None, fill_qty: Optional[int] = None, fill_price: Optional[int] = None,
+               book: Optional[Dict] = None, note: str = "", ts_ms: Optional[int] = None) -> str:
+        """
+        단계 1건 기록 후 주문 키 반환 (key가 없으면 새로 발급)
+        book: {"bid1", "ask1", "ts_ms"} - 없으면 orderbook_log에서 직전 호가를 찾아 붙임
+        """
+        if step not in STEPS:
+            raise ValueError(f"알 수 없는 주문 단계: {step}")
+        ts_ms = ts_ms or int(time.time() * 1000)
+
+        with self._lock:
+            if key is None and odno:
+                key = self._key_for_odno(odno)   # 다른 프로세스가 낸 주문의 취소 등도 같은 주문으로 묶음
+            if key is None:
+                key = f"{ts_ms}-{next(self._seq)}"
+            info = self._orders.setdefault(key, {})
+            for name, value in (("code", code), ("side", side), ("qty", qty), ("price", price), ("odno", odno)):
+                if value is not None:
+                    info[name] = value
+            if odno:
+                self._by_odno[odno] = key
+            if step == "fill" and fill_qty:
+                info["filled"] = info.get("filled", 0) + fill_qty
+
+            row = (key, step, ts_ms, info.get("code"), info.get("side"), info.get("qty"), info.get("price"),
+                   info.get("odno"), fill_qty, fill_price, note)
+            if step in ("reject", "cancel_ack") or (step == "fill" and info.get("filled", 0) >= info.get("qty", 0)):
+                self._orders.pop(key, None)   # 끝난 주문
+        self._queue.put((row, book))
+        return key
+
+    def _write_loop(self) -> None:
+        """대기 중인 기록을 모아서 호가를 붙여 저장 (한 번에 commit)"""
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._db_lock:
+                    for item in items:
+                        if item is None:
+                            continue
+                        (key, step, ts_ms, code, side, qty, price, odno, fill_qty, fill_price, note), book = item
+                        if book is None and code:
+                            book = latest_book(self.conn, code, ts_ms, self.max_book_age_ms)
+                        book = book or {}
+                        self.conn.execute("INSERT INTO order_event VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                          (key, step, ts_ms, code, side, qty, price, odno, fill_qty, fill_price,
+                                           book.get("bid1"), book.get("ask1"),
+                                           book.get("ts_ms", ts_ms if book else None), note))
+                    self.conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ [체결추적] 기록 실패: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if None in items:
+                return
+
+    def flush(self) -> None:
+        """지금까지 record()한 단계가 모두 DB에 기록될 때까지 대기"""
+        self._queue.join()
+
+    def filled_by_odno(self) -> Dict[str, int]:
+        """주문번호별로 이미 기록한 누적 체결 수량 (FillPoller 재시작 시 중복 기록 방지)"""
+        self.flush()
+        with self._db_lock:
+            rows = self.conn.execute("SELECT odno, SUM(fill_qty) FROM order_event "
+                                     "WHERE step = 'fill' AND odno IS NOT NULL GROUP BY odno").fetchall()
+        return {odno: qty or 0 for odno, qty in rows}
+
+    # -----------------------------------------------------------
+    # 리포트 (집계)
+    # -----------------------------------------------------------
+    def report(self, since_ms: int = 0) -> Dict:
+        self.flush()
+        with self._db_lock:
+            rows = self._report_rows(since_ms)
+        return self._summarize(rows)
+
+    def _report_rows(self, since_ms: int):
+        return self.conn.execute("""
+            SELECT order_key,
+                   MAX(CASE WHEN step = 'signal' THEN ts_ms END),
+                   MAX(CASE WHEN step = 'send' THEN ts_ms END),
+                   MAX(CASE WHEN step = 'ack' THEN ts_ms END),
+                   MAX(CASE WHEN step = 'reject' THEN 1 ELSE 0 END),
+                   MAX(CASE WHEN step = 'cancel' THEN ts_ms END),
+                   MAX(CASE WHEN step = 'cancel_ack' THEN ts_ms END),
+                   MAX(side), MAX(qty),
+                   SUM(CASE WHEN step = 'fill' THEN fill_qty ELSE 0 END),
+                   SUM(CASE WHEN step = 'fill' THEN fill_qty * fill_price ELSE 0 END),
+                   MAX(CASE WHEN step = 'send' THEN bid1 END),
+                   MAX(CASE WHEN step = 'send' THEN ask1 END),
+                   MAX(CASE WHEN step = 'signal' THEN bid1 END),
+                   MAX(CASE WHEN step = 'signal' THEN ask1 END),
+                   MAX(CASE WHEN step = 'send' THEN ts_ms - book_ts_ms END)
+            FROM order_event WHERE ts_ms >= ? GROUP BY order_key
+        """, (since_ms,)).fetchall()
+
+    @staticmethod
+    def _summarize(rows) -> Dict:
+
+        ack_ms, cancel_ms, signal_to_send_ms = [], [], []
+        slippage, shortfall, book_age_ms = [], [], []
+        sent = rejected = filled = partial = no_book = 0
+        sent_qty = filled_qty = 0
+        for (_, t_signal, t_send, t_ack, reject, t_cancel, t_cancel_ack, side, qty, f_qty, f_amt,
+             send_bid, send_ask, sig_bid, sig_ask, send_book_age) in rows:
+            if t_signal and t_send:
+                signal_to_send_ms.append(t_send - t_signal)
+            if t_send and t_ack:
+                ack_ms.append(t_ack - t_send)
+            if t_cancel and t_cancel_ack:
+                cancel_ms.append(t_cancel_ack - t_cancel)
+            if not t_send:
+                continue
+            sent += 1
+            rejected += reject
+            if send_book_age is not None:
+                book_age_ms.append(send_book_age)
+            sent_qty += qty or 0
+            filled_qty += f_qty or 0
+            if f_qty:
+                filled += f_qty >= (qty or f_qty)
+                partial += f_qty < (qty or f_qty)
+                avg = f_amt / f_qty
+                sign = 1 if side == "buy" else -1
+                # 슬리피지: 전송 시점 건너편 최우선 호가 대비 (양수 = 불리)
+                ref = send_ask if side == "buy" else send_bid
+                if ref:
+                    slippage.append(sign * (avg - ref) / ref * 10000)
+                else:
+                    no_book += 1   # 전송 시점 호가 없음 (수집 안 함 / 허용 나이 초과)
+                # 시그널 시점 중간가 대비 (지연으로 잃은 몫 포함)
+                if sig_bid and sig_ask:
+                    mid = (sig_bid + sig_ask) / 2
+                    shortfall.append(sign * (avg - mid) / mid * 10000)
+
+        def dist(values):
+            return {"n": len(values), "p50": _percentile(values, 0.5), "p90": _percentile(values, 0.9),
+                    "p99": _percentile(values, 0.99), "mean": sum(values) / len(values) if values else 0.0}
+
+        return {
+            "orders": sent,
+            "rejected": rejected,
+            "filled": filled,
+            "partial": partial,
+            "fill_rate": filled / sent if sent else 0.0,
+            "qty_fill_rate": filled_qty / sent_qty if sent_qty else 0.0,
+            "ack_ms": dist(ack_ms),
+            "cancel_ack_ms": dist(cancel_ms),
+            "signal_to_send_ms": dist(signal_to_send_ms),
+            "slippage_bps": dist(slippage),
+            "no_book": no_book,
+            "book_age_ms": dist(book_age_ms),
+            "shortfall_bps": dist(shortfall),
+        }
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self.conn.close()
+
+
+# -----------------------------------------------------------
+# 체결 기록 (당일 주문체결 조회)
+# -----------------------------------------------------------
+class FillPoller:
+    """
+    당일 주문체결 조회(inquire-daily-ccld)를 읽어 주문별 누적 체결이 늘어난 만큼 fill 단계로 기록
+    - 체결 단가는 늘어난 체결 금액 / 늘어난 수량 (여러 번 나눠 체결돼도 합계 금액이 맞도록)
+    - 이 기록기로 추적 중인 주문만 기록 (HTS 등 다른 경로로 낸 주문은 제외)
+    """
+
+    def __init__(self, account, tracker: Optional["ExecutionTracker"] = None):
+        self.account = account
+        self.tracker = tracker or default_tracker()
+        self._seen: Dict[str, Tuple[int, int]] = {}   # 주문번호: (누적 체결 수량, 누적 체결 금액)
+        self._recorded = self.tracker.filled_by_odno()
+
+    def apply(self, executions: List[Dict], ts_ms: Optional[int] = None) -> int:
+        """조회 결과 반영. 새로 기록한 fill 건수 반환"""
+        recorded = 0
+        for row in executions:
+            odno = row.get("odno")
+            qty = int(row.get("tot_ccld_qty", 0) or 0)
+            amount = int(float(row.get("tot_ccld_amt", 0) or 0)) or int(float(row.get("avg_prvs", 0) or 0) * qty)
+            if not odno or qty <= 0:
+                continue
+            if odno not in self._seen:
+                # 처음 본 주문: 재시작 전에 이미 기록한 수량만큼의 금액은 평균 단가로 추정
+                done = self._recorded.get(odno, 0)
+                self._seen[odno] = (done, amount * done // qty)
+            seen_qty, seen_amount = self._seen[odno]
+            if qty <= seen_qty or not self.tracker.knows(odno):
+                continue   # 새 체결 없음 / 추적하지 않는 주문 (접수 기록이 아직 안 들어왔을 수 있어 다음 조회 때 다시 확인)
+            fill_qty = qty - seen_qty
+            self.tracker.record("fill", odno=odno, fill_qty=fill_qty,
+                                fill_price=round((amount - seen_amount) / fill_qty), ts_ms=ts_ms)
+            self._seen[odno] = (qty, amount)
+            recorded += 1
+        return recorded
+
+    def poll(self) -> int:
+        from remove_order import get_daily_executions
+
+        token = self.account.token()
+        if not token:
+            raise RuntimeError("토큰 발급 실패")
+        app_key, app_secret, url_base = self.account.credentials()
+        executions = get_daily_executions(token, app_key, app_secret, self.account.cano, self.account.acnt_prdt_cd,
+                                          url_base, verbose=False, raise_on_error=True)
+        return self.apply(executions)
+
+
+# -----------------------------------------------------------
+# 프로세스 공용 기록기 (remove_order.py 등에서 사용)
+# -----------------------------------------------------------
+_default: Optional[ExecutionTracker] = None
+_default_lock = threading.Lock()
+
+
+def default_tracker() -> ExecutionTracker:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = ExecutionTracker()
+                atexit.register(_default.close)   # 종료 전에 대기 중인 기록을 모두 저장
+    return _default
+
+
+def record(step: str, key: Optional[str] = None, **kwargs) -> Optional[str]:
+    """공용 기록기로 단계 기록 (기록 실패가 주문 흐름을 막지 않도록 오류는 출력만)"""
+    try:
+        return default_tracker().record(step, key, **kwargs)
+    except Exception as e:
+        print(f"⚠️ [체결추적] 기록 실패: {e}")
+        return key
+
+
+def print_report(r: Dict) -> None:
+    print("=" * 60)
+    print("📊 [체결 품질 리포트]")
+    print(f"   주문 {r['orders']}건 | 거부 {r['rejected']}건 | 전량체결 {r['filled']}건 | 부분체결 {r['partial']}건")
+    print(f"   체결률: 주문 기준 {r['fill_rate'] * 100:.1f}% / 수량 기준 {r['qty_fill_rate'] * 100:.1f}%")
+    for label, name, unit in (("접수 지연(send→ack)", "ack_ms", "ms"),
+                              ("취소 지연(cancel→ack)", "cancel_ack_ms", "ms"),
+                              ("시그널→전송", "signal_to_send_ms", "ms"),
+                              ("슬리피지(전송 시 최우선호가 대비)", "slippage_bps", "bp"),
+                              ("시그널 중간가 대비", "shortfall_bps", "bp")):
+        d = r[name]
+        if d["n"]:
+            print(f"   {label}: p50 {d['p50']:.1f}{unit} / p90 {d['p90']:.1f}{unit} / "
+                  f"p99 {d['p99']:.1f}{unit} (n={d['n']})")
+    fills = r["slippage_bps"]["n"] + r["no_book"]
+    if r["no_book"]:
+        print(f"   ⚠️ 호가 없음: 체결 {fills}건 중 {r['no_book']}건({r['no_book'] / fills * 100:.1f}%)은 "
+              f"전송 시점 호가가 없어 슬리피지에서 빠짐 (save_data.py --depth 수집 주기 확인)")
+    age = r["book_age_ms"]
+    if age["n"]:
+        print(f"   호가 나이(전송 시점): p50 {age['p50'] / 1000:.1f}s / p90 {age['p90'] / 1000:.1f}s "
+              f"(n={age['n']})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="주문 체결 품질 리포트")
+    parser.add_argument("--days", type=float, default=1, help="최근 N일 (0이면 전체)")
+    parser.add_argument("--fills", action="store_true", help="리포트 전에 당일 체결을 조회해 기록")
+    parser.add_argument("--watch", type=float, nargs="?", const=FILL_POLL_INTERVAL, metavar="SEC",
+                        help="SEC초마다 당일 체결을 조회해 기록 (Ctrl+C 로 종료 후 리포트)")
+    args = parser.parse_args()
+
+    tracker = ExecutionTracker()
+    if args.fills or args.watch:
+        from accounts import default_account
+
+        poller = FillPoller(default_account(), tracker)
+        try:
+            while True:
+                try:
+                    recorded = poller.poll()
+                    if recorded:
+                        print(f"✅ [체결추적] 체결 {recorded}건 기록")
+                except Exception as e:
+                    print(f"⚠️ [체결추적] 체결 조회 실패: {e}")
+                if not args.watch:
+                    break
+                time.sleep(args.watch)
+        except KeyboardInterrupt:
+            pass
+
+    since_ms = int((time.time() - args.days * 86400) * 1000) if args.days else 0
+    print_report(tracker.report(since_ms))
+    tracker.close()
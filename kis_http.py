@@ -0,0 +1,128 @@
+"""
+kis_http.py: 한국투자증권 REST 호출용 공용 HTTP 세션 모듈
+- 프로세스 당 하나의 requests.Session을 재사용 (TCP/TLS 연결 유지)
+- 모든 모듈의 requests.get/post 호출을 이 모듈로 통일
+- requests는 첫 호출 시점에 불러오므로 import 자체는 가볍게 유지
+- 녹화/재생 전송 계층(cassette.py)을 끼울 수 있음: 환경변수 KIS_RECORD / KIS_REPLAY 또는 use_transport()
+- 모든 호출은 (경로, TR_ID)별 서킷 브레이커(circuit_breaker.py)를 거침 → 차단 중이면 CircuitOpenError
+
+사용 예:
+    import kis_http
+    res = kis_http.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
+    res = kis_http.post(URL, headers=HEADERS, data=json.dumps(BODY), timeout=10)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+from urllib.parse import urlsplit
+
+import circuit_breaker
+
+POOL_SIZE = 20  # 호스트당 유지할 최대 커넥션 수 (동시 요청 수와 맞춤)
+
+_session = None
+_session_lock = threading.Lock()
+_transport = None  # None이면 실제 세션으로 호출
+
+
+def get_session():
+    """연결 풀이 설정된 공용 requests.Session 반환 (최초 1회 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def use_transport(transport) -> None:
+    """요청을 가로챌 전송 계층 지정 (cassette.Recorder / cassette.Player, None이면 실제 호출)"""
+    global _transport
+    _transport = transport
+
+
+def replaying() -> bool:
+    """카세트 재생 중이면 True (토큰 파일 등 실제 상태를 덮어쓰지 않도록 확인용)"""
+    return getattr(_transport, "replay", False)
+
+
+def _transport_from_env() -> None:
+    if os.environ.get("KIS_REPLAY"):
+        from cassette import Player
+        use_transport(Player(os.environ["KIS_REPLAY"], speed=float(os.environ.get("KIS_REPLAY_SPEED", "1"))))
+    elif os.environ.get("KIS_RECORD"):
+        from cassette import Recorder
+        use_transport(Recorder(os.environ["KIS_RECORD"]))
+
+
+def _send(method: str, url: str, **kwargs: Any):
+    if _transport is not None:
+        return _transport.request(method, url, **kwargs)
+    return get_session().request(method, url, **kwargs)
+
+
+def request(method: str, url: str, **kwargs: Any):
+    tr_id = next((v for k, v in (kwargs.get("headers") or {}).items() if k.lower() == "tr_id"), "")
+    breaker = circuit_breaker.get(urlsplit(url).path, tr_id)
+    breaker.before()
+
+    try:
+        res = _send(method, url, **kwargs)
+    except Exception as e:  # 타임아웃, 연결 실패
+        breaker.record("outage", type(e).__name__)
+        raise
+
+    # 정상 응답(200)은 본문을 해석하지 않음 (업무 오류는 호출 측에서 rt_cd로 처리)
+    # 단, 짧은 200 응답에 게이트웨이 오류 코드(EGW)가 들어 있는 경우는 확인
+    data = None
+    if res.status_code != 200 or (len(res.content) < 512 and b"EGW00" in res.content):
+        try:
+            data = res.json()
+        except ValueError:
+            pass
+    detail = (data or {}).get("msg_cd") or f"HTTP {res.status_code}"
+    breaker.record(circuit_breaker.classify(res.status_code, data), detail)
+    return res
+
+
+def prewarm(url_base: str, connections: int = 4, timeout: float = 5) -> int:
+    """
+    장 시작 전 DNS 조회와 TCP/TLS 연결을 미리 맺어 풀에 넣어 둠 (동시에 열어야 여러 개가 유지됨)
+    서킷 브레이커를 거치지 않으며 응답 코드는 보지 않음. 연결에 성공한 수 반환
+    """
+    if _transport is not None:
+        return 0  # 녹화/재생 중에는 실제 연결 없음
+    session = get_session()
+
+    def touch(_):
+        try:
+            session.head(url_base, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    from concurrent.futures import ThreadPoolExecutor
+    n = max(1, min(connections, POOL_SIZE))
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return sum(pool.map(touch, range(n)))
+
+
+def get(url: str, **kwargs: Any):
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any):
+    return request("POST", url, **kwargs)
+
+
+_transport_from_env()
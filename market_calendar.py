@@ -0,0 +1,184 @@
+"""
+market_calendar.py: KRX 거래 달력 (휴장일, 개장 지연/단축일, 장 구간)
+- 휴장일/특수 개장일은 로컬 파일(krx_holidays.json)에서 읽음 (주말은 자동 휴장)
+- 모든 시각은 한국 시간(KST) 기준 (호스트 시간대가 UTC여도 같은 결과, 시간대 없는 시각은 KST로 간주)
+- 하루의 구간 (정규장 09:00~15:30 기준, 개장/폐장 시각이 바뀌면 같이 이동)
+    pre_open         08:30~09:00  장전 동시호가
+    regular          09:00~15:20  정규장 (접속매매)
+    closing_auction  15:20~15:30  장마감 동시호가
+    after_hours      15:40~18:00  장후 시간외 (종가/단일가)
+    closed           그 외
+- MarketCadence: 수집 주기 정책 (scheduler.py에 넘김)
+    휴장 구간은 다음 개장까지 대기, 동시호가와 개장 직후/마감 직전에는 주기를 짧게
+
+실행:
+    python market_calendar.py                  # 오늘 구간표와 현재 구간
+    python market_calendar.py --date 2026-11-19
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+HOLIDAY_FILE = "krx_holidays.json"
+KST = datetime.timezone(datetime.timedelta(hours=9))
+REGULAR_OPEN = datetime.time(9, 0)
+REGULAR_CLOSE = datetime.time(15, 30)
+
+CLOSED, PRE_OPEN, REGULAR, CLOSING_AUCTION, AFTER_HOURS = (
+    "closed", "pre_open", "regular", "closing_auction", "after_hours")
+
+PRE_OPEN_MINUTES = 30            # 개장 전 동시호가
+CLOSING_AUCTION_MINUTES = 10     # 마감 동시호가
+AFTER_HOURS_MINUTES = (10, 150)  # 마감 후 (시작, 끝) 분
+
+FAST_INTERVAL = 10               # 동시호가/개장 직후/마감 직전 수집 주기 (초)
+OPEN_WINDOW_MINUTES = 10         # 개장 직후 빠른 수집 구간
+CLOSE_WINDOW_MINUTES = 10        # 마감 동시호가 직전 빠른 수집 구간
+AFTER_HOURS_INTERVAL = 300       # 시간외 수집 주기 (초)
+
+Phase = Tuple[datetime.datetime, datetime.datetime, str]
+
+
+def _parse_time(value: str) -> datetime.time:
+    hour, minute = value.split(":")
+    return datetime.time(int(hour), int(minute))
+
+
+def to_kst(when: datetime.datetime) -> datetime.datetime:
+    """KST 시각으로 변환 (시간대 없는 시각은 KST로 간주)"""
+    return when.replace(tzinfo=KST) if when.tzinfo is None else when.astimezone(KST)
+
+
+def now_kst() -> datetime.datetime:
+    return datetime.datetime.now(KST)
+
+
+class MarketCalendar:
+    def __init__(self, path: str = HOLIDAY_FILE):
+        self.holidays: Set[datetime.date] = set()
+        self.special: Dict[datetime.date, Tuple[datetime.time, datetime.time]] = {}
+        if not os.path.exists(path):
+            print(f"⚠️ [달력] {path} 없음 - 주말만 휴장으로 처리합니다.")
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.holidays = {datetime.date.fromisoformat(d) for d in data.get("holidays", [])}
+        for day, times in data.get("special_sessions", {}).items():
+            self.special[datetime.date.fromisoformat(day)] = (
+                _parse_time(times.get("open", "09:00")), _parse_time(times.get("close", "15:30")))
+
+    def is_trading_day(self, day: datetime.date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day: datetime.date) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+        """정규장 (개장, 폐장) 시각 (KST). 휴장일이면 None"""
+        if not self.is_trading_day(day):
+            return None
+        open_t, close_t = self.special.get(day, (REGULAR_OPEN, REGULAR_CLOSE))
+        return (datetime.datetime.combine(day, open_t, tzinfo=KST),
+                datetime.datetime.combine(day, close_t, tzinfo=KST))
+
+    def phases(self, day: datetime.date) -> List[Phase]:
+        """그날의 (시작, 끝, 구간) 목록 (closed 제외, 시간순)"""
+        session = self.session(day)
+        if session is None:
+            return []
+        open_dt, close_dt = session
+        minutes = datetime.timedelta(minutes=1)
+        auction = close_dt - CLOSING_AUCTION_MINUTES * minutes
+        return [
+            (open_dt - PRE_OPEN_MINUTES * minutes, open_dt, PRE_OPEN),
+            (open_dt, auction, REGULAR),
+            (auction, close_dt, CLOSING_AUCTION),
+            (close_dt + AFTER_HOURS_MINUTES[0] * minutes, close_dt + AFTER_HOURS_MINUTES[1] * minutes, AFTER_HOURS),
+        ]
+
+    def phase(self, when: datetime.datetime) -> str:
+        when = to_kst(when)
+        for start, end, name in self.phases(when.date()):
+            if start <= when < end:
+                return name
+        return CLOSED
+
+    def next_phase_start(self, when: datetime.datetime, names=(PRE_OPEN, REGULAR, CLOSING_AUCTION, AFTER_HOURS),
+                         max_days: int = 30) -> Optional[datetime.datetime]:
+        """when 이후(포함) 처음으로 names 구간이 시작되거나 진행 중인 시각"""
+        when = to_kst(when)
+        day = when.date()
+        for _ in range(max_days):
+            for start, end, name in self.phases(day):
+                if name in names and end > when:
+                    return max(start, when)
+            day += datetime.timedelta(days=1)
+        return None
+
+    def next_open(self, when: datetime.datetime) -> Optional[datetime.datetime]:
+        """when 이후(포함) 가장 가까운 정규장 개장 시각"""
+        when = to_kst(when)
+        day = when.date()
+        for _ in range(30):
+            session = self.session(day)
+            if session is not None and session[0] >= when:
+                return session[0]
+            day += datetime.timedelta(days=1)
+        return None
+
+
+# -----------------------------------------------------------
+# 수집 주기 정책 (FixedRateScheduler cadence)
+# -----------------------------------------------------------
+class MarketCadence:
+    def __init__(self, calendar: MarketCalendar, base_interval: float, after_hours: bool = False,
+                 fast_interval: float = FAST_INTERVAL):
+        self.calendar = calendar
+        self.base = base_interval
+        self.fast = min(base_interval, fast_interval)
+        self.active = (PRE_OPEN, REGULAR, CLOSING_AUCTION) + ((AFTER_HOURS,) if after_hours else ())
+
+    def interval_at(self, ts: float) -> Optional[float]:
+        """ts 시점의 수집 주기 (초). 수집하지 않는 구간이면 None"""
+        when = datetime.datetime.fromtimestamp(ts, KST)
+        for start, end, name in self.calendar.phases(when.date()):
+            if not start <= when < end:
+                continue
+            if name not in self.active:
+                return None
+            if name in (PRE_OPEN, CLOSING_AUCTION):
+                return self.fast
+            if name == AFTER_HOURS:
+                return max(self.base, AFTER_HOURS_INTERVAL)
+            if (when - start).total_seconds() < OPEN_WINDOW_MINUTES * 60 \
+                    or (end - when).total_seconds() <= CLOSE_WINDOW_MINUTES * 60:
+                return self.fast
+            return self.base
+        return None
+
+    def resume_at(self, ts: float) -> Optional[float]:
+        """ts 이후 수집을 다시 시작할 시각 (epoch 초)"""
+        start = self.calendar.next_phase_start(datetime.datetime.fromtimestamp(ts, KST), self.active)
+        return start.timestamp() if start else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="KRX 거래 달력")
+    parser.add_argument("--date", help="조회할 날짜 (YYYY-MM-DD, 기본: 오늘)")
+    parser.add_argument("--file", default=HOLIDAY_FILE, help="휴장일 파일")
+    args = parser.parse_args()
+
+    calendar = MarketCalendar(args.file)
+    now = now_kst()
+    day = datetime.date.fromisoformat(args.date) if args.date else now.date()
+
+    print(f"📅 [달력] {day} ({'영업일' if calendar.is_trading_day(day) else '휴장일'})")
+    for start, end, name in calendar.phases(day):
+        print(f"   {start:%H:%M} ~ {end:%H:%M}  {name}")
+    print(f"   현재 구간: {calendar.phase(now)}")
+    next_open = calendar.next_open(now)
+    if next_open:
+        print(f"   다음 개장: {next_open:%Y-%m-%d %H:%M}")
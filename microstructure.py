@@ -0,0 +1,264 @@
+"""
+microstructure.py: 호가창 미시구조 지표 (NumPy 벡터 연산, 배치 + 스트리밍)
+- Power(총매수잔량 / 총매도잔량)만으로는 가격 단계별 잔량을 볼 수 없어서 10단계 호가(orderbook_log)로 계산
+    imbalance        단계 가중 잔량 불균형 (-1 ~ 1, 1단계일수록 큰 가중치 1/단계)
+    l1_imbalance     최우선 호가 잔량 불균형
+    microprice       잔량 가중 중간가 (매수잔량이 많으면 매도호가 쪽으로 기움)
+    micro_offset     (microprice - 중간가) / 호가단위
+    spread_ticks     (매도1호가 - 매수1호가) / 호가단위
+    bid_depletion    매수 1호가 대기잔량 소진 속도 (주/초, 호가가 내려가면 직전 잔량 전부 소진으로 봄)
+    ask_depletion    매도 1호가 대기잔량 소진 속도 (주/초)
+    ofi              주문흐름 불균형 (Cont-Kukanov-Stoikov, 직전 스냅샷 대비 1호가 잔량 변화, 양수 = 매수 압력)
+- 배치: 전 종목 x 전 시각을 한 번에 계산 (orderbook_log depth BLOB을 복사 없이 배열로 해석)
+- 스트리밍: MicrostructureStream.update()가 관심 종목 전체를 한 번의 배열 연산으로 갱신 (틱마다 호출 가능)
+- 한쪽 호가가 비어 있으면 해당 지표는 NaN (0으로 나누지 않음)
+
+사용 예:
+    from microstructure import load_books, compute, MicrostructureStream
+    books = load_books(conn, since_ms=...)
+    feats = compute(books)                      # {"imbalance": ndarray, ...} (books 행 순서)
+
+    stream = MicrostructureStream(etp_codes={"069500"})
+    latest = stream.update(ts_ms, {"069500": (asks, bids)})   # {code: {지표: 값}}
+
+실행:
+    python microstructure.py --hours 6           # orderbook_log 전 종목 요약 (save_data.py --depth 로 수집)
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from orderbook import LEVELS, Level
+from symbol_master import TICK_BANDS, TICK_UNITS
+
+DB_FILE = "trading.db"
+LEVEL_WEIGHTS = 1.0 / np.arange(1, LEVELS + 1)   # 1단계 1, 2단계 1/2, ...
+FEATURES = ("imbalance", "l1_imbalance", "microprice", "micro_offset", "spread_ticks",
+            "bid_depletion", "ask_depletion", "ofi")
+
+_TICK_BANDS = np.asarray(TICK_BANDS)
+_TICK_UNITS = np.asarray(TICK_UNITS, dtype=float)
+
+
+class Books(NamedTuple):
+    codes: List[str]          # code_idx → 종목코드
+    code_idx: np.ndarray      # (N,) 행별 종목 번호 (종목, 시각 순으로 정렬)
+    ts_ms: np.ndarray         # (N,)
+    ask_px: np.ndarray        # (N, LEVELS)
+    ask_qty: np.ndarray
+    bid_px: np.ndarray
+    bid_qty: np.ndarray
+
+
+def tick_sizes(price: np.ndarray, etp: np.ndarray) -> np.ndarray:
+    """symbol_master.tick_size의 벡터 버전"""
+    stock = _TICK_UNITS[np.searchsorted(_TICK_BANDS, price, side="right")]
+    return np.where(etp, np.where(price < 2000, 1.0, 5.0), stock)
+
+
+def _split(flat: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """orderbook.encode_depth 배치(<40q: 매도 (가격, 잔량) x10, 매수 (가격, 잔량) x10) → 4개 배열"""
+    flat = flat.astype(float)
+    half = LEVELS * 2
+    return flat[:, 0:half:2], flat[:, 1:half:2], flat[:, half::2], flat[:, half + 1::2]
+
+
+# -----------------------------------------------------------
+# 1. 지표 계산 (현재 스냅샷 + 같은 종목의 직전 스냅샷)
+# -----------------------------------------------------------
+def _features(ask_px, ask_qty, bid_px, bid_qty, prev: Optional[Tuple[np.ndarray, ...]], dt_s: np.ndarray,
+              etp: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    모든 입력은 행 = (종목, 시각) 스냅샷. prev는 같은 행의 직전 스냅샷 최우선 호가
+    (매도1호가, 매도1잔량, 매수1호가, 매수1잔량), 직전이 없으면 NaN
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a1, qa, b1, qb = ask_px[:, 0], ask_qty[:, 0], bid_px[:, 0], bid_qty[:, 0]
+        two_sided = (a1 > 0) & (b1 > 0)
+
+        aw = ask_qty @ LEVEL_WEIGHTS
+        bw = bid_qty @ LEVEL_WEIGHTS
+        imbalance = np.where(aw + bw > 0, (bw - aw) / (aw + bw), np.nan)
+        l1_imbalance = np.where(qa + qb > 0, (qb - qa) / (qa + qb), np.nan)
+
+        ok = two_sided & (qa + qb > 0)
+        microprice = np.where(ok, (b1 * qa + a1 * qb) / (qa + qb), np.nan)
+        mid = np.where(two_sided, (a1 + b1) / 2, np.nan)
+        tick = tick_sizes(np.where(two_sided, b1, 0), etp)
+        micro_offset = (microprice - mid) / tick
+        spread_ticks = np.where(two_sided, (a1 - b1) / tick, np.nan)
+
+        pa1, pqa, pb1, pqb = prev
+        has_prev = ~np.isnan(pa1) & two_sided & (pa1 > 0) & (pb1 > 0)
+        # 1호가 대기잔량 소진: 같은 가격이면 줄어든 만큼, 호가가 밀렸으면 직전 잔량 전부
+        bid_used = np.where(b1 == pb1, np.maximum(pqb - qb, 0), np.where(b1 < pb1, pqb, 0))
+        ask_used = np.where(a1 == pa1, np.maximum(pqa - qa, 0), np.where(a1 > pa1, pqa, 0))
+        valid_dt = has_prev & (dt_s > 0)
+        bid_depletion = np.where(valid_dt, bid_used / dt_s, np.nan)
+        ask_depletion = np.where(valid_dt, ask_used / dt_s, np.nan)
+
+        # OFI: 매수 쪽 기여 - 매도 쪽 기여
+        e_bid = np.where(b1 >= pb1, qb, 0) - np.where(b1 <= pb1, pqb, 0)
+        e_ask = np.where(a1 <= pa1, qa, 0) - np.where(a1 >= pa1, pqa, 0)
+        ofi = np.where(has_prev, e_bid - e_ask, np.nan)
+
+    return {"imbalance": imbalance, "l1_imbalance": l1_imbalance, "microprice": microprice,
+            "micro_offset": micro_offset, "spread_ticks": spread_ticks, "bid_depletion": bid_depletion,
+            "ask_depletion": ask_depletion, "ofi": ofi}
+
+
+# -----------------------------------------------------------
+# 2. 배치 (orderbook_log 전체)
+# -----------------------------------------------------------
+def load_books(conn, codes: Optional[Iterable[str]] = None, since_ms: int = 0) -> Books:
+    """orderbook_log → Books (종목, 시각 순)"""
+    query = "SELECT code, ts_ms, depth FROM orderbook_log WHERE ts_ms >= ?"
+    params: list = [since_ms]
+    if codes is not None:
+        codes = list(codes)
+        query += f" AND code IN ({','.join('?' * len(codes))})"
+        params += codes
+    try:
+        rows = conn.execute(query + " ORDER BY code, ts_ms", params).fetchall()
+    except sqlite3.OperationalError:
+        rows = []  # orderbook_log가 아직 없음 (save_data.py --depth 로 수집)
+
+    names: List[str] = []
+    index: Dict[str, int] = {}
+    code_idx = np.empty(len(rows), dtype=np.int64)
+    ts_ms = np.empty(len(rows), dtype=np.int64)
+    for i, (code, ts, _) in enumerate(rows):
+        if code not in index:
+            index[code] = len(names)
+            names.append(code)
+        code_idx[i] = index[code]
+        ts_ms[i] = ts
+    flat = np.frombuffer(b"".join(depth for _, _, depth in rows), dtype="<i8").reshape(-1, LEVELS * 4)
+    return Books(names, code_idx, ts_ms, *_split(flat))
+
+
+def compute(books: Books, etp_codes: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+    """전 종목 x 전 시각 지표를 한 번에 계산 (각 배열은 books 행 순서)"""
+    n = len(books.ts_ms)
+    first = np.ones(n, dtype=bool)          # 종목별 첫 행 (직전 스냅샷 없음)
+    first[1:] = books.code_idx[1:] != books.code_idx[:-1]
+
+    def shifted(column: np.ndarray) -> np.ndarray:
+        out = np.empty(n)
+        out[1:] = column[:-1]
+        out[first] = np.nan
+        return out
+
+    prev = tuple(shifted(col) for col in (books.ask_px[:, 0], books.ask_qty[:, 0],
+                                          books.bid_px[:, 0], books.bid_qty[:, 0]))
+    dt_s = (books.ts_ms - shifted(books.ts_ms.astype(float))) / 1000
+    etp_set = set(etp_codes)
+    etp = np.array([code in etp_set for code in books.codes], dtype=bool)[books.code_idx] if n else np.zeros(0, bool)
+    return _features(books.ask_px, books.ask_qty, books.bid_px, books.bid_qty, prev, dt_s, etp)
+
+
+# -----------------------------------------------------------
+# 3. 스트리밍 (관심 종목 전체를 틱마다)
+# -----------------------------------------------------------
+class MicrostructureStream:
+    def __init__(self, etp_codes: Iterable[str] = ()):
+        self.etp_codes = set(etp_codes)
+        self.index: Dict[str, int] = {}
+        self.prev = np.full((0, 4), np.nan)        # 종목별 직전 (매도1호가, 매도1잔량, 매수1호가, 매수1잔량)
+        self.prev_ts = np.zeros(0)
+
+    def _rows(self, codes: List[str]) -> np.ndarray:
+        new = [c for c in codes if c not in self.index]
+        if new:
+            for code in new:
+                self.index[code] = len(self.index)
+            self.prev = np.vstack([self.prev, np.full((len(new), 4), np.nan)])
+            self.prev_ts = np.concatenate([self.prev_ts, np.zeros(len(new))])
+        return np.fromiter((self.index[c] for c in codes), dtype=np.int64, count=len(codes))
+
+    def update(self, ts_ms: int, books: Dict[str, Tuple[List[Level], List[Level]]]) -> Dict[str, Dict[str, float]]:
+        """한 주기의 종목별 호가 {code: (asks, bids)} → {code: {지표: 값}}"""
+        codes = list(books)
+        if not codes:
+            return {}
+        rows = self._rows(codes)
+        flat = np.array([[v for level in list(asks) + list(bids) for v in level] for asks, bids in books.values()],
+                        dtype=float)
+        ask_px, ask_qty, bid_px, bid_qty = _split(flat)
+        prev = tuple(self.prev[rows, j] for j in range(4))
+        dt_s = np.where(self.prev_ts[rows] > 0, (ts_ms - self.prev_ts[rows]) / 1000, np.nan)
+        etp = np.array([c in self.etp_codes for c in codes], dtype=bool)
+        feats = _features(ask_px, ask_qty, bid_px, bid_qty, prev, dt_s, etp)
+
+        self.prev[rows] = np.column_stack([ask_px[:, 0], ask_qty[:, 0], bid_px[:, 0], bid_qty[:, 0]])
+        self.prev_ts[rows] = ts_ms
+        return {code: {name: float(values[i]) for name, values in feats.items()} for i, code in enumerate(codes)}
+
+
+def summarize(books: Books, feats: Dict[str, np.ndarray]) -> List[Dict]:
+    """종목별 최근 값 + 구간 평균/합계"""
+    out = []
+    starts = np.searchsorted(books.code_idx, np.arange(len(books.codes)))   # 종목, 시각 순 정렬 이용
+    ends = np.append(starts[1:], len(books.code_idx))
+    for i, code in enumerate(books.codes):
+        rows = np.arange(starts[i], ends[i])
+        last = rows[-1]
+        out.append({
+            "code": code,
+            "snapshots": len(rows),
+            "imbalance": float(feats["imbalance"][last]),
+            "microprice": float(feats["microprice"][last]),
+            "micro_offset": float(feats["micro_offset"][last]),
+            "spread_ticks": float(feats["spread_ticks"][last]),
+            "mean_spread_ticks": float(np.nanmean(feats["spread_ticks"][rows])) if rows.size else np.nan,
+            "ofi_sum": float(np.nansum(feats["ofi"][rows])),
+            "bid_depletion": float(np.nanmean(feats["bid_depletion"][rows])) if rows.size > 1 else np.nan,
+            "ask_depletion": float(np.nanmean(feats["ask_depletion"][rows])) if rows.size > 1 else np.nan,
+        })
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import warnings
+
+    parser = argparse.ArgumentParser(description="호가창 미시구조 지표")
+    parser.add_argument("--codes", nargs="*", help="종목 한정 (기본: orderbook_log 전체)")
+    parser.add_argument("--hours", type=float, default=6, help="최근 N시간 (0이면 전체)")
+    args = parser.parse_args()
+
+    etp_codes = set()
+    from symbol_master import INDEX_FILE, SymbolIndex
+    if os.path.exists(INDEX_FILE):
+        index = SymbolIndex(INDEX_FILE)
+        etp_codes = {s.code for s in index if s.is_etp}
+        index.close()
+
+    since_ms = int((time.time() - args.hours * 3600) * 1000) if args.hours else 0
+    conn = sqlite3.connect(DB_FILE)
+    start = time.perf_counter()
+    books = load_books(conn, args.codes, since_ms)
+    load_ms = (time.perf_counter() - start) * 1000
+    conn.close()
+    if not len(books.ts_ms):
+        print("⚠️ 호가 스냅샷이 없습니다. (save_data.py --depth 로 먼저 수집하세요)")
+        exit()
+
+    start = time.perf_counter()
+    feats = compute(books, etp_codes)
+    calc_ms = (time.perf_counter() - start) * 1000
+    print(f"📐 [미시구조] {len(books.codes)}종목, 스냅샷 {len(books.ts_ms):,}건 | 로드 {load_ms:.1f}ms / 계산 {calc_ms:.1f}ms")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # 한쪽 호가만 있는 종목의 nanmean
+        rows = summarize(books, feats)
+    for r in rows:
+        print(f"   {r['code']}: 불균형 {r['imbalance']:+.2f} | 마이크로가격 {r['microprice']:,.1f} "
+              f"({r['micro_offset']:+.2f}틱) | 스프레드 {r['spread_ticks']:.0f}틱 (평균 {r['mean_spread_ticks']:.2f}) | "
+              f"OFI 합계 {r['ofi_sum']:+,.0f} | 소진 매수 {r['bid_depletion']:.1f} / 매도 {r['ask_depletion']:.1f} 주/초")
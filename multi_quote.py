@@ -0,0 +1,137 @@
+"""
+multi_quote.py: 관심종목(멀티종목) 시세 일괄 조회 (FHKST11300006, 호출 1건에 최대 30종목)
+- 관심 종목을 30개씩 묶어 배치마다 1건만 호출 → 종목별 호가 조회(get_hoga_data) 대비 호출 수 약 1/30
+- 배치는 공용 호출 예산(rate_limit.py) 안에서 동시에 실행
+- 응답은 종목별 행(MultiQuote)으로 나눠 반환 (현재가, 누적거래량, 총매도/매수잔량, 최우선 호가)
+  ※ 10단계 호가는 주지 않음 (필요하면 save_data.get_hoga_snapshot 사용)
+
+사용 예:
+    from multi_quote import fetch_quotes
+    quotes = fetch_quotes(token, ["069500", "005930", ...])   # {code: MultiQuote}
+
+실행:
+    python multi_quote.py 069500 005930 000660
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import circuit_breaker
+import kis_http
+from rate_limit import default_limiter
+
+PATH = "/uapi/domestic-stock/v1/quotations/intstock-multprice"
+TR_ID = "FHKST11300006"
+BATCH_SIZE = 30       # 호출 1건당 최대 종목 수
+WORKERS = 10
+
+
+class MultiQuote(NamedTuple):
+    code: str
+    price: int
+    volume: int         # 누적 거래량
+    total_ask: int      # 총 매도호가 잔량
+    total_bid: int      # 총 매수호가 잔량
+    ask1: int           # 최우선 매도호가
+    bid1: int           # 최우선 매수호가
+
+
+def _int(value) -> int:
+    try:
+        return int(float(value or 0))
+    except ValueError:
+        return 0
+
+
+def batches(codes: Iterable[str], size: int = BATCH_SIZE) -> List[List[str]]:
+    """중복을 뺀 종목을 size개씩 묶음 (순서 유지)"""
+    unique = list(dict.fromkeys(codes))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def get_multi_quotes(token: str, codes: List[str], app_key: Optional[str] = None, app_secret: Optional[str] = None,
+                     url_base: Optional[str] = None, market: str = "J") -> Dict[str, MultiQuote]:
+    """최대 30종목 시세를 한 번에 조회. 실패 시 빈 dict"""
+    import key
+
+    if len(codes) > BATCH_SIZE:
+        raise ValueError(f"한 번에 {BATCH_SIZE}종목까지 조회할 수 있습니다: {len(codes)}")
+
+    headers = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {token}",
+        "appkey": app_key or key.APP_KEY,
+        "appsecret": app_secret or key.APP_SECRET,
+        "tr_id": TR_ID,
+        "custtype": "P",
+    }
+    params = {}
+    for i, code in enumerate(codes, 1):
+        params[f"FID_COND_MRKT_DIV_CODE_{i}"] = market
+        params[f"FID_INPUT_ISCD_{i}"] = code
+
+    try:
+        res = kis_http.get((url_base or key.URL_BASE) + PATH, headers=headers, params=params, timeout=10)
+        data = res.json()
+        if res.status_code != 200 or data.get("rt_cd") != "0":
+            print(f"❌ [멀티시세] API 오류: {data.get('msg1')}")
+            return {}
+    except circuit_breaker.CircuitOpenError:
+        return {}  # 차단 중: 이번 주기는 건너뜀
+    except Exception as e:
+        print(f"💥 [멀티시세] 통신 오류: {e}")
+        return {}
+
+    quotes = {}
+    for row in data.get("output") or []:
+        code = row.get("inter_shrn_iscd", "").strip()
+        price = _int(row.get("inter2_prpr"))
+        if not code or price <= 0:
+            continue  # 거래정지 등 시세 없는 종목
+        quotes[code] = MultiQuote(code, price, _int(row.get("acml_vol")), _int(row.get("total_askp_rsqn")),
+                                  _int(row.get("total_bidp_rsqn")), _int(row.get("inter2_askp")),
+                                  _int(row.get("inter2_bidp")))
+    return quotes
+
+
+def fetch_quotes(token: str, codes: Iterable[str], workers: int = WORKERS, **credentials) -> Dict[str, MultiQuote]:
+    """관심 종목 전체를 30종목 배치로 나눠 동시에 조회 (실패한 배치의 종목은 결과에서 빠짐)"""
+    groups = batches(codes)
+    if not groups:
+        return {}
+
+    def fetch(group: List[str]) -> Dict[str, MultiQuote]:
+        default_limiter.acquire()
+        return get_multi_quotes(token, group, **credentials)
+
+    quotes: Dict[str, MultiQuote] = {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+        for result in pool.map(fetch, groups):
+            quotes.update(result)
+    return quotes
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import key
+    from token_manage import get_token_for_api
+
+    parser = argparse.ArgumentParser(description="관심종목 시세 일괄 조회")
+    parser.add_argument("codes", nargs="+", help="종목코드")
+    args = parser.parse_args()
+
+    token = get_token_for_api(key.APP_KEY, key.APP_SECRET, key.URL_BASE)
+    if not token:
+        print("💥 토큰 발급 실패")
+        exit(1)
+
+    started = time.perf_counter()
+    quotes = fetch_quotes(token, args.codes)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📡 [멀티시세] {len(quotes)}/{len(set(args.codes))}종목, 호출 {len(batches(args.codes))}건 ({elapsed_ms:.0f}ms)")
+    for q in quotes.values():
+        print(f"   {q.code} | {q.price:,}원 | 거래량 {q.volume:,} | 매도잔량 {q.total_ask:,} / 매수잔량 {q.total_bid:,} "
+              f"| 호가 {q.bid1:,} / {q.ask1:,}")
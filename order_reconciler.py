@@ -0,0 +1,284 @@
+"""
+order_reconciler.py: 원하는 미체결 주문 상태(desired)와 실제 미체결 주문(live)을 맞추는 조정기
+- 종목/방향별로 원하는 주문(가격, 수량) 목록을 받아 실제 미체결과 비교
+    같은 가격/수량          → 유지
+    남은 주문끼리 가격순 짝  → 정정 (수량을 줄여야 하면 초과분 일부 취소 후 잔량 전부 정정,
+                                     늘려야 하면 취소 후 재주문 - 재주문이 리스크 차단되면 기존 주문 유지)
+    짝이 없는 실제 주문     → 취소
+    짝이 없는 원하는 주문   → 신규
+- 필요한 정정/취소/신규 요청을 한 번에 동시 전송 (rate_limit.py 공용 호출 예산 안에서)
+  취소를 먼저 보내고 끝난 뒤 정정/신규 → 리스크 점검의 미체결 수 한도가 취소된 주문을 빼고 계산
+  → 가격이 움직여 호가 사다리를 다시 걸 때 전부 취소 후 재주문 대신 정정 1회 배치로 끝남
+- 신규 주문과 매수 금액이 늘어나는 정정은 risk_gate.py 점검을 통과한 것만 전송, 모든 요청은 execution_tracker.py에 기록
+
+사용 예:
+    from accounts import default_account
+    from risk_gate import Order, RiskGate
+    from order_reconciler import reconcile
+
+    ladder = [Order("069500", "buy", 10, p) for p in (34900, 34950, 35000)]
+    reconcile(default_account(), ladder, gate=RiskGate(default_account()))
+
+실행:
+    python order_reconciler.py --order 069500 buy 10 35000 --order 069500 buy 10 34950 --dry-run
+    python order_reconciler.py --flat 069500          # 해당 종목 미체결 전부 취소
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from rate_limit import default_limiter
+from risk_gate import Order
+
+MAX_WORKERS = 10
+
+
+class LiveOrder(NamedTuple):
+    odno: str
+    code: str
+    side: str
+    qty: int      # 미체결 잔량
+    price: int
+
+
+class Plan(NamedTuple):
+    keep: List[LiveOrder]
+    amend: List[Tuple[LiveOrder, Order]]
+    cancel: List[LiveOrder]
+    place: List[Order]
+    replace: List[Tuple[LiveOrder, Order]]   # 수량을 늘리는 짝: 취소 후 재주문 (재주문이 막히면 취소도 안 함)
+
+    @property
+    def actions(self) -> int:
+        return len(self.amend) + len(self.cancel) + len(self.place) + 2 * len(self.replace)
+
+
+def live_from_pending(pending: List[Dict]) -> List[LiveOrder]:
+    """미체결 조회(TTTC8036R) output → LiveOrder 목록 (잔량 0 제외)"""
+    orders = []
+    for o in pending:
+        qty = int(o.get("rmn_qty", 0) or 0)
+        if qty <= 0:
+            continue
+        side = "sell" if o.get("sll_buy_dvsn_cd") == "01" else "buy"
+        orders.append(LiveOrder(o.get("odno", ""), o.get("pdno", ""), side, qty, int(o.get("ord_unpr", 0) or 0)))
+    return orders
+
+
+# -----------------------------------------------------------
+# 1. 차이 계산 (API 호출 없음)
+# -----------------------------------------------------------
+def diff(desired: Iterable[Order], live: Iterable[LiveOrder], codes: Optional[Iterable[str]] = None) -> Plan:
+    """
+    codes: 관리 대상 종목 (기본값: desired에 있는 종목). 대상 종목의 실제 주문 중 desired에 없는 것은 취소,
+           대상이 아닌 종목의 주문은 건드리지 않음
+    """
+    desired = list(desired)
+    scope = set(codes) if codes is not None else {o.code for o in desired}
+    want: Dict[Tuple[str, str], List[Order]] = {}
+    have: Dict[Tuple[str, str], List[LiveOrder]] = {}
+    for o in desired:
+        want.setdefault((o.code, o.side), []).append(o)
+    for o in live:
+        if o.code in scope:
+            have.setdefault((o.code, o.side), []).append(o)
+
+    plan = Plan([], [], [], [], [])
+    for key in sorted(set(want) | set(have)):
+        wants = sorted(want.get(key, []), key=lambda o: o.price)
+        haves = sorted(have.get(key, []), key=lambda o: o.price)
+
+        # 가격/수량이 같은 주문은 그대로 둠
+        rest = []
+        for o in wants:
+            match = next((h for h in haves if h.price == o.price and h.qty == o.qty), None)
+            if match is None:
+                rest.append(o)
+            else:
+                haves.remove(match)
+                plan.keep.append(match)
+
+        # 남은 것끼리 가격순으로 짝지어 정정 (사다리가 통째로 움직인 경우 가격 순서가 그대로 유지됨)
+        for o, h in zip(rest, haves):
+            if o.qty <= h.qty:
+                plan.amend.append((h, o))
+            else:
+                plan.replace.append((h, o))   # 정정으로는 수량을 늘릴 수 없음 → 취소 후 재주문
+        plan.cancel.extend(haves[len(rest):])
+        plan.place.extend(rest[len(haves):])
+    return plan
+
+
+# -----------------------------------------------------------
+# 2. 동시 전송
+# -----------------------------------------------------------
+def execute(plan: Plan, account, gate=None, workers: int = MAX_WORKERS) -> Dict[str, int]:
+    """
+    정정/취소/신규를 한 배치로 동시 전송. {"amended", "cancelled", "placed", "blocked", "failed"} 반환
+    gate: RiskGate (있으면 신규 주문은 check, 정정은 check_amend, 재주문은 check(replaces=)로 점검 -
+          차단된 정정/재주문은 기존 주문을 그대로 둠)
+    정정은 항상 잔량 전부 정정 (일부 정정은 나머지가 원래 가격에 남음). 수량을 줄이는 정정은
+    같은 작업 안에서 초과분을 먼저 일부 취소한 뒤 남은 잔량을 정정
+    전송 순서: 취소(재주문 짝 포함)를 먼저 동시에 보내고 끝나면 정정/신규 (취소에 실패한 짝은 재주문하지 않음)
+    """
+    from remove_order import amend_order, cancel_order, place_order
+
+    token = account.token()
+    if not token:
+        print(f"❌ [{account.label}] 토큰 발급 실패")
+        return {"amended": 0, "cancelled": 0, "placed": 0, "blocked": 0, "failed": plan.actions}
+    app_key, app_secret, url_base = account.credentials()
+    creds = (token, app_key, app_secret, account.cano, account.acnt_prdt_cd, url_base)
+
+    blocked = 0
+    amends = []
+    for live, order in plan.amend:
+        old = Order(live.code, live.side, live.qty, live.price)
+        decision = gate.check_amend(old, order) if gate is not None else None
+        if decision is not None and not decision.ok:
+            print(f"🛑 [리스크] {live.code} 정정 {live.price:,}원 → {order.price:,}원 x {order.qty:,}주 차단: "
+                  f"{decision.reason}")
+            blocked += 1
+            continue
+        if gate is not None:
+            gate.record_amend(old, order)
+        amends.append((live, order))
+
+    def check(order: Order, replaces: Optional[LiveOrder] = None) -> bool:
+        old = Order(replaces.code, replaces.side, replaces.qty, replaces.price) if replaces is not None else None
+        decision = gate.check(order, replaces=old) if gate is not None else None
+        if decision is not None and not decision.ok:
+            print(f"🛑 [리스크] {order.code} {order.side} {order.price:,}원 x {order.qty:,}주 차단: {decision.reason}"
+                  + (f" (기존 주문 {replaces.odno} 유지)" if replaces is not None else ""))
+            return False
+        if gate is not None:
+            gate.record(order)   # 다음 신규 주문 점검에 반영
+            if old is not None:
+                gate.record_cancel(old)
+        return True
+
+    # 재주문 짝은 취소 전에 점검 - 재주문이 막히면 기존 주문을 취소하지 않음
+    replaces = []
+    for live, order in plan.replace:
+        if check(order, replaces=live):
+            replaces.append((live, order))
+        else:
+            blocked += 1
+
+    done = {"cancel": 0, "amend": 0, "place": 0}
+    failed = 0
+
+    def run_all(jobs) -> List[Tuple[str, bool]]:
+        nonlocal failed
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(run, jobs))
+        for kind, ok in results:
+            if ok:
+                done[kind] += 1
+            else:
+                failed += 1
+        return results
+
+    def run(job) -> Tuple[str, bool]:
+        kind, item = job
+        default_limiter.acquire()
+        if kind == "cancel":
+            return kind, cancel_order(*creds, item.odno, item.qty, item.price, verbose=False, code=item.code)
+        if kind == "amend":
+            live, order = item
+            if order.qty < live.qty and not cancel_order(*creds, live.odno, live.qty - order.qty, live.price,
+                                                         verbose=False, code=live.code, all_qty=False):
+                return kind, False
+            return kind, amend_order(*creds, live.odno, order.qty, order.price, all_qty=True,
+                                     verbose=False, code=live.code) is not None
+        return kind, place_order(*creds, item.code, item.side, item.qty, item.price, verbose=False) is not None
+
+    # 1) 취소 먼저 (짝 없는 취소 + 재주문 짝의 기존 주문)
+    cancels = list(plan.cancel) + [live for live, _ in replaces]
+    results = run_all([("cancel", o) for o in cancels])
+    if gate is not None:
+        for live, (_, ok) in zip(plan.cancel, results):
+            if ok:
+                gate.record_cancel(Order(live.code, live.side, live.qty, live.price))
+    # 취소에 실패한 짝은 재주문하지 않음 (기존 주문이 살아 있으면 수량이 겹침)
+    replaced = [order for (live, order), (_, ok) in zip(replaces, results[len(plan.cancel):]) if ok]
+
+    # 2) 정정 / 신규 (신규는 취소가 반영된 뒤 점검)
+    places = []
+    for order in plan.place:
+        if check(order):
+            places.append(order)
+        else:
+            blocked += 1
+    run_all([("amend", pair) for pair in amends] + [("place", o) for o in places + replaced])
+    return {"amended": done["amend"], "cancelled": done["cancel"], "placed": done["place"],
+            "blocked": blocked, "failed": failed}
+
+
+def print_plan(plan: Plan) -> None:
+    print(f"📋 [조정 계획] 유지 {len(plan.keep)} | 정정 {len(plan.amend)} | 취소 {len(plan.cancel)} | "
+          f"신규 {len(plan.place)} | 취소 후 재주문 {len(plan.replace)}")
+    for live, order in plan.amend:
+        trim = f", {live.qty - order.qty:,}주 일부 취소 후" if order.qty < live.qty else ""
+        print(f"   ✏️ {live.code} {live.side} {live.price:,}원 x {live.qty:,} → {order.price:,}원 x {order.qty:,} "
+              f"(주문번호 {live.odno}{trim})")
+    for live in plan.cancel:
+        print(f"   ❌ {live.code} {live.side} {live.price:,}원 x {live.qty:,} (주문번호 {live.odno})")
+    for order in plan.place:
+        print(f"   ➕ {order.code} {order.side} {order.price:,}원 x {order.qty:,}")
+    for live, order in plan.replace:
+        print(f"   🔁 {live.code} {live.side} {live.price:,}원 x {live.qty:,} → {order.price:,}원 x {order.qty:,} "
+              f"(주문번호 {live.odno} 취소 후 재주문)")
+
+
+def reconcile(account, desired: Iterable[Order], codes: Optional[Iterable[str]] = None, gate=None,
+              dry_run: bool = False) -> Optional[Dict[str, int]]:
+    """실제 미체결을 조회해서 desired에 맞춤 (dry_run이면 계획만 출력)"""
+    from accounts import fetch_pending
+
+    try:
+        live = live_from_pending(fetch_pending(account))
+    except Exception as e:
+        print(f"❌ [{account.label}] 미체결 조회 실패: {e}")
+        return None
+
+    plan = diff(desired, live, codes)
+    print_plan(plan)
+    if dry_run or not plan.actions:
+        return None
+    result = execute(plan, account, gate)
+    print(f"✅ [조정 완료] 정정 {result['amended']} | 취소 {result['cancelled']} | 신규 {result['placed']} | "
+          f"리스크 차단 {result['blocked']} | 실패 {result['failed']}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from accounts import default_account
+    from risk_gate import RiskGate
+
+    parser = argparse.ArgumentParser(description="원하는 미체결 주문 상태로 조정 (정정/취소/신규 동시 전송)")
+    parser.add_argument("--order", nargs=4, action="append", default=[], metavar=("CODE", "SIDE", "QTY", "PRICE"),
+                        help="원하는 주문 (여러 번 지정)")
+    parser.add_argument("--flat", nargs="*", default=[], help="미체결을 모두 없앨 종목")
+    parser.add_argument("--dry-run", action="store_true", help="계획만 출력")
+    parser.add_argument("--no-gate", action="store_true", help="신규/정정 주문 리스크 점검 생략")
+    args = parser.parse_args()
+
+    desired = [Order(code, side, int(qty), int(price)) for code, side, qty, price in args.order]
+    codes = {o.code for o in desired} | set(args.flat)
+    if not codes:
+        parser.error("--order 또는 --flat 이 필요합니다.")
+
+    account = default_account()
+    gate = None
+    if desired and not args.no_gate and not args.dry_run:
+        gate = RiskGate(account)
+        if not gate.refresh():
+            print("💥 잔고 스냅샷을 받지 못해 신규/정정 주문을 점검할 수 없습니다. (--no-gate 로 생략 가능)")
+            exit(1)
+    reconcile(account, desired, codes, gate=gate, dry_run=args.dry_run)
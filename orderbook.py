@@ -0,0 +1,91 @@
+"""
+orderbook.py: 10단계 호가(depth) 저장소
+- 호가 조회(FHKST01010200) 응답 output1의 askp1~10 / bidp1~10, askp_rsqn1~10 / bidp_rsqn1~10 파싱
+- orderbook_log 테이블: 최우선 호가는 컬럼으로(집계/조인용), 전체 10단계는 압축 바이너리(depth)로 저장
+- 시각은 epoch 밀리초 정수(ts_ms) → 주문 이벤트와 ms 단위로 조인
+
+사용 예:
+    from orderbook import parse_depth, save_orderbook, latest_book
+    asks, bids = parse_depth(data["output1"])
+    save_orderbook(conn, ts_ms, "069500", asks, bids)
+    book = latest_book(conn, "069500", at_ms)    # at_ms 직전 호가
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Dict, List, Optional, Tuple
+
+LEVELS = 10
+DEPTH_INTERVAL = 60.0    # save_data.py --depth 호가 저장 주기 (초, --interval 기본값)
+# 이벤트 시각보다 이만큼 이상 오래된 호가는 조인하지 않음
+# (호가가 수집 주기마다 한 번 저장되므로 주기 1회 + 조회 지연 여유 5초까지는 직전 호가로 봄)
+MAX_BOOK_AGE_MS = int(DEPTH_INTERVAL * 1000) + 5000
+
+Level = Tuple[int, int]  # (가격, 잔량)
+_DEPTH = struct.Struct(f"<{LEVELS * 4}q")   # 매도 가격/잔량 10단계 + 매수 가격/잔량 10단계
+
+
+def parse_depth(output1: Dict) -> Tuple[List[Level], List[Level]]:
+    """호가 조회 output1 → (매도호가 [(가격, 잔량)...], 매수호가 [...]) 1단계(최우선)부터"""
+    def levels(side: str) -> List[Level]:
+        return [(int(output1.get(f"{side}p{i}", 0) or 0), int(output1.get(f"{side}p_rsqn{i}", 0) or 0))
+                for i in range(1, LEVELS + 1)]
+    return levels("ask"), levels("bid")
+
+
+def encode_depth(asks: List[Level], bids: List[Level]) -> bytes:
+    flat = []
+    for price, qty in list(asks) + list(bids):
+        flat += (price, qty)
+    return _DEPTH.pack(*flat)
+
+
+def decode_depth(blob: bytes) -> Tuple[List[Level], List[Level]]:
+    flat = _DEPTH.unpack(blob)
+    pairs = list(zip(flat[0::2], flat[1::2]))
+    return pairs[:LEVELS], pairs[LEVELS:]
+
+
+def init_orderbook_table(conn) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS orderbook_log (
+        ts_ms INTEGER,
+        code TEXT,
+        ask1 INTEGER,
+        bid1 INTEGER,
+        ask1_qty INTEGER,
+        bid1_qty INTEGER,
+        total_ask_qty INTEGER,
+        total_bid_qty INTEGER,
+        depth BLOB,
+        PRIMARY KEY (code, ts_ms)
+    )
+    """)
+
+
+def save_orderbook(conn, ts_ms: int, code: str, asks: List[Level], bids: List[Level],
+                   total_ask: Optional[int] = None, total_bid: Optional[int] = None) -> None:
+    """호가 1건 저장 (commit은 호출 측에서)"""
+    total_ask = sum(q for _, q in asks) if total_ask is None else total_ask
+    total_bid = sum(q for _, q in bids) if total_bid is None else total_bid
+    conn.execute("INSERT OR REPLACE INTO orderbook_log VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 (ts_ms, code, asks[0][0], bids[0][0], asks[0][1], bids[0][1], total_ask, total_bid,
+                  encode_depth(asks, bids)))
+
+
+def latest_book(conn, code: str, at_ms: int, max_age_ms: int = MAX_BOOK_AGE_MS) -> Optional[Dict]:
+    """at_ms 시점 직전(이하)의 최우선 호가 (없거나 너무 오래됐으면 None)"""
+    row = conn.execute(
+        "SELECT ts_ms, ask1, bid1, ask1_qty, bid1_qty FROM orderbook_log "
+        "WHERE code = ? AND ts_ms <= ? ORDER BY ts_ms DESC LIMIT 1", (code, at_ms)).fetchone()
+    if row is None or at_ms - row[0] > max_age_ms:
+        return None
+    return {"ts_ms": row[0], "ask1": row[1], "bid1": row[2], "ask1_qty": row[3], "bid1_qty": row[4]}
+
+
+def read_orderbook(conn, code: str, since_ms: int = 0) -> List[Tuple[int, List[Level], List[Level]]]:
+    """since_ms 이후 전체 호가 (시각, 매도호가, 매수호가) 오래된 순"""
+    rows = conn.execute("SELECT ts_ms, depth FROM orderbook_log WHERE code = ? AND ts_ms >= ? ORDER BY ts_ms",
+                        (code, since_ms))
+    return [(ts_ms, *decode_depth(depth)) for ts_ms, depth in rows]
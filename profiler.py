@@ -0,0 +1,229 @@
+"""
+profiler.py: 수집기/분석/계좌 도구용 내장 프로파일러
+- 샘플링 CPU 프로파일: 별도 스레드가 일정 간격으로 모든 스레드의 호출 스택을 채집
+  → flamegraph.pl / speedscope 에서 바로 열 수 있는 collapsed stack 파일(.folded)로 저장
+- tracemalloc 메모리 추적: 루프 ALLOC_EVERY회(iteration)마다 1회, 그 루프의 할당 증가량 상위 N개를 리포트(.alloc.txt)에 기록
+  (스냅샷 2번이 루프보다 오래 걸릴 수 있어 매번 찍지 않음, --profile-alloc-every 0이면 메모리 추적 끔)
+- 코드 계측 없이 스택만 훑으므로 부하가 작음 → 운영 중에도 짧은 구간(--profile-for) 동안 켜 둘 수 있음
+
+사용 예:
+    python save_data.py --profile --profile-for 300     # 5분간 프로파일 후 자동 종료(수집은 계속)
+    python save_data.py --interval 0.5 --profile --profile-alloc-every 0   # 짧은 주기 루프는 CPU만
+    flamegraph.pl profiles/save_data-20260101-090000.folded > flame.svg
+
+    import profiler
+    profiler.start("my_tool")
+    with profiler.iteration("cycle"):
+        ...
+    profiler.stop()
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.01   # 스택 채집 간격 (초, 100Hz)
+TRACE_FRAMES = 1         # tracemalloc이 할당마다 저장할 스택 깊이 (클수록 부하 증가)
+TOP_ALLOCATIONS = 15     # 기록할 상위 할당 수
+ALLOC_EVERY = 100        # 이 횟수의 iteration마다 1회만 할당 스냅샷 (0이면 메모리 추적 안 함)
+
+
+def _frame_label(frame, leaf: bool) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    # 말단 프레임은 현재 실행 줄까지 표시 (commit / json 파싱 / print 중 어디인지 구분)
+    line = frame.f_lineno if leaf else code.co_firstlineno
+    return f"{code.co_name} ({filename}:{line})"
+
+
+class Profiler:
+    def __init__(self, name: str, out_dir: str = PROFILE_DIR, interval: float = SAMPLE_INTERVAL,
+                 trace_frames: int = TRACE_FRAMES, top: int = TOP_ALLOCATIONS, duration: float = 0,
+                 alloc_every: int = ALLOC_EVERY):
+        """
+        Args:
+            name: 출력 파일 이름 앞부분 (보통 스크립트 이름)
+            interval: 스택 채집 간격 (초)
+            trace_frames: tracemalloc 스택 깊이 (0이면 메모리 추적 안 함)
+            duration: 이 시간(초)이 지나면 자동으로 멈추고 파일 저장 (0이면 stop() 까지)
+            alloc_every: iteration 몇 회마다 할당 스냅샷을 찍을지 (첫 회 포함, 0이면 메모리 추적 안 함)
+        """
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.makedirs(out_dir, exist_ok=True)
+        self.stack_file = os.path.join(out_dir, f"{name}-{stamp}.folded")
+        self.alloc_file = os.path.join(out_dir, f"{name}-{stamp}.alloc.txt")
+        self.interval = interval
+        self.trace_frames = trace_frames if alloc_every > 0 else 0
+        self.alloc_every = alloc_every
+        self.top = top
+        self.duration = duration
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.iterations = 0     # 할당을 기록한 iteration 수
+        self._seen = 0          # 지나간 전체 iteration 수
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._alloc = None
+        self._started = 0.0
+        self._lock = threading.Lock()   # iteration() 기록과 stop()이 겹치지 않게
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    # -----------------------------------------------------------
+    # 1. 샘플링 CPU 프로파일
+    # -----------------------------------------------------------
+    def _sample_once(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            leaf = True
+            while frame is not None:
+                stack.append(_frame_label(frame, leaf))
+                leaf = False
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def _sample_loop(self) -> None:
+        deadline = self._started + self.duration if self.duration else None
+        while not self._stop.wait(self.interval):
+            self._sample_once()
+            if deadline and time.time() >= deadline:
+                self.stop()
+                break
+
+    # -----------------------------------------------------------
+    # 2. 루프 1회 단위 메모리 할당 추적
+    # -----------------------------------------------------------
+    @contextlib.contextmanager
+    def iteration(self, label: str = ""):
+        if not self.active:
+            yield
+            return
+        self._seen += 1
+        if not self.trace_frames or not tracemalloc.is_tracing() or (self._seen - 1) % self.alloc_every:
+            yield   # 메모리 추적을 끄거나 이번 회는 스냅샷 생략
+            return
+
+        before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            after = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            if after is not None:
+                self._write_allocations(label, elapsed_ms, before, after)
+
+    def _write_allocations(self, label: str, elapsed_ms: float, before, after) -> None:
+        own = (tracemalloc.__file__, __file__)   # 프로파일러 자신의 할당은 제외
+        diff = after.compare_to(before, "lineno")
+        grown = [d for d in diff if d.size_diff > 0 and d.traceback[0].filename not in own][:self.top]
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            if self._alloc is None:
+                return
+            self.iterations += 1
+            self._alloc.write(f"## #{self._seen} {label} | {datetime.datetime.now():%H:%M:%S} | "
+                              f"{elapsed_ms:.1f}ms | traced {current / 1024:.0f}KiB (peak {peak / 1024:.0f}KiB)\n")
+            for d in grown:
+                frame = d.traceback[0]
+                self._alloc.write(f"  +{d.size_diff / 1024:8.1f}KiB {d.count_diff:+6d} blocks  "
+                                  f"{os.path.basename(frame.filename)}:{frame.lineno}\n")
+            self._alloc.flush()
+
+    # -----------------------------------------------------------
+    # 3. 시작 / 종료
+    # -----------------------------------------------------------
+    def start(self) -> "Profiler":
+        self._started = time.time()
+        if self.trace_frames:
+            tracemalloc.start(self.trace_frames)
+            self._alloc = open(self.alloc_file, "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        window = f"{self.duration:.0f}초" if self.duration else "종료 시까지"
+        print(f"🔬 [프로파일] 시작 ({window}, 샘플 간격 {self.interval * 1000:.0f}ms)")
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self._stop.set()
+            if self._alloc is not None:
+                self._alloc.close()
+                self._alloc = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+        if self._thread is not threading.current_thread():
+            self._thread.join()   # 채집 중인 샘플이 끝난 뒤 저장
+
+        with open(self.stack_file, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        elapsed = time.time() - self._started
+        print(f"🔬 [프로파일] 종료: {elapsed:.1f}초, 샘플 {self.sample_count:,}회, "
+              f"iteration {self._seen}회 (할당 기록 {self.iterations}회)")
+        print(f"   스택: {self.stack_file}")
+        if self.trace_frames:
+            print(f"   할당: {self.alloc_file}")
+
+
+# -----------------------------------------------------------
+# 4. 스크립트 연결용 헬퍼 (프로파일이 꺼져 있으면 아무 일도 안 함)
+# -----------------------------------------------------------
+_active: Optional[Profiler] = None
+
+
+def add_arguments(parser) -> None:
+    """argparse에 --profile 관련 옵션 추가"""
+    parser.add_argument("--profile", action="store_true", help="샘플링 CPU + 메모리 할당 프로파일 기록")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="프로파일 결과 저장 폴더")
+    parser.add_argument("--profile-for", type=float, default=0,
+                        help="프로파일 유지 시간 (초, 0이면 종료 시까지)")
+    parser.add_argument("--profile-alloc-every", type=int, default=ALLOC_EVERY, metavar="N",
+                        help="루프 N회마다 1회 메모리 할당 기록 (0이면 메모리 추적 끔)")
+
+
+def start(name: str, out_dir: str = PROFILE_DIR, duration: float = 0, alloc_every: int = ALLOC_EVERY,
+          **kwargs) -> Profiler:
+    global _active
+    _active = Profiler(name, out_dir, duration=duration, alloc_every=alloc_every, **kwargs).start()
+    atexit.register(_active.stop)   # exit() 등으로 끝나도 결과 저장
+    return _active
+
+
+def start_from_args(args, name: str) -> Optional[Profiler]:
+    if not getattr(args, "profile", False):
+        return None
+    return start(name, args.profile_dir, args.profile_for, getattr(args, "profile_alloc_every", ALLOC_EVERY))
+
+
+def iteration(label: str = ""):
+    """루프 1회를 감싸는 컨텍스트 (프로파일 중이 아니면 그대로 통과)"""
+    if _active is None or not _active.active:
+        return contextlib.nullcontext()
+    return _active.iteration(label)
+
+
+def stop() -> None:
+    if _active is not None:
+        _active.stop()
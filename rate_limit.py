@@ -0,0 +1,47 @@
+"""
+rate_limit.py: 한국투자증권 REST 호출 속도 제한 (토큰 버킷)
+- 실전 계좌는 초당 20건, 모의투자는 초당 2건 제한 (EGW00201 오류 방지)
+- 여러 스레드가 같은 RateLimiter를 공유하면 전체 호출량이 예산 안에서 유지됨
+
+사용 예:
+    from rate_limit import default_limiter
+    default_limiter.acquire()   # 호출 가능할 때까지 대기
+    res = kis_http.get(...)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+DEFAULT_RATE = 15.0  # 초당 호출 수 (실전 20건 제한에서 여유분 확보)
+
+
+class RateLimiter:
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self.rate = rate
+
+    def acquire(self) -> None:
+        """토큰 1개를 소비. 남은 토큰이 없으면 생길 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# 프로세스 전체가 공유하는 기본 제한기
+default_limiter = RateLimiter()
@@ -3,9 +3,11 @@ remove_order.py: 한국투자증권 주문 관리 전용 모듈
 - 미체결 주문 조회
 - 주문 취소
 - 주문 정정
+- 신규 주문 (지정가)
+- 당일 주문체결 조회 (체결 수량/금액 → execution_tracker.py 체결 기록)
 
 사용 예:
-    from remove_order import get_pending_orders, cancel_order, cancel_all_orders
+    from remove_order import get_pending_orders, cancel_order, cancel_all_orders, amend_order, place_order
     
     # 미체결 주문 조회
     orders = get_pending_orders(token, app_key, app_secret, cano, acnt_prdt_cd, url_base)
@@ -15,22 +17,39 @@ remove_order.py: 한국투자증권 주문 관리 전용 모듈
     
     # 모든 미체결 주문 취소
     cancel_all_orders(token, app_key, app_secret, cano, acnt_prdt_cd, url_base)
+    
+    # 주문 정정 (가격 변경, 새 주문번호 반환) / 신규 주문
+    new_no = amend_order(token, app_key, app_secret, cano, acnt_prdt_cd, url_base, order_no, qty, new_price)
+    order_no = place_order(token, app_key, app_secret, cano, acnt_prdt_cd, url_base, "069500", "buy", 10, 35000)
+    
+    # 당일 주문별 누적 체결 (odno, tot_ccld_qty, tot_ccld_amt ...)
+    executions = get_daily_executions(token, app_key, app_secret, cano, acnt_prdt_cd, url_base)
 """
 
-import requests
+import kis_http
+import execution_tracker
 import json
 import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
 
+MAX_PENDING_PAGES = 20  # 미체결/체결 연속조회 최대 페이지 수 (무한 반복 방지)
+KST = timezone(timedelta(hours=9))
+
+def _quiet(*args, **kwargs) -> None:
+    """verbose=False 일 때 print 대신 사용 (여러 계좌 동시 조회 시 출력 섞임 방지)"""
+
 
 def get_pending_orders(token: str, 
                       app_key: str, 
                       app_secret: str,
                       cano: str,
                       acnt_prdt_cd: str,
-                      url_base: str) -> Optional[Dict]:
+                      url_base: str,
+                      verbose: bool = True,
+                      raise_on_error: bool = False) -> Optional[Dict]:
     """
-    미체결 주문 내역 조회
+    미체결 주문 내역 조회 (연속조회 키를 따라 마지막 페이지까지 모두 읽음)
     
     Args:
         token: 접근 토큰
@@ -39,11 +58,14 @@ def get_pending_orders(token: str,
         cano: 계좌번호
         acnt_prdt_cd: 계좌상품코드
         url_base: API 베이스 URL
+        verbose: 화면 출력 여부 (기본값: True)
+        raise_on_error: 조회 실패 시 None 대신 RuntimeError (미체결 없음과 구분해야 할 때)
         
     Returns:
-        미체결 주문 정보 딕셔너리 또는 None
+        미체결 주문 정보 딕셔너리 (output은 전체 페이지를 합친 목록) 또는 None
     """
-    print("\n🔍 미체결 주문 조회를 시작합니다...")
+    log = print if verbose else _quiet
+    log("\n🔍 미체결 주문 조회를 시작합니다...")
     
     PATH = "/uapi/domestic-stock/v1/trading/inquire-psbl-rvsecncl"
     URL = url_base + PATH
@@ -66,41 +88,156 @@ def get_pending_orders(token: str,
     }
     
     try:
-        res = requests.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
-        response_data = res.json()
+        orders = []
+        for _ in range(MAX_PENDING_PAGES):
+            res = kis_http.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
+            response_data = res.json()
+            
+            log(f"📡 응답 상태: {res.status_code}")
+            
+            if res.status_code != 200 or response_data.get('rt_cd') != '0':
+                error_msg = response_data.get('msg1', 'API 오류')
+                log(f"❌ [미체결 주문 조회 실패]: {error_msg}")
+                if raise_on_error:
+                    raise RuntimeError(error_msg)
+                return None
+            
+            orders += response_data.get('output') or []
+            
+            # 연속조회: tr_cont가 F/M이면 다음 페이지가 있음 (응답의 ctx_area 키를 그대로 넘김)
+            if res.headers.get('tr_cont') not in ('F', 'M'):
+                break
+            HEADERS["tr_cont"] = "N"
+            PARAMS["CTX_AREA_FK100"] = response_data.get('ctx_area_fk100', '')
+            PARAMS["CTX_AREA_NK100"] = response_data.get('ctx_area_nk100', '')
+        else:
+            error_msg = f"연속조회가 {MAX_PENDING_PAGES}페이지를 넘음"
+            log(f"❌ [미체결 주문 조회 실패]: {error_msg}")
+            if raise_on_error:
+                raise RuntimeError(error_msg)
+            return None
         
-        print(f"📡 응답 상태: {res.status_code}")
+        log("✅ [미체결 주문 조회 성공]")
+        log("=" * 60)
         
-        if res.status_code == 200 and response_data.get('rt_cd') == '0':
-            print("✅ [미체결 주문 조회 성공]")
-            print("=" * 60)
+        if orders:
+            response_data['output'] = orders
+            log(f"📋 [미체결 주문] {len(orders)}건\n")
+            
+            for i, order in enumerate(orders, 1):
+                log(f"   {i}. {order.get('prdt_name', 'N/A')}")
+                log(f"      주문번호: {order.get('odno', 'N/A')}")
+                log(f"      주문구분: {order.get('sll_buy_dvsn_cd_name', 'N/A')}")
+                log(f"      주문가격: {int(order.get('ord_unpr', 0)):,}원")
+                log(f"      주문수량: {int(order.get('ord_qty', 0)):,}주")
+                log(f"      미체결수량: {int(order.get('rmn_qty', 0)):,}주")
+                log(f"      주문시각: {order.get('ord_tmd', 'N/A')}\n")
+            
+            log("=" * 60)
+            return response_data
+        else:
+            log("📋 미체결 주문이 없습니다.")
+            log("=" * 60)
+            return None
+    
+    except Exception as e:
+        log(f"❌ [미체결 주문 조회 오류]: {e}")
+        if raise_on_error:
+            raise
+        return None
+
+
+def get_daily_executions(token: str,
+                        app_key: str,
+                        app_secret: str,
+                        cano: str,
+                        acnt_prdt_cd: str,
+                        url_base: str,
+                        date: Optional[str] = None,
+                        verbose: bool = True,
+                        raise_on_error: bool = False) -> Optional[List[Dict]]:
+    """
+    당일(또는 date=YYYYMMDD) 주문체결 조회 (연속조회 키를 따라 마지막 페이지까지 모두 읽음)
+    
+    Args:
+        token: 접근 토큰
+        app_key: API 앱 키
+        app_secret: API 앱 시크릿
+        cano: 계좌번호
+        acnt_prdt_cd: 계좌상품코드
+        url_base: API 베이스 URL
+        date: 조회일 (YYYYMMDD, 기본값: 오늘 KST)
+        verbose: 화면 출력 여부 (기본값: True)
+        raise_on_error: 조회 실패 시 None 대신 RuntimeError
+        
+    Returns:
+        주문별 목록 (odno, pdno, sll_buy_dvsn_cd, ord_qty, tot_ccld_qty, tot_ccld_amt, avg_prvs ...) 또는 None
+    """
+    log = print if verbose else _quiet
+    date = date or datetime.now(KST).strftime("%Y%m%d")
+    
+    PATH = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
+    URL = url_base + PATH
+    
+    HEADERS = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {token}",
+        "appkey": app_key,
+        "appsecret": app_secret,
+        "tr_id": "TTTC8001R"  # 주식일별주문체결조회 (3개월 이내) TR_ID
+    }
+    
+    PARAMS = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "INQR_STRT_DT": date,
+        "INQR_END_DT": date,
+        "SLL_BUY_DVSN_CD": "00",  # 매도매수구분 (00:전체)
+        "INQR_DVSN": "00",        # 조회구분 (00:역순)
+        "PDNO": "",
+        "CCLD_DVSN": "00",        # 체결구분 (00:전체 - 부분체결 주문 포함)
+        "ORD_GNO_BRNO": "",
+        "ODNO": "",
+        "INQR_DVSN_3": "00",
+        "INQR_DVSN_1": "",
+        "CTX_AREA_FK100": "",
+        "CTX_AREA_NK100": ""
+    }
+    
+    try:
+        executions = []
+        for _ in range(MAX_PENDING_PAGES):
+            res = kis_http.get(URL, headers=HEADERS, params=PARAMS, timeout=10)
+            response_data = res.json()
             
-            if response_data.get('output') and len(response_data['output']) > 0:
-                orders = response_data['output']
-                print(f"📋 [미체결 주문] {len(orders)}건\n")
-                
-                for i, order in enumerate(orders, 1):
-                    print(f"   {i}. {order.get('prdt_name', 'N/A')}")
-                    print(f"      주문번호: {order.get('odno', 'N/A')}")
-                    print(f"      주문구분: {order.get('sll_buy_dvsn_cd_name', 'N/A')}")
-                    print(f"      주문가격: {int(order.get('ord_unpr', 0)):,}원")
-                    print(f"      주문수량: {int(order.get('ord_qty', 0)):,}주")
-                    print(f"      미체결수량: {int(order.get('rmn_qty', 0)):,}주")
-                    print(f"      주문시각: {order.get('ord_tmd', 'N/A')}\n")
-                
-                print("=" * 60)
-                return response_data
-            else:
-                print("📋 미체결 주문이 없습니다.")
-                print("=" * 60)
+            if res.status_code != 200 or response_data.get('rt_cd') != '0':
+                error_msg = response_data.get('msg1', 'API 오류')
+                log(f"❌ [주문체결 조회 실패]: {error_msg}")
+                if raise_on_error:
+                    raise RuntimeError(error_msg)
                 return None
+            
+            executions += response_data.get('output1') or []
+            
+            if res.headers.get('tr_cont') not in ('F', 'M'):
+                break
+            HEADERS["tr_cont"] = "N"
+            PARAMS["CTX_AREA_FK100"] = response_data.get('ctx_area_fk100', '')
+            PARAMS["CTX_AREA_NK100"] = response_data.get('ctx_area_nk100', '')
         else:
-            error_msg = response_data.get('msg1', 'API 오류')
-            print(f"❌ [미체결 주문 조회 실패]: {error_msg}")
+            error_msg = f"연속조회가 {MAX_PENDING_PAGES}페이지를 넘음"
+            log(f"❌ [주문체결 조회 실패]: {error_msg}")
+            if raise_on_error:
+                raise RuntimeError(error_msg)
             return None
+        
+        log(f"✅ [주문체결 조회 성공] {date} 주문 {len(executions)}건")
+        return executions
     
     except Exception as e:
-        print(f"❌ [미체결 주문 조회 오류]: {e}")
+        log(f"❌ [주문체결 조회 오류]: {e}")
+        if raise_on_error:
+            raise
         return None
 
 
@@ -112,9 +249,12 @@ def cancel_order(token: str,
                 url_base: str,
                 order_no: str,
                 order_qty: str,
-                order_price: str) -> bool:
+                order_price: str,
+                verbose: bool = True,
+                code: Optional[str] = None,
+                all_qty: bool = True) -> bool:
     """
-    특정 미체결 주문 취소
+    특정 미체결 주문 취소 (all_qty=False 이면 order_qty만큼 일부 취소)
     
     Args:
         token: 접근 토큰
@@ -124,13 +264,17 @@ def cancel_order(token: str,
         acnt_prdt_cd: 계좌상품코드
         url_base: API 베이스 URL
         order_no: 원주문번호
-        order_qty: 주문수량
+        order_qty: 주문수량 (all_qty=False 일 때 취소할 수량)
         order_price: 주문가격
+        verbose: 화면 출력 여부 (기본값: True)
+        code: 종목코드 (체결 품질 기록 시 호가 조인용, 선택)
+        all_qty: 잔량 전부 취소 여부 (기본값: True)
         
     Returns:
         성공 시 True, 실패 시 False
     """
-    print(f"\n🔄 주문번호 {order_no} 취소를 시도합니다...")
+    log = print if verbose else _quiet
+    log(f"\n🔄 주문번호 {order_no} 취소를 시도합니다...")
     
     PATH = "/uapi/domestic-stock/v1/trading/order-rvsecncl"
     URL = url_base + PATH
@@ -152,28 +296,200 @@ def cancel_order(token: str,
         "RVSE_CNCL_DVSN_CD": "02", # 정정취소구분 (02:취소)
         "ORD_QTY": str(order_qty), # 주문수량
         "ORD_UNPR": str(order_price), # 주문단가
-        "QTY_ALL_ORD_YN": "Y"      # 잔량전부주문여부
+        "QTY_ALL_ORD_YN": "Y" if all_qty else "N"  # 잔량전부주문여부
     }
     
+    # 취소 요청/응답 시각을 체결 품질 기록에 남김 (execution_tracker.py)
+    key = execution_tracker.record("cancel", odno=order_no, code=code)
+    
     try:
-        res = requests.post(URL, headers=HEADERS, data=json.dumps(BODY), timeout=10)
+        res = kis_http.post(URL, headers=HEADERS, data=json.dumps(BODY), timeout=10)
         response_data = res.json()
         
-        print(f"📡 응답 상태: {res.status_code}")
+        log(f"📡 응답 상태: {res.status_code}")
         
         if res.status_code == 200 and response_data.get('rt_cd') == '0':
-            print(f"✅ [주문 취소 성공] 주문번호: {order_no}")
+            execution_tracker.record("cancel_ack", key)
+            log(f"✅ [주문 취소 성공] 주문번호: {order_no}")
             return True
         else:
             error_msg = response_data.get('msg1', 'API 오류')
-            print(f"❌ [주문 취소 실패]: {error_msg}")
+            execution_tracker.record("cancel_reject", key, note=error_msg)
+            log(f"❌ [주문 취소 실패]: {error_msg}")
             return False
     
     except Exception as e:
-        print(f"❌ [주문 취소 오류]: {e}")
+        execution_tracker.record("cancel_reject", key, note=str(e))
+        log(f"❌ [주문 취소 오류]: {e}")
         return False
 
 
+def amend_order(token: str,
+               app_key: str,
+               app_secret: str,
+               cano: str,
+               acnt_prdt_cd: str,
+               url_base: str,
+               order_no: str,
+               order_qty: str,
+               order_price: str,
+               all_qty: bool = True,
+               verbose: bool = True,
+               code: Optional[str] = None) -> Optional[str]:
+    """
+    미체결 주문 정정 (가격/수량 변경)
+    
+    Args:
+        token: 접근 토큰
+        app_key: API 앱 키
+        app_secret: API 앱 시크릿
+        cano: 계좌번호
+        acnt_prdt_cd: 계좌상품코드
+        url_base: API 베이스 URL
+        order_no: 원주문번호
+        order_qty: 정정수량 (all_qty=False 일 때만 사용, 잔량보다 클 수 없음)
+        order_price: 정정가격
+        all_qty: 잔량 전부 정정 여부 (기본값: True)
+        verbose: 화면 출력 여부 (기본값: True)
+        code: 종목코드 (체결 품질 기록 시 호가 조인용, 선택)
+        
+    Returns:
+        성공 시 정정 주문의 새 주문번호, 실패 시 None
+    """
+    log = print if verbose else _quiet
+    log(f"\n✏️ 주문번호 {order_no} 정정을 시도합니다... ({int(order_price):,}원)")
+    
+    PATH = "/uapi/domestic-stock/v1/trading/order-rvsecncl"
+    URL = url_base + PATH
+    
+    HEADERS = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {token}",
+        "appkey": app_key,
+        "appsecret": app_secret,
+        "tr_id": "TTTC0803U"  # 주문 정정/취소 TR_ID
+    }
+    
+    BODY = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "KRX_FWDG_ORD_ORGNO": "",  # 원주문조직번호
+        "ORGN_ODNO": order_no,     # 원주문번호
+        "ORD_DVSN": "00",          # 주문구분 (00:지정가)
+        "RVSE_CNCL_DVSN_CD": "01", # 정정취소구분 (01:정정)
+        "ORD_QTY": "0" if all_qty else str(order_qty), # 주문수량 (잔량전부면 0)
+        "ORD_UNPR": str(order_price), # 정정단가
+        "QTY_ALL_ORD_YN": "Y" if all_qty else "N"  # 잔량전부주문여부
+    }
+    
+    # 정정 주문은 새 주문번호를 받지만 같은 주문으로 묶어서 기록 (execution_tracker.py)
+    key = execution_tracker.record("amend", odno=order_no, code=code, price=int(order_price),
+                                   qty=None if all_qty else int(order_qty))
+    
+    try:
+        res = kis_http.post(URL, headers=HEADERS, data=json.dumps(BODY), timeout=10)
+        response_data = res.json()
+        
+        log(f"📡 응답 상태: {res.status_code}")
+        
+        if res.status_code == 200 and response_data.get('rt_cd') == '0':
+            new_order_no = (response_data.get('output') or {}).get('ODNO', order_no)
+            execution_tracker.record("amend_ack", key, odno=new_order_no)
+            log(f"✅ [주문 정정 성공] 주문번호: {order_no} → {new_order_no}")
+            return new_order_no
+        else:
+            error_msg = response_data.get('msg1', 'API 오류')
+            execution_tracker.record("amend_reject", key, note=error_msg)
+            log(f"❌ [주문 정정 실패]: {error_msg}")
+            return None
+    
+    except Exception as e:
+        execution_tracker.record("amend_reject", key, note=str(e))
+        log(f"❌ [주문 정정 오류]: {e}")
+        return None
+
+
+def place_order(token: str,
+               app_key: str,
+               app_secret: str,
+               cano: str,
+               acnt_prdt_cd: str,
+               url_base: str,
+               code: str,
+               side: str,
+               order_qty: int,
+               order_price: int,
+               verbose: bool = True,
+               key: Optional[str] = None) -> Optional[str]:
+    """
+    지정가 신규 주문 (현금)
+    
+    Args:
+        token: 접근 토큰
+        app_key: API 앱 키
+        app_secret: API 앱 시크릿
+        cano: 계좌번호
+        acnt_prdt_cd: 계좌상품코드
+        url_base: API 베이스 URL
+        code: 종목코드
+        side: "buy" 또는 "sell"
+        order_qty: 주문수량
+        order_price: 주문단가
+        verbose: 화면 출력 여부 (기본값: True)
+        key: 체결 품질 기록의 주문 키 (시그널 단계를 이미 기록했으면 전달, 선택)
+        
+    Returns:
+        성공 시 주문번호, 실패 시 None
+    """
+    log = print if verbose else _quiet
+    side_name = "매수" if side == "buy" else "매도"
+    log(f"\n📝 {code} {side_name} 주문: {int(order_price):,}원 x {int(order_qty):,}주")
+    
+    PATH = "/uapi/domestic-stock/v1/trading/order-cash"
+    URL = url_base + PATH
+    
+    HEADERS = {
+        "Content-Type": "application/json",
+        "authorization": f"Bearer {token}",
+        "appkey": app_key,
+        "appsecret": app_secret,
+        "tr_id": "TTTC0802U" if side == "buy" else "TTTC0801U"  # 현금 매수 / 현금 매도 TR_ID
+    }
+    
+    BODY = {
+        "CANO": cano,
+        "ACNT_PRDT_CD": acnt_prdt_cd,
+        "PDNO": code,              # 종목코드
+        "ORD_DVSN": "00",          # 주문구분 (00:지정가)
+        "ORD_QTY": str(order_qty), # 주문수량
+        "ORD_UNPR": str(order_price) # 주문단가
+    }
+    
+    key = execution_tracker.record("send", key, code=code, side=side, qty=int(order_qty), price=int(order_price))
+    
+    try:
+        res = kis_http.post(URL, headers=HEADERS, data=json.dumps(BODY), timeout=10)
+        response_data = res.json()
+        
+        log(f"📡 응답 상태: {res.status_code}")
+        
+        if res.status_code == 200 and response_data.get('rt_cd') == '0':
+            order_no = (response_data.get('output') or {}).get('ODNO')
+            execution_tracker.record("ack", key, odno=order_no)
+            log(f"✅ [주문 성공] 주문번호: {order_no}")
+            return order_no
+        else:
+            error_msg = response_data.get('msg1', 'API 오류')
+            execution_tracker.record("reject", key, note=error_msg)
+            log(f"❌ [주문 실패]: {error_msg}")
+            return None
+    
+    except Exception as e:
+        execution_tracker.record("reject", key, note=str(e))
+        log(f"❌ [주문 오류]: {e}")
+        return None
+
+
 def cancel_all_orders(token: str,
                      app_key: str,
                      app_secret: str,
@@ -222,7 +538,7 @@ def cancel_all_orders(token: str,
         order_price = order.get('ord_unpr')
         
         success = cancel_order(token, app_key, app_secret, cano, acnt_prdt_cd, 
-                              url_base, order_no, order_qty, order_price)
+                              url_base, order_no, order_qty, order_price, code=order.get('pdno'))
         
         if success:
             cancelled_count += 1
@@ -263,15 +579,38 @@ if __name__ == "__main__":
     주문 관리 전용 실행 파일
     미체결 주문 조회 및 취소 작업을 수행합니다.
     """
-    from token_manage import get_token_for_api
-    import key
+    import argparse
+    import profiler
+    from accounts import load_accounts, cancel_all_accounts
+    
+    parser = argparse.ArgumentParser(description="미체결 주문 관리")
+    parser.add_argument("--all", action="store_true", help="accounts.json의 모든 계좌를 동시에 처리")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args, "remove_order")
+    
+    accounts = load_accounts()
+    
+    if args.all:
+        print("🚀 한국투자증권 주문 관리 프로그램 (전체 계좌)")
+        with profiler.iteration("cancel_all_accounts"):
+            cancelled_count = cancel_all_accounts(accounts, confirm=True)
+        print(f"\n🎉 주문 관리 작업이 완료되었습니다.")
+        print(f"✅ {cancelled_count}건의 주문이 처리되었습니다.")
+        exit(0)
+    
+    # 미체결 주문 조회 및 취소 (등록부의 첫 번째 계좌, 계좌별 앱키가 있으면 그 앱키/토큰 파일 사용)
+    account = accounts[0]
+    CANO = account.cano
+    ACNT_PRDT_CD = account.acnt_prdt_cd
+    APP_KEY, APP_SECRET, URL_BASE = account.credentials()
     
     print("🚀 한국투자증권 주문 관리 프로그램")
-    print(f"📁 토큰 파일: {key.TOKEN_FILE}")
-    print(f"👤 계좌번호: 43407510-01")
+    print(f"📁 토큰 파일: {account.token_file}")
+    print(f"👤 계좌번호: {CANO}-{ACNT_PRDT_CD}")
     
     # 토큰 발급
-    final_token = get_token_for_api(key.APP_KEY, key.APP_SECRET, key.URL_BASE)
+    final_token = account.token()
     
     if not final_token:
         print("💥 토큰 발급 실패. 프로그램을 종료합니다.")
@@ -279,19 +618,16 @@ if __name__ == "__main__":
     
     print(f"🔑 토큰 획득 성공: {final_token[:30]}...")
     
-    # 미체결 주문 조회 및 취소
-    CANO = "43407510"
-    ACNT_PRDT_CD = "01"
-    
-    cancelled_count = cancel_all_orders(
-        final_token,
-        key.APP_KEY,
-        key.APP_SECRET,
-        CANO,
-        ACNT_PRDT_CD,
-        key.URL_BASE,
-        confirm=True
-    )
+    with profiler.iteration("cancel_all_orders"):
+        cancelled_count = cancel_all_orders(
+            final_token,
+            APP_KEY,
+            APP_SECRET,
+            CANO,
+            ACNT_PRDT_CD,
+            URL_BASE,
+            confirm=True
+        )
     
     print(f"\n🎉 주문 관리 작업이 완료되었습니다.")
     print(f"✅ {cancelled_count}건의 주문이 처리되었습니다.")
@@ -2,6 +2,7 @@ import os
 import sqlite3
 
 DB_FILE = "trading.db"
+JOURNAL_FILE = "ticks.journal"  # tick_journal.py 저널 (남아 있으면 다음 수집 시 복구되므로 같이 삭제)
 
 def reset_database():
     print("=" * 40)
@@ -27,6 +28,10 @@ def reset_database():
     else:
         print(f"\nℹ️ {DB_FILE} 파일이 이미 없습니다.")
 
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
+        print(f"🗑️ 틱 저널 {JOURNAL_FILE} 파일도 삭제했습니다.")
+
     # 3. 새로운 빈 테이블 생성 (호가 컬럼 포함)
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
@@ -34,15 +39,17 @@ def reset_database():
     # 최신 스펙(호가 포함)으로 테이블 생성
     query = """
     CREATE TABLE IF NOT EXISTS price_log (
-        timestamp TEXT PRIMARY KEY,
+        timestamp TEXT,
         code TEXT,
         price INTEGER,
         volume INTEGER,
         total_ask_qty INTEGER, 
-        total_bid_qty INTEGER
+        total_bid_qty INTEGER,
+        PRIMARY KEY (code, timestamp)
     )
     """
     cursor.execute(query)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_log_ts ON price_log (timestamp)")
     conn.commit()
     conn.close()
     
@@ -0,0 +1,327 @@
+"""
+risk_gate.py: 주문 전 리스크 점검 (메모리 캐시 기반, 주문 1건 점검 수 µs)
+- 잔고/미체결은 백그라운드 스레드가 주기적으로 API에서 새로 받아 불변(immutable) 스냅샷으로 교체
+- check()는 메모리 스냅샷만 보고 판단 → 주문 경로에서 API 호출 없음
+- 규칙: 1회 주문 한도(총평가의 6%), 종목별 최대 비중, 종목별 최대 미체결 수, 주문가능 현금(D+2 예수금), 일일 손실 한도
+- 일일 손실 기준점은 전일 총자산(bfdy_tot_asst_evlu_amt) - 장중 재시작해도 기준점이 그날의 손실만큼 내려가지 않음
+  (응답에 없으면 그날 처음 본 총평가를 risk_baseline.json에 계좌/날짜별로 저장해서 재시작 후에도 사용)
+- 잔고/미체결 조회가 실패하면 스냅샷을 버리고 다음 갱신이 성공할 때까지 모든 주문 거부 (fail closed)
+- 스냅샷 갱신 사이에 보낸 주문은 record()로 반영해서 한도를 우회하지 못하게 함
+- 정정 주문은 check_amend()/record_amend(): 매수 금액이 늘어나는 정정만 늘어난 금액으로 점검
+- 취소한 주문은 record_cancel()로 미체결 수에서 뺌, 취소 후 재주문은 check(new, replaces=old)로 점검
+
+사용 예:
+    from accounts import default_account
+    from risk_gate import RiskGate, Order
+
+    gate = RiskGate(default_account())
+    gate.start()                       # 첫 갱신 후 백그라운드 갱신 시작
+    decision = gate.check(Order("069500", "buy", 10, 35000))
+    if decision.ok:
+        ...주문 전송...
+        gate.record(Order("069500", "buy", 10, 35000))
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+REFRESH_INTERVAL = 30    # 잔고/미체결 갱신 주기 (초)
+MAX_SNAPSHOT_AGE = 120   # 스냅샷이 이보다 오래되면 주문 거부 (초)
+BASELINE_FILE = "risk_baseline.json"   # 전일 총자산이 없을 때 쓰는 계좌/날짜별 손실 기준점
+KST = datetime.timezone(datetime.timedelta(hours=9))
+
+
+@dataclass(frozen=True)
+class RiskLimits:
+    max_order_pct: float = 0.06       # 1회 주문 금액 ≤ 총평가금액의 6% (check_acc.py 권장 규칙)
+    max_position_pct: float = 0.06    # 주문 후 종목 평가금액 ≤ 총평가금액의 6%
+    max_open_orders: int = 3          # 종목별 최대 미체결 주문 수
+    daily_loss_pct: float = 0.02      # 전일 총자산 대비 총평가 손실이 2% 이상이면 신규 매수 중단
+    max_snapshot_age: float = MAX_SNAPSHOT_AGE
+
+
+@dataclass(frozen=True)
+class Order:
+    code: str
+    side: str      # "buy" / "sell"
+    qty: int
+    price: int
+
+    @property
+    def amount(self) -> int:
+        return self.qty * self.price
+
+
+class Decision(NamedTuple):
+    ok: bool
+    reason: str = ""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """API에서 받은 시점의 계좌 상태 (교체만 하고 수정하지 않음)"""
+    refreshed_at: float
+    total_eval: int
+    cash: int      # 주문가능 현금: D+2 예수금 (앞서 산 주식의 결제 예정 금액을 뺀 값)
+    positions: Dict[str, Tuple[int, int]] = field(default_factory=dict)   # 종목: (보유수량, 평가금액)
+    open_orders: Dict[str, int] = field(default_factory=dict)             # 종목: 미체결 주문 수
+    prev_day_eval: int = 0   # 전일 총자산 평가금액 (일일 손실 기준점, 0이면 응답에 없음)
+
+
+def build_snapshot(balance: Dict, pending: List[Dict], refreshed_at: Optional[float] = None) -> Snapshot:
+    """잔고 조회(TTTC8434R) / 미체결 조회(TTTC8036R) 응답으로 스냅샷 생성"""
+    cash_info = (balance.get("output2") or [{}])[0]
+    positions = {}
+    for stock in balance.get("output1") or []:
+        qty = int(stock.get("hldg_qty", 0) or 0)
+        if qty > 0:
+            positions[stock.get("pdno")] = (qty, int(stock.get("evlu_amt", 0) or 0))
+
+    open_orders: Dict[str, int] = {}
+    for order in pending:
+        code = order.get("pdno")
+        open_orders[code] = open_orders.get(code, 0) + 1
+
+    # dnca_tot_amt(예수금 총액)는 결제 전 매수 대금이 빠지지 않아 주문 가능 금액보다 큼 → D+2 예수금 사용
+    cash = cash_info.get("prvs_rcdl_excc_amt", cash_info.get("dnca_tot_amt", 0))
+    return Snapshot(refreshed_at or time.time(), int(cash_info.get("tot_evlu_amt", 0) or 0),
+                    int(cash or 0), positions, open_orders,
+                    int(cash_info.get("bfdy_tot_asst_evlu_amt", 0) or 0))
+
+
+def _baseline(key: str, day: str, total_eval: int, path: str = BASELINE_FILE) -> int:
+    """계좌/날짜별 손실 기준점 (처음 부르면 total_eval 저장, 이후 같은 날에는 저장된 값)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    value = saved.get(key, {}).get(day)
+    if value is not None:
+        return value
+    saved[key] = {day: total_eval}   # 지난 날짜는 버림
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    os.replace(tmp, path)
+    return total_eval
+
+
+class RiskGate:
+    def __init__(self, account=None, limits: RiskLimits = RiskLimits(), refresh_interval: float = REFRESH_INTERVAL,
+                 baseline_file: Optional[str] = BASELINE_FILE):
+        self.account = account
+        self.baseline_file = baseline_file   # None이면 저장하지 않음 (전일 총자산이 없으면 그날 첫 스냅샷)
+        self.limits = limits
+        self.refresh_interval = refresh_interval
+        self.snapshot: Optional[Snapshot] = None
+        self.day_start_eval: Optional[int] = None
+        self.last_error: Optional[str] = None        # 마지막 갱신 실패 사유 (성공하면 None)
+        self._day: Optional[datetime.date] = None
+        self._sent: List[Tuple[float, Order]] = []   # 마지막 스냅샷 이후 보낸 주문 (전송 시각, 주문)
+        self._amended: List[Tuple[float, str, int]] = []   # 마지막 스냅샷 이후 정정으로 늘어난 매수 금액 (시각, 종목, 금액)
+        self._cancelled: List[Tuple[float, Order]] = []     # 마지막 스냅샷 이후 취소한 주문 (취소 시각, 주문)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------------------------------------
+    # 1. 스냅샷 갱신 (백그라운드)
+    # -----------------------------------------------------------
+    def apply(self, snapshot: Snapshot, fetch_started: Optional[float] = None) -> None:
+        """새 스냅샷으로 교체. fetch_started 이후에 보낸 주문은 아직 반영 안 됐을 수 있어 유지"""
+        fetch_started = snapshot.refreshed_at if fetch_started is None else fetch_started
+        today = datetime.datetime.fromtimestamp(snapshot.refreshed_at, KST).date()
+        with self._lock:
+            if self._day != today:
+                self._day = today
+                self.day_start_eval = self._day_start(today, snapshot)
+            self._sent = [(t, o) for t, o in self._sent if t >= fetch_started]
+            self._amended = [item for item in self._amended if item[0] >= fetch_started]
+            self._cancelled = [(t, o) for t, o in self._cancelled if t >= fetch_started]
+            self.snapshot = snapshot
+            self.last_error = None
+
+    def _day_start(self, day: datetime.date, snapshot: Snapshot) -> int:
+        """손실 기준점: 전일 총자산 → 없으면 저장해 둔 그날 첫 총평가 (재시작해도 유지)"""
+        if snapshot.prev_day_eval > 0:
+            return snapshot.prev_day_eval
+        if self.baseline_file is None:
+            return snapshot.total_eval
+        key = self.account.label if self.account is not None else "default"
+        try:
+            return _baseline(key, day.isoformat(), snapshot.total_eval, self.baseline_file)
+        except OSError as e:
+            print(f"⚠️ [리스크] 손실 기준점 저장 실패: {e}")
+            return snapshot.total_eval
+
+    def refresh(self) -> bool:
+        from accounts import fetch_balance, fetch_pending
+
+        started = time.time()
+        try:
+            balance = fetch_balance(self.account)
+            pending = fetch_pending(self.account)
+        except Exception as e:
+            # 미체결을 모르면 미체결 수 한도를 볼 수 없음 → 예전 스냅샷으로 통과시키지 않고 버림
+            print(f"⚠️ [리스크] 잔고 갱신 실패 (주문 거부): {e}")
+            with self._lock:
+                self.snapshot = None
+                self.last_error = str(e)
+            return False
+        self.apply(build_snapshot(balance, pending), fetch_started=started)
+        return True
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self) -> bool:
+        """첫 스냅샷을 받은 뒤 백그라운드 갱신 스레드 시작"""
+        ok = self.refresh()
+        self._thread = threading.Thread(target=self._refresh_loop, name="risk-refresh", daemon=True)
+        self._thread.start()
+        return ok
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # -----------------------------------------------------------
+    # 2. 주문 점검 (메모리만 사용)
+    # -----------------------------------------------------------
+    def record(self, order: Order) -> None:
+        """전송한 주문을 다음 스냅샷 전까지 노출/미체결 계산에 반영"""
+        with self._lock:
+            self._sent.append((time.time(), order))
+
+    def record_amend(self, old: Order, new: Order) -> None:
+        """전송한 정정 주문으로 늘어난 매수 금액을 다음 스냅샷 전까지 반영 (미체결 수는 그대로)"""
+        added = new.amount - old.amount
+        if new.side == "buy" and added > 0:
+            with self._lock:
+                self._amended.append((time.time(), new.code, added))
+
+    def record_cancel(self, order: Order) -> None:
+        """취소한 주문을 다음 스냅샷 전까지 미체결 수에서 뺌 (예수금/비중은 보수적으로 그대로 둠)"""
+        with self._lock:
+            self._cancelled.append((time.time(), order))
+
+    def _state(self, code: str):
+        with self._lock:
+            sent = [o for _, o in self._sent if o.code == code]
+            cancelled = sum(1 for _, o in self._cancelled if o.code == code)
+            pending_buy = sum(o.amount for o in sent if o.side == "buy") \
+                + sum(added for _, c, added in self._amended if c == code)
+            all_pending_buy = sum(o.amount for _, o in self._sent if o.side == "buy") \
+                + sum(added for _, _, added in self._amended)
+            return self.snapshot, self.day_start_eval, sent, cancelled, pending_buy, all_pending_buy
+
+    def _check_snapshot(self, snap: Optional[Snapshot], now: Optional[float]) -> Optional[Decision]:
+        if snap is None:
+            return Decision(False, f"잔고 갱신 실패: {self.last_error}" if self.last_error else "잔고 스냅샷 없음")
+        if (now or time.time()) - snap.refreshed_at > self.limits.max_snapshot_age:
+            return Decision(False, "잔고 스냅샷이 오래됨")
+        return None
+
+    def _check_buy(self, snap: Snapshot, day_start_eval: Optional[int], code: str, amount: int, added: int,
+                   pending_buy: int, all_pending_buy: int) -> Decision:
+        """amount: 주문(정정 후) 금액, added: 이번에 새로 늘어나는 매수 금액 (신규 주문이면 amount와 같음)"""
+        limits = self.limits
+        if day_start_eval and limits.daily_loss_pct:
+            loss = day_start_eval - snap.total_eval
+            if loss >= day_start_eval * limits.daily_loss_pct:
+                return Decision(False, f"일일 손실 한도 도달 ({loss:,}원)")
+
+        if amount > snap.total_eval * limits.max_order_pct:
+            return Decision(False, f"1회 주문 한도 초과 ({amount:,}원 > 총평가의 {limits.max_order_pct:.0%})")
+
+        _, eval_amt = snap.positions.get(code, (0, 0))
+        exposure = eval_amt + pending_buy + added
+        if exposure > snap.total_eval * limits.max_position_pct:
+            return Decision(False, f"종목 비중 한도 초과 ({exposure:,}원 > 총평가의 {limits.max_position_pct:.0%})")
+
+        if added + all_pending_buy > snap.cash:
+            return Decision(False, f"주문가능 현금 부족 ({snap.cash:,}원)")
+        return Decision(True)
+
+    def check(self, order: Order, now: Optional[float] = None, replaces: Optional[Order] = None) -> Decision:
+        """replaces: 이 주문을 내기 전에 취소할 같은 종목/방향의 기존 미체결 (취소 후 재주문 - 미체결 수는 그대로)"""
+        limits = self.limits
+        snap, day_start_eval, sent, cancelled, pending_buy, all_pending_buy = self._state(order.code)
+
+        stale = self._check_snapshot(snap, now)
+        if stale is not None:
+            return stale
+        if order.qty <= 0 or order.price <= 0:
+            return Decision(False, "수량/가격 오류")
+
+        open_orders = snap.open_orders.get(order.code, 0) + len(sent) - cancelled - (replaces is not None)
+        if open_orders >= limits.max_open_orders:
+            return Decision(False, f"미체결 {open_orders}건 (한도 {limits.max_open_orders}건)")
+
+        if order.side == "sell":
+            qty, _ = snap.positions.get(order.code, (0, 0))
+            pending_sell_qty = sum(o.qty for o in sent if o.side == "sell")
+            if order.qty > qty - pending_sell_qty:
+                return Decision(False, f"매도 가능 수량 초과 (보유 {qty}주)")
+            return Decision(True)
+
+        # 이하 매수 점검 (재주문이면 기존 주문보다 늘어나는 금액만 새로 필요)
+        added = order.amount - (replaces.amount if replaces is not None else 0)
+        return self._check_buy(snap, day_start_eval, order.code, order.amount, max(added, 0),
+                               pending_buy, all_pending_buy)
+
+    def check_amend(self, old: Order, new: Order, now: Optional[float] = None) -> Decision:
+        """
+        정정 점검: 이미 미체결에 잡힌 주문이라 미체결 수는 보지 않고,
+        매수 금액이 늘어나는 정정만 늘어난 금액으로 매수 규칙 점검 (매도/금액 감소 정정은 통과)
+        """
+        added = new.amount - old.amount
+        if new.side != "buy" or added <= 0:
+            return Decision(True)
+        snap, day_start_eval, _, _, pending_buy, all_pending_buy = self._state(new.code)
+
+        stale = self._check_snapshot(snap, now)
+        if stale is not None:
+            return stale
+        if new.qty <= 0 or new.price <= 0:
+            return Decision(False, "수량/가격 오류")
+        return self._check_buy(snap, day_start_eval, new.code, new.amount, added, pending_buy, all_pending_buy)
+
+
+if __name__ == "__main__":
+    import argparse
+    from accounts import default_account
+
+    parser = argparse.ArgumentParser(description="주문 전 리스크 점검")
+    parser.add_argument("code", help="종목코드")
+    parser.add_argument("side", choices=["buy", "sell"])
+    parser.add_argument("qty", type=int)
+    parser.add_argument("price", type=int)
+    args = parser.parse_args()
+
+    gate = RiskGate(default_account())
+    if not gate.refresh():
+        exit()
+
+    order = Order(args.code, args.side, args.qty, args.price)
+    runs = 10000
+    start = time.perf_counter()
+    for _ in range(runs):
+        decision = gate.check(order)
+    elapsed_us = (time.perf_counter() - start) / runs * 1e6
+
+    snap = gate.snapshot
+    print(f"💼 총평가 {snap.total_eval:,}원 | 주문가능 {snap.cash:,}원 | 손실 기준 {gate.day_start_eval:,}원 | "
+          f"보유 {len(snap.positions)}종목")
+    if decision.ok:
+        print(f"✅ 주문 가능: {args.code} {args.side} {args.qty}주 x {args.price:,}원 (점검 {elapsed_us:.1f}µs)")
+    else:
+        print(f"❌ 주문 거부: {decision.reason} (점검 {elapsed_us:.1f}µs)")
@@ -1,10 +1,16 @@
-import requests
+import kis_http
+import circuit_breaker
 import json
 import time
 import sqlite3
 import datetime
 from token_manage import get_token_for_api
-import key
+from tick_journal import TickJournal, replay_journal, format_ts, JOURNAL_FILE, JOURNAL_MAX_BYTES
+from delta_store import DeltaWriter
+from scheduler import FixedRateScheduler
+from orderbook import init_orderbook_table, parse_depth, save_orderbook, MAX_BOOK_AGE_MS
+from multi_quote import fetch_quotes
+import profiler
 
 # =========================================================
 # --- 설정 ---
@@ -15,19 +21,21 @@ DB_FILE = "trading.db"
 # =========================================================
 # --- 1. DB 준비 (호가 정보 컬럼 추가) ---
 # =========================================================
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
+def init_db(db_file=None):
+    db_file = db_file or DB_FILE
+    conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
     
     # total_ask: 총 매도 잔량, total_bid: 총 매수 잔량
     query = """
     CREATE TABLE IF NOT EXISTS price_log (
-        timestamp TEXT PRIMARY KEY,
+        timestamp TEXT,
         code TEXT,
         price INTEGER,
         volume INTEGER,
         total_ask_qty INTEGER, 
-        total_bid_qty INTEGER
+        total_bid_qty INTEGER,
+        PRIMARY KEY (code, timestamp)
     )
     """
     cursor.execute(query)
@@ -39,14 +47,47 @@ def init_db():
     except:
         pass # 이미 컬럼이 있으면 무시
 
+    migrate_price_log(cursor)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_log_ts ON price_log (timestamp)")
+
     conn.commit()
     conn.close()
-    print(f"📁 [DB] {DB_FILE} (호가 포함) 준비 완료.")
+    print(f"📁 [DB] {db_file} (호가 포함) 준비 완료.")
+
+def migrate_price_log(cursor):
+    """
+    예전 스키마(timestamp 단독 PK)를 (code, timestamp) 복합 PK로 재구성
+    - 여러 종목이 같은 초에 저장될 때 서로 덮어쓰지 않도록 함
+    """
+    pk_columns = [row[1] for row in cursor.execute("PRAGMA table_info(price_log)") if row[5] > 0]
+    if pk_columns != ["timestamp"]:
+        return
+
+    print("🔧 [DB] price_log 기본키를 (code, timestamp)로 변경합니다...")
+    cursor.execute("ALTER TABLE price_log RENAME TO price_log_old")
+    cursor.execute("""
+    CREATE TABLE price_log (
+        timestamp TEXT,
+        code TEXT,
+        price INTEGER,
+        volume INTEGER,
+        total_ask_qty INTEGER, 
+        total_bid_qty INTEGER,
+        PRIMARY KEY (code, timestamp)
+    )
+    """)
+    cursor.execute("""
+    INSERT OR IGNORE INTO price_log
+    SELECT timestamp, code, price, volume, total_ask_qty, total_bid_qty FROM price_log_old
+    """)
+    cursor.execute("DROP TABLE price_log_old")
 
-def save_to_db(code, price, volume, ask_qty, bid_qty):
-    conn = sqlite3.connect(DB_FILE)
+def save_to_db(code, price, volume, ask_qty, bid_qty, ts=None, db_file=None):
+    conn = sqlite3.connect(db_file or DB_FILE)
     cursor = conn.cursor()
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # 틱 저널(tick_journal.py)이 내구성을 보장하므로 커밋마다 fsync 하지 않음
+    cursor.execute("PRAGMA synchronous=OFF")
+    now = ts or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     query = """
     INSERT OR REPLACE INTO price_log 
@@ -61,10 +102,72 @@ def save_to_db(code, price, volume, ask_qty, bid_qty):
     power_str = "매수우위🔥" if bid_qty > ask_qty else "매도우위💧"
     print(f"💾 {now} | {price}원 | {power_str} (매수잔량:{bid_qty} vs 매도잔량:{ask_qty})")
 
+def store_snapshot(journal, writer, code, price, volume, ask_qty, bid_qty, sampled_at=None, db_file=None):
+    """
+    저널에 먼저 기록한 뒤 저장 방식에 맞게 DB에 저장 (중간에 죽어도 재시작 시 복구)
+    writer가 None이면 price_log 전체 행 저장, DeltaWriter면 변경분만 델타 저장
+    sampled_at: 스케줄러 경계 시각 (timestamp로 사용, 없으면 수신 시각)
+    """
+    received = time.time()
+    sampled_at = sampled_at or received
+    journal.append(sampled_at, code, price, volume, ask_qty, bid_qty, received=received)
+
+    if writer is None:
+        save_to_db(code, price, volume, ask_qty, bid_qty, ts=format_ts(sampled_at), db_file=db_file)
+    elif writer.append(sampled_at, code, price, volume, ask_qty, bid_qty):
+        print(f"💾 {format_ts(sampled_at)} | {price}원 | Δ저장 (매수잔량:{bid_qty} vs 매도잔량:{ask_qty})")
+    else:
+        print(f"⏭️ {format_ts(sampled_at)} | {price}원 | 변동 없음 (저장 생략)")
+
+    if journal.size() > JOURNAL_MAX_BYTES:
+        journal.checkpoint(db_file or DB_FILE, writer)  # 저장에 실패한 틱이 있으면 재적재(델타면 flush 포함)한 뒤 비움
+
+def store_snapshots(journal, writer, rows, sampled_at=None, db_file=None):
+    """
+    여러 종목 스냅샷을 한 주기에 저장 (관심 종목 배치 수집용)
+    rows: [(code, price, volume, ask_qty, bid_qty), ...]
+    저널에 모두 먼저 기록한 뒤 price_log에는 연결 1개 / 트랜잭션 1번으로 저장 (종목마다 열고 커밋하지 않음)
+    """
+    if not rows:
+        return
+    received = time.time()
+    sampled_at = sampled_at or received
+    for row in rows:
+        journal.append(sampled_at, *row, received=received)
+
+    ts = format_ts(sampled_at)
+    if writer is None:
+        conn = sqlite3.connect(db_file or DB_FILE)
+        conn.execute("PRAGMA synchronous=OFF")  # 틱 저널이 내구성을 보장
+        with conn:
+            conn.executemany("""
+            INSERT OR REPLACE INTO price_log
+            (timestamp, code, price, volume, total_ask_qty, total_bid_qty)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, [(ts,) + tuple(row) for row in rows])
+        conn.close()
+        print(f"💾 {ts} | {len(rows)}종목 저장")
+    else:
+        stored = sum(writer.append(sampled_at, *row) for row in rows)
+        print(f"💾 {ts} | {len(rows)}종목 중 {stored}종목 Δ저장 (나머지 변동 없음)")
+
+    if journal.size() > JOURNAL_MAX_BYTES:
+        journal.checkpoint(db_file or DB_FILE, writer)
+
 # =========================================================
 # --- 2. 호가(Asking Price) 조회 API ---
 # =========================================================
-def get_hoga_data(token):
+def get_hoga_data(token, code=STOCK_CODE):
+    """(현재가, 거래량, 총매도잔량, 총매수잔량) - 실패 시 모두 None"""
+    return get_hoga_snapshot(token, code)[:4]
+
+def get_hoga_snapshot(token, code=STOCK_CODE):
+    """
+    get_hoga_data 결과 + 10단계 호가 (매도호가, 매수호가) - 같은 응답 1건에서 함께 꺼냄
+    실패 시 (None, None, None, None, None)
+    """
+    import key  # 인증 정보는 네트워크 조회에서만 필요 (저장 함수는 key.py 없이 사용 가능)
+
     # 호가 조회 URL (주식현재가 호가 예상체결)
     URL = f"{key.URL_BASE}/uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn"
     
@@ -78,11 +181,11 @@ def get_hoga_data(token):
     
     params = {
         "FID_COND_MRKT_DIV_CODE": "J",
-        "FID_INPUT_ISCD": STOCK_CODE
+        "FID_INPUT_ISCD": code
     }
     
     try:
-        res = requests.get(URL, headers=headers, params=params)
+        res = kis_http.get(URL, headers=headers, params=params)
         data = res.json()
         
         if res.status_code == 200 and data['rt_cd'] == '0':
@@ -96,36 +199,119 @@ def get_hoga_data(token):
             total_bid = int(out2['bid_acml_vol'])
             current_price = int(out2['stck_prpr'])
             # 거래량은 output1에서 가져오거나 해야 하는데, 여기서는 output2의 호가 정보 위주로 씀
-            # output1이 비어있을 수 있으므로 안전하게 처리
+            # output1이 비어있을 수 있으므로 안전하게 처리 (10단계 호가도 output1에 있음)
+            depth = parse_depth(data['output1']) if data.get('output1') else None
             
-            return current_price, 0, total_ask, total_bid
+            return current_price, 0, total_ask, total_bid, depth
         else:
             print(f"❌ API 오류: {data.get('msg1')}")
-            return None, None, None, None
+            return None, None, None, None, None
             
+    except circuit_breaker.CircuitOpenError:
+        # 차단 중: 요청을 보내지 않고 이번 주기는 건너뜀 (차단/복구 시점에만 서킷이 메시지 출력)
+        return None, None, None, None, None
     except Exception as e:
         print(f"💥 통신 오류: {e}")
-        return None, None, None, None
+        return None, None, None, None, None
+
+def save_depth(code, depth, ts_ms, db_file=None):
+    """10단계 호가를 orderbook_log에 저장 (체결 품질 분석용 호가 스냅샷)"""
+    conn = sqlite3.connect(db_file or DB_FILE)
+    conn.execute("PRAGMA synchronous=OFF")
+    init_orderbook_table(conn)
+    save_orderbook(conn, ts_ms, code, *depth)
+    conn.commit()
+    conn.close()
 
 # =========================================================
 # --- 3. 실행 ---
 # =========================================================
 if __name__ == "__main__":
-    print(f"🚀 [KODEX 200] 호가 데이터 수집기 시작")
+    import argparse
+    import key
+
+    parser = argparse.ArgumentParser(description="호가 데이터 수집기")
+    parser.add_argument("--storage", choices=["full", "delta"], default="full",
+                        help="full: 매 주기 전체 행 저장 / delta: 변경분만 델타 인코딩 저장 (delta_store.py)")
+    parser.add_argument("--interval", type=float, default=60.0,   # orderbook.DEPTH_INTERVAL과 맞춤
+                        help="수집 주기 (초, 1 미만 가능). 벽시계 경계에 맞춰 실행")
+    parser.add_argument("--jitter-log", help="주기별 지터/소요시간을 기록할 CSV 파일")
+    parser.add_argument("--depth", action="store_true",
+                        help="10단계 호가도 orderbook_log에 저장 (같은 응답 사용, 추가 호출 없음)")
+    parser.add_argument("--warmup", type=float, nargs="?", const=5.0, metavar="MIN",
+                        help="장 시작 MIN분(기본 5분) 전에 토큰/연결/DB 예열 (warmup.py)")
+    parser.add_argument("--always", action="store_true",
+                        help="거래 달력 무시하고 24시간 고정 주기로 수집 (기본: 휴장 중 대기, 동시호가 전후 빠르게)")
+    parser.add_argument("--after-hours", action="store_true", help="장후 시간외(15:40~18:00)에도 수집")
+    parser.add_argument("--codes", nargs="*", help="관심 종목 여러 개를 30종목 배치 시세(multi_quote.py)로 수집 "
+                                                   "(기본: KODEX 200 한 종목 호가 조회)")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+
+    watchlist = list(dict.fromkeys(args.codes or []))
+    target = f"관심 종목 {len(watchlist)}개" if watchlist else "KODEX 200"
+    print(f"🚀 [{target}] 호가 데이터 수집기 시작 (저장 방식: {args.storage}, 주기: {args.interval}초)")
+    if watchlist and args.depth:
+        print("⚠️ 배치 시세에는 10단계 호가가 없어 --depth 는 무시됩니다.")
+    elif args.depth and args.interval * 1000 > MAX_BOOK_AGE_MS:
+        print(f"⚠️ 수집 주기({args.interval}초)가 체결 추적 호가 허용 나이({MAX_BOOK_AGE_MS / 1000:.0f}초)보다 길어 "
+              "주문 이벤트 대부분에 호가가 붙지 않습니다. (orderbook.DEPTH_INTERVAL 확인)")
     init_db()
     
-    while True:
-        try:
+    # 지난 실행에서 DB에 반영되지 못한 틱 복구 후 저널 열기
+    writer = DeltaWriter(DB_FILE) if args.storage == "delta" else None
+    replay_journal(JOURNAL_FILE, DB_FILE, writer)   # 델타 저장이면 델타 블록에 이어 붙임
+    journal = TickJournal(JOURNAL_FILE)
+    cadence = None
+    if not args.always:
+        from market_calendar import MarketCalendar, MarketCadence
+        cadence = MarketCadence(MarketCalendar(), args.interval, after_hours=args.after_hours)
+
+    run_warmup = None
+    if args.warmup is not None:
+        import warmup
+        from accounts import Account
+        # 수집기는 key.py 앱키를 쓰므로 계좌 등록부 대신 그 키만 예열
+        def run_warmup():
+            warmup.run(accounts=[Account("collector", "")], db_file=DB_FILE)
+        if cadence is None:
+            warmup.wait_and_run(args.warmup, accounts=[Account("collector", "")], db_file=DB_FILE)
+        elif cadence.interval_at(time.time()) is not None:
+            run_warmup()  # 장중에 시작했으면 바로 예열 (이후에는 매일 개장 전에 예열)
+    profiler.start_from_args(args, "save_data")
+    
+    def collect(scheduled_at):
+        with profiler.iteration("collect"):
             token = get_token_for_api(key.APP_KEY, key.APP_SECRET, key.URL_BASE)
-            if token:
-                price, vol, ask, bid = get_hoga_data(token)
+            if token and watchlist:
+                # 30종목씩 1건 호출로 받아 종목별 행으로 한 번에 저장
+                quotes = fetch_quotes(token, watchlist).values()
+                store_snapshots(journal, writer, [(q.code, q.price, q.volume, q.total_ask, q.total_bid) for q in quotes],
+                                sampled_at=scheduled_at)
+            elif token:
+                price, vol, ask, bid, depth = get_hoga_snapshot(token)
                 if price is not None:
-                    save_to_db(STOCK_CODE, price, vol, ask, bid)
-            
-            time.sleep(60) # 1분 간격
-
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            print(f"에러: {e}")
-            time.sleep(10)
\ No newline at end of file
+                    store_snapshot(journal, writer, STOCK_CODE, price, vol, ask, bid, sampled_at=scheduled_at)
+                    if args.depth and depth:
+                        save_depth(STOCK_CODE, depth, int(time.time() * 1000))
+    
+    # 요청 → 저장 → sleep(60) 대신 경계 시각마다 실행 (지연이 누적되지 않음, 오류 시 다음 경계에 재시도)
+    # 달력 사용 시 휴장 구간은 다음 개장까지 대기 (대기 후 재개 전에 예열)
+    scheduler = FixedRateScheduler(args.interval, collect, jitter_log=args.jitter_log, cadence=cadence,
+                                   on_resume=run_warmup if cadence is not None else None,
+                                   resume_lead=(args.warmup or 0) * 60)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.report()
+        profiler.stop()
+        # 저장에 실패해 저널에만 남은 틱은 DB에 재적재(INSERT OR IGNORE / 델타 블록)한 뒤 저널 비움
+        try:
+            journal.checkpoint(DB_FILE, writer)
+        except sqlite3.Error as e:
+            print(f"⚠️ [저널] 종료 체크포인트 실패 - 저널을 남겨 두고 다음 실행 시 복구합니다: {e}")
+        if writer is not None:
+            writer.close()
+        journal.close()
\ No newline at end of file
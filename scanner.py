@@ -0,0 +1,171 @@
+"""
+scanner.py: 시장 전체 스캐너 (analysis.py 판단 기준을 전 종목에 적용)
+- 종목 유니버스는 symbol_master.idx(mmap 인덱스)에서 읽음
+- RSI(14)는 daily_price(backfill.py 일봉)의 최근 종가 + 현재가로 계산
+- 호가 힘(Power)은 멀티종목 시세(multi_quote.py, 호출 1건에 30종목)를 배치별로 동시에 요청해서 계산
+  (종목별 호가 조회 대비 호출 수 약 1/30, 공용 호출 예산 준수)
+- 과매도 + 매수세 우위 종목부터 순위를 매겨 출력
+- 시세 수신을 제외한 로컬 작업(유니버스 조회, 일봉 로드, 지표 계산, 정렬)은 수 ms 수준
+
+실행:
+    python scanner.py                          # 주권 전체 스캔, 상위 20개
+    python scanner.py --market KOSDAQ --top 50
+    python scanner.py --codes 005930 000660 --etp
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import sqlite3
+import time
+from typing import Dict, List, Tuple
+
+from signal_engine import RSI_PERIOD, power_ratio, power_zone, rsi_zone
+from symbol_master import INDEX_FILE, Symbol, SymbolIndex
+
+DB_FILE = "trading.db"
+QUOTE_WORKERS = 10
+TOP_N = 20
+
+Quote = Tuple[int, int, int]  # (현재가, 총매도잔량, 총매수잔량)
+
+
+# -----------------------------------------------------------
+# 1. 데이터 준비
+# -----------------------------------------------------------
+def load_closes(conn, codes: List[str], period: int = RSI_PERIOD) -> Dict[str, List[int]]:
+    """종목별 오늘 이전 최근 period개 일봉 종가 (오래된 순)
+    - (code, date) 기본키 인덱스로 종목마다 끝부분만 읽음 → 일봉 기간이 길어져도 종목 수에만 비례"""
+    today = datetime.date.today().strftime("%Y%m%d")
+    sql = "SELECT close FROM daily_price WHERE code = ? AND date < ? ORDER BY date DESC LIMIT ?"
+    closes: Dict[str, List[int]] = {}
+    try:
+        for code in codes:
+            rows = conn.execute(sql, (code, today, period)).fetchall()
+            if rows:
+                closes[code] = [close for (close,) in reversed(rows)]
+    except sqlite3.OperationalError:
+        return {}  # daily_price 테이블이 아직 없음 (backfill.py 먼저 실행)
+    return closes
+
+
+def rsi_from_closes(history: List[int], price: int, period: int = RSI_PERIOD) -> float:
+    """최근 종가 + 현재가로 RSI 한 번 계산 (RollingRSI와 같은 단순 이동평균 방식)"""
+    prices = history[-period:] + [price]
+    if len(prices) <= period:
+        return math.nan
+    gain_sum = loss_sum = 0
+    for prev, cur in zip(prices, prices[1:]):
+        if cur > prev:
+            gain_sum += cur - prev
+        else:
+            loss_sum += prev - cur
+    if loss_sum == 0:
+        return 100.0 if gain_sum > 0 else math.nan
+    return 100 - 100 / (1 + gain_sum / loss_sum)
+
+
+def fetch_quotes(token: str, codes: List[str], workers: int = QUOTE_WORKERS) -> Dict[str, Quote]:
+    """30종목 배치 시세 조회를 동시에 실행 (실패한 배치의 종목은 결과에서 빠짐)"""
+    from multi_quote import fetch_quotes as fetch_multi
+
+    return {code: (q.price, q.total_ask, q.total_bid) for code, q in fetch_multi(token, codes, workers).items()}
+
+
+# -----------------------------------------------------------
+# 2. 스크리닝 및 순위
+# -----------------------------------------------------------
+def screen(universe: List[Symbol], closes: Dict[str, List[int]], quotes: Dict[str, Quote]) -> List[Dict]:
+    """analysis.py와 같은 기준(RSI 30/70, Power 1.5/0.7)으로 판단 후 매수 후보 순으로 정렬"""
+    results = []
+    for sym in universe:
+        quote = quotes.get(sym.code)
+        history = closes.get(sym.code)
+        if quote is None or not history:
+            continue
+        price, total_ask, total_bid = quote
+
+        rsi = rsi_from_closes(history, price)
+        if math.isnan(rsi):
+            continue  # 일봉 데이터 부족
+
+        power = power_ratio(total_ask, total_bid)
+        results.append({
+            "code": sym.code,
+            "name": sym.name,
+            "market": sym.market,
+            "price": price,
+            "tick": sym.tick_size,
+            "rsi": rsi,
+            "power": power,
+            "rsi_zone": rsi_zone(rsi),
+            "power_zone": power_zone(power),
+        })
+
+    # 매수 조건 충족 수(과매도, 매수세 우위) → RSI 낮은 순 → Power 높은 순
+    def rank(r):
+        hits = (r["rsi_zone"] == "oversold") + (r["power_zone"] == "bid_pressure")
+        return (-hits, r["rsi"], -(r["power"] or 0))
+
+    results.sort(key=rank)
+    return results
+
+
+def print_ranking(results: List[Dict], top: int = TOP_N) -> None:
+    print("\n📊 [시장 스캔 결과] 매수 후보 순")
+    print(f"{'순위':>4} {'종목':<20} {'시장':<6} {'현재가':>10} {'RSI':>6} {'Power':>6}  판단")
+    print("-" * 70)
+    for i, r in enumerate(results[:top], 1):
+        power = "-" if r["power"] is None else f"{r['power']:.2f}"
+        print(f"{i:>4} {r['name'][:12]:<12}({r['code']}) {r['market']:<6} {r['price']:>10,} "
+              f"{r['rsi']:>6.1f} {power:>6}  {r['rsi_zone']}/{r['power_zone']}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import key
+    from multi_quote import batches
+    from token_manage import get_token_for_api
+
+    parser = argparse.ArgumentParser(description="시장 전체 RSI/호가 힘 스캐너")
+    parser.add_argument("--market", choices=["KOSPI", "KOSDAQ"], help="시장 한정 (기본: 전체)")
+    parser.add_argument("--codes", nargs="*", help="스캔할 종목코드 (기본: 유니버스 전체)")
+    parser.add_argument("--etp", action="store_true", help="ETF/ETN 포함")
+    parser.add_argument("--top", type=int, default=TOP_N, help="출력할 순위 수")
+    parser.add_argument("--index", default=INDEX_FILE, help="종목 인덱스 경로")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SymbolIndex(args.index)
+    groups = ("ST", "EF", "EN") if args.etp else ("ST",)
+    if args.codes:
+        universe = [s for s in (index.get(c) for c in args.codes) if s is not None]
+    else:
+        universe = index.universe(args.market, groups)
+    conn = sqlite3.connect(DB_FILE)
+    closes = load_closes(conn, [s.code for s in universe])
+    conn.close()
+    universe = [s for s in universe if s.code in closes]
+    prep_ms = (time.perf_counter() - start) * 1000
+    print(f"🔎 [스캐너] 대상 {len(universe):,}종목 (일봉 보유 기준) | 준비 {prep_ms:.1f}ms")
+
+    if not universe:
+        print("⚠️ 스캔할 종목이 없습니다. (symbol_master.py / backfill.py 를 먼저 실행하세요)")
+        exit()
+
+    token = get_token_for_api(key.APP_KEY, key.APP_SECRET, key.URL_BASE)
+    if not token:
+        exit()
+
+    start = time.perf_counter()
+    quotes = fetch_quotes(token, [s.code for s in universe])
+    fetch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = screen(universe, closes, quotes)
+    screen_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📡 시세 {len(quotes):,}건 수신 {fetch_s:.1f}초 (호출 {len(batches(s.code for s in universe)):,}건) | "
+          f"판단/정렬 {screen_ms:.1f}ms")
+    print_ranking(results, args.top)
@@ -0,0 +1,178 @@
+"""
+scheduler.py: 드리프트 없는 고정 주기 스케줄러 (수집기용)
+- 실행 시각을 벽시계 경계(예: 매 분 00초, 매 0.5초)에 고정 → 요청/저장 시간만큼 밀리지 않음
+- 작업은 별도 스레드에서 실행하고 메인 루프는 다음 경계까지 대기 (I/O와 대기 시간이 겹침)
+- 이전 작업이 아직 안 끝났으면 이번 주기는 건너뜀 (작업이 쌓이지 않음)
+- 주기마다 지터(예정 시각 대비 실제 실행 지연)와 소요 시간을 기록
+- cadence(예: market_calendar.MarketCadence)를 넘기면 시각에 따라 주기를 바꾸고, 휴장 구간은 다음 개장까지 대기
+
+사용 예:
+    from scheduler import FixedRateScheduler
+
+    def cycle(scheduled_at):      # scheduled_at: 이번 주기의 경계 시각 (epoch 초)
+        ...
+
+    FixedRateScheduler(0.5, cycle, jitter_log="scheduler-jitter.csv").run()
+
+    from market_calendar import MarketCalendar, MarketCadence
+    FixedRateScheduler(60, cycle, cadence=MarketCadence(MarketCalendar(), 60)).run()
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+STATS_WINDOW = 1000   # 지터 통계를 계산할 최근 주기 수
+REPORT_EVERY = 60     # N 주기마다 지터 요약 출력
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FixedRateScheduler:
+    def __init__(self, interval: float, job: Callable[[float], None],
+                 jitter_log: Optional[str] = None, report_every: int = REPORT_EVERY,
+                 cadence=None, on_resume: Optional[Callable[[], None]] = None, resume_lead: float = 0.0):
+        """
+        Args:
+            interval: 실행 주기 (초, 1 미만도 가능)
+            job: 주기마다 호출할 함수. 인자로 예정 시각(경계, epoch 초)을 받음
+            jitter_log: 주기별 기록을 남길 CSV 파일 경로 (None이면 기록 안 함)
+            report_every: N 주기마다 지터 요약 출력 (0이면 출력 안 함)
+            cadence: interval_at(ts) -> 주기 또는 None(휴장), resume_at(ts) -> 재개 시각 을 가진 객체
+            on_resume: 휴장 대기 후 재개 resume_lead초 전에 한 번 호출할 함수 (예: 장 시작 전 예열)
+        """
+        self.interval = interval
+        self.job = job
+        self.report_every = report_every
+        self.cadence = cadence
+        self.on_resume = on_resume
+        self.resume_lead = resume_lead
+        self.cycles = 0
+        self.skipped = 0
+        self.jitters = deque(maxlen=STATS_WINDOW)     # 초
+        self.durations = deque(maxlen=STATS_WINDOW)   # 초
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="collector")
+        self._running = None
+        self._log = open(jitter_log, "a", encoding="utf-8") if jitter_log else None
+        self._log_lock = threading.Lock()  # 메인 루프(skipped)와 작업 스레드(ok/error)가 같이 기록
+        if self._log and self._log.tell() == 0:
+            self._log.write("scheduled,jitter_ms,duration_ms,status\n")
+
+    def next_index(self, now: float) -> int:
+        """now 이후 첫 경계의 번호 (경계 시각 = 번호 * interval, 소수 누적 오차 방지)"""
+        return math.floor(now / self.interval) + 1
+
+    def _run_job(self, scheduled_at: float) -> None:
+        started = time.time()
+        status = "ok"
+        try:
+            self.job(scheduled_at)
+        except Exception as e:
+            status = "error"
+            print(f"에러: {e}")
+        duration = time.time() - started
+        self.durations.append(duration)
+        self._write_log(scheduled_at, started - scheduled_at, duration, status)
+
+    def _write_log(self, scheduled_at: float, jitter: float, duration: float, status: str) -> None:
+        if self._log:
+            with self._log_lock:
+                self._log.write(f"{scheduled_at:.3f},{jitter * 1000:.3f},{duration * 1000:.3f},{status}\n")
+                self._log.flush()
+
+    def stats(self) -> dict:
+        jitters_ms = [j * 1000 for j in self.jitters]
+        return {
+            "cycles": self.cycles,
+            "skipped": self.skipped,
+            "jitter_p50_ms": _percentile(jitters_ms, 0.5),
+            "jitter_p99_ms": _percentile(jitters_ms, 0.99),
+            "jitter_max_ms": max(jitters_ms, default=0.0),
+            "duration_p50_ms": _percentile([d * 1000 for d in self.durations], 0.5),
+        }
+
+    def report(self) -> None:
+        s = self.stats()
+        print(f"⏱️ [스케줄러] {s['cycles']}주기 (건너뜀 {s['skipped']}) | "
+              f"지터 p50 {s['jitter_p50_ms']:.2f}ms / p99 {s['jitter_p99_ms']:.2f}ms / "
+              f"max {s['jitter_max_ms']:.2f}ms | 작업 p50 {s['duration_p50_ms']:.1f}ms")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _wait_for_session(self, now: float) -> bool:
+        """휴장 구간: 다음 재개 시각까지 대기 (재개 전 on_resume 호출). 중지되면 False"""
+        resume = self.cadence.resume_at(now)
+        if resume is None:
+            print("⏹️ [스케줄러] 예정된 개장이 없어 종료합니다. (휴장일 파일 확인)")
+            return False
+        print(f"😴 [스케줄러] 휴장 - {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(resume))} 까지 대기")
+        if self.on_resume is not None:
+            if self._stop.wait(max(0.0, resume - self.resume_lead - time.time())):
+                return False
+            try:
+                self.on_resume()
+            except Exception as e:
+                print(f"에러: {e}")
+        return not self._stop.wait(max(0.0, resume - time.time()))
+
+    def run(self) -> None:
+        """stop() 또는 Ctrl+C 까지 경계마다 작업 실행"""
+        index = self.next_index(time.time())
+        try:
+            while not self._stop.is_set():
+                if self.cadence is not None:
+                    now = time.time()
+                    interval = self.cadence.interval_at(now)
+                    if interval is None:
+                        if not self._wait_for_session(now):
+                            break
+                        now = time.time()
+                        self.interval = self.cadence.interval_at(now) or self.interval
+                        index = self.next_index(now - 0.05)   # 재개 시각 경계부터 (대기 오차 허용)
+                        continue
+                    if interval != self.interval:
+                        print(f"🔁 [스케줄러] 주기 변경: {self.interval:g}초 → {interval:g}초")
+                        self.interval = interval
+                        index = self.next_index(now)
+
+                scheduled_at = index * self.interval
+                remaining = scheduled_at - time.time()
+                if remaining > 0:
+                    self._stop.wait(remaining)
+                    if self._stop.is_set():
+                        break
+                if self.cadence is not None and self.cadence.interval_at(scheduled_at) is None:
+                    continue  # 대기 중 휴장 구간에 들어감 (다음 루프에서 재개 시각까지 대기)
+
+                fired = time.time()
+                self.jitters.append(fired - scheduled_at)
+                if self._running is not None and not self._running.done():
+                    # 이전 작업이 아직 실행 중 → 쌓지 않고 이번 주기는 건너뜀
+                    self.skipped += 1
+                    self._write_log(scheduled_at, fired - scheduled_at, 0.0, "skipped")
+                else:
+                    self._running = self._pool.submit(self._run_job, scheduled_at)
+                self.cycles += 1
+                if self.report_every and self.cycles % self.report_every == 0:
+                    self.report()
+
+                # 다음 경계 (대기 중 여러 경계를 지나쳤으면 놓친 만큼 건너뜀)
+                next_index = max(index + 1, self.next_index(time.time()))
+                self.skipped += next_index - index - 1
+                index = next_index
+        finally:
+            self._pool.shutdown(wait=True)
+            if self._log:
+                self._log.close()
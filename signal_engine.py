@@ -0,0 +1,268 @@
+"""
+signal_engine.py: 상시 실행형 스트리밍 시그널 엔진 (analysis.py의 연속 실행 버전)
+- 수집기가 기록하는 틱 저널(ticks.journal)을 따라 읽으며 새 스냅샷이 들어올 때마다 평가
+- 종목별 RSI(14)와 호가 힘(Power) 규칙을 analysis.py와 같은 기준으로 증분 계산 (틱당 O(1))
+- 판단이 바뀔 때마다 구조화된 시그널 이벤트(JSON 한 줄)를 출력/기록
+- 틱 수신 시각 → 시그널 발생 시각까지의 지연(latency)을 측정
+- --track: RSI가 과매도(매수)/과매수(매도) 구간에 새로 들어가면 체결 추적(execution_tracker.py)에
+  signal 단계를 기록하고 이벤트에 주문 키(order_key)를 실음 → 주문 시 place_order(..., key=order_key)
+- --trade QTY: 그 시그널로 리스크 점검(risk_gate.py) 후 QTY주 지정가 주문까지 전송 (등록부 첫 번째 계좌)
+
+실행:
+    python signal_engine.py                        # 판단이 바뀔 때만 출력
+    python signal_engine.py --all --out signals.jsonl
+    python signal_engine.py --track                # 시그널 시각/호가 기록 (주문은 다른 프로그램이)
+    python signal_engine.py --trade 1              # 시그널마다 1주 주문
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+import execution_tracker
+from tick_journal import JOURNAL_FILE, JournalTailer, format_ts
+
+DB_FILE = "trading.db"
+RSI_PERIOD = 14
+POLL_INTERVAL = 0.02   # 저널 확인 간격 (초)
+REPORT_EVERY = 30.0    # 처리량/지연 요약 출력 간격 (초)
+SIDES = {"oversold": "buy", "overbought": "sell"}   # RSI 구간 → 주문 방향 (analysis.py 판단과 같음)
+
+
+# -----------------------------------------------------------
+# 1. 종목별 증분 지표
+# -----------------------------------------------------------
+class RollingRSI:
+    """analysis.calculate_rsi와 같은 결과(단순 이동평균 RSI)를 틱당 O(1)로 계산"""
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self.prev_price: Optional[int] = None
+        self.gains = deque()
+        self.losses = deque()
+        self.gain_sum = 0
+        self.loss_sum = 0
+
+    def update(self, price: int) -> float:
+        if self.prev_price is not None:
+            delta = price - self.prev_price
+            gain, loss = max(delta, 0), max(-delta, 0)
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_sum += gain
+            self.loss_sum += loss
+            if len(self.gains) > self.period:
+                self.gain_sum -= self.gains.popleft()
+                self.loss_sum -= self.losses.popleft()
+        self.prev_price = price
+
+        if len(self.gains) < self.period:
+            return math.nan
+        if self.loss_sum == 0:
+            return 100.0 if self.gain_sum > 0 else math.nan
+        return 100 - 100 / (1 + self.gain_sum / self.loss_sum)
+
+
+def rsi_zone(rsi: float) -> str:
+    if rsi < 30:
+        return "oversold"      # 과매도 → 매수 고려
+    if rsi > 70:
+        return "overbought"    # 과매수 → 매도 고려
+    return "neutral"
+
+
+def power_ratio(ask_qty: int, bid_qty: int) -> Optional[float]:
+    """매수잔량 / 매도잔량 (매도잔량이 0이면 None)"""
+    if not ask_qty:
+        return None
+    return bid_qty / ask_qty
+
+
+def power_zone(power: Optional[float]) -> str:
+    if power is None:
+        return "no_ask"
+    if power > 1.5:
+        return "bid_pressure"  # 매수세 우위 (상승 압력)
+    if power < 0.7:
+        return "ask_pressure"  # 매도세 우위 (하락 압력)
+    return "balanced"
+
+
+# -----------------------------------------------------------
+# 2. 시그널 이벤트 및 엔진
+# -----------------------------------------------------------
+@dataclass
+class SignalEvent:
+    code: str
+    timestamp: str
+    price: int
+    rsi: Optional[float]
+    power: Optional[float]
+    rsi_zone: str
+    power_zone: str
+    latency_ms: float   # 틱 수신 → 시그널 발생
+    side: Optional[str] = None        # "buy" / "sell" (RSI가 과매도/과매수 구간에 새로 들어갔을 때만)
+    order_key: Optional[str] = None   # 체결 추적 주문 키 (track=True일 때) - place_order(key=)로 전달
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+class SignalEngine:
+    def __init__(self, emit: Callable[[SignalEvent], None], emit_all: bool = False, track: bool = False):
+        """
+        Args:
+            emit: 시그널 이벤트를 받을 함수
+            emit_all: True면 틱마다 이벤트 발생, False면 판단(zone)이 바뀔 때만
+            track: True면 매수/매도 시그널을 체결 추적에 signal 단계로 기록
+        """
+        self.emit = emit
+        self.emit_all = emit_all
+        self.track = track
+        self.rsi: Dict[str, RollingRSI] = {}
+        self.state: Dict[str, tuple] = {}
+        self.ticks = 0
+        self.events = 0
+        self.latencies = deque(maxlen=10000)
+
+    def seed(self, rows) -> None:
+        """DB 과거 행(price_log 형식)으로 지표 상태만 채움 (이벤트 발생 없음)"""
+        for _, code, price, _, _, _ in rows:
+            self.rsi.setdefault(code, RollingRSI()).update(price)
+
+    def on_tick(self, ts_ms: int, code: str, price: int, ask_qty: int, bid_qty: int,
+                recv_ms: Optional[int] = None) -> Optional[SignalEvent]:
+        self.ticks += 1
+        rsi = self.rsi.setdefault(code, RollingRSI()).update(price)
+        if math.isnan(rsi):
+            return None  # RSI 계산에 필요한 데이터가 아직 부족
+
+        power = power_ratio(ask_qty, bid_qty)
+        zones = (rsi_zone(rsi), power_zone(power))
+        prev = self.state.get(code)
+        if not self.emit_all and prev == zones:
+            return None
+        self.state[code] = zones
+
+        # 매수/매도 시그널은 RSI 구간이 바뀐 순간에만 (--all로 틱마다 출력해도 주문은 한 번)
+        side = SIDES.get(zones[0]) if prev is None or prev[0] != zones[0] else None
+        order_key = None
+        if side and self.track:
+            order_key = execution_tracker.record("signal", code=code, side=side, price=price)
+        latency_ms = time.time() * 1000 - (recv_ms or ts_ms)
+        event = SignalEvent(code, format_ts(ts_ms / 1000), price, round(rsi, 2),
+                            None if power is None else round(power, 3), zones[0], zones[1],
+                            round(latency_ms, 3), side, order_key)
+        self.latencies.append(latency_ms)
+        self.events += 1
+        self.emit(event)
+        return event
+
+    def latency_summary(self) -> Dict[str, float]:
+        if not self.latencies:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.latencies)
+        return {
+            "p50_ms": ordered[len(ordered) // 2],
+            "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max_ms": ordered[-1],
+        }
+
+
+def run(engine: SignalEngine, journal_file: str = JOURNAL_FILE, poll_interval: float = POLL_INTERVAL) -> None:
+    """저널을 따라 읽으며 엔진에 틱 전달 (Ctrl+C 로 종료)"""
+    tailer = JournalTailer(journal_file)
+    last_report = time.monotonic()
+    print(f"📡 [시그널] {journal_file} 구독 시작 (Ctrl+C 로 종료)")
+    try:
+        while True:
+            ticks = tailer.poll()
+            for ts_ms, code, price, _, ask_qty, bid_qty, recv_ms in ticks:
+                engine.on_tick(ts_ms, code, price, ask_qty, bid_qty, recv_ms)
+            if not ticks:
+                time.sleep(poll_interval)
+
+            if time.monotonic() - last_report >= REPORT_EVERY:
+                s = engine.latency_summary()
+                print(f"⏱️ [시그널] 틱 {engine.ticks:,} / 이벤트 {engine.events:,} | "
+                      f"지연 p50 {s['p50_ms']:.1f}ms / p99 {s['p99_ms']:.1f}ms", flush=True)
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+    import datetime
+    from delta_store import read_price_log
+
+    parser = argparse.ArgumentParser(description="스트리밍 시그널 엔진")
+    parser.add_argument("--all", action="store_true", help="판단 변화와 무관하게 틱마다 이벤트 출력")
+    parser.add_argument("--out", help="이벤트를 JSON Lines로 추가 기록할 파일")
+    parser.add_argument("--journal", default=JOURNAL_FILE, help="구독할 틱 저널 경로")
+    parser.add_argument("--seed-hours", type=float, default=24, help="DB에서 지표 상태를 미리 채울 기간 (시간)")
+    parser.add_argument("--track", action="store_true", help="매수/매도 시그널을 체결 추적에 기록")
+    parser.add_argument("--trade", type=int, metavar="QTY", help="매수/매도 시그널마다 QTY주 지정가 주문 (--track 포함)")
+    args = parser.parse_args()
+
+    out = open(args.out, "a", encoding="utf-8") if args.out else None
+    trade = None
+    if args.trade:
+        from concurrent.futures import ThreadPoolExecutor
+        from accounts import default_account
+        from remove_order import place_order
+        from risk_gate import Order, RiskGate
+
+        account = default_account()
+        gate = RiskGate(account)
+        if not gate.start():
+            print("💥 잔고/미체결 조회 실패로 주문을 보낼 수 없습니다.")
+            exit(1)
+        orders = ThreadPoolExecutor(max_workers=1, thread_name_prefix="signal-order")  # 틱 처리 루프를 막지 않음
+
+        def send(event: SignalEvent) -> None:
+            order = Order(event.code, event.side, args.trade, event.price)
+            decision = gate.check(order)
+            if not decision.ok:
+                print(f"🛑 [리스크] {order.code} {order.side} {order.price:,}원 x {order.qty:,}주 차단: "
+                      f"{decision.reason}", flush=True)
+                return
+            gate.record(order)
+            app_key, app_secret, url_base = account.credentials()
+            place_order(account.token(), app_key, app_secret, account.cano, account.acnt_prdt_cd, url_base,
+                        order.code, order.side, order.qty, order.price, key=event.order_key)
+
+        def trade(event: SignalEvent) -> None:
+            orders.submit(send, event)
+
+    def emit(event: SignalEvent) -> None:
+        line = event.to_json()
+        print(line, flush=True)
+        if out:
+            out.write(line + "\n")
+            out.flush()
+        if trade and event.side:
+            trade(event)
+
+    engine = SignalEngine(emit, emit_all=args.all, track=args.track or bool(args.trade))
+    if args.seed_hours > 0:
+        since = (datetime.datetime.now() - datetime.timedelta(hours=args.seed_hours)).strftime("%Y-%m-%d %H:%M:%S")
+        conn = sqlite3.connect(DB_FILE)
+        try:
+            engine.seed(read_price_log(conn, since=since))
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ [시그널] DB 상태 초기화 건너뜀: {e}")
+        conn.close()
+
+    run(engine, args.journal)
+    if args.trade:
+        orders.shutdown(wait=True)
+        gate.stop()
+    if out:
+        out.close()
@@ -0,0 +1,197 @@
+"""
+symbol_master.py: KOSPI/KOSDAQ 종목 마스터 → 메모리 맵(mmap) 종목 인덱스
+- 한국투자증권 종목 마스터 파일(kospi_code.mst, kosdaq_code.mst, cp949)의 로컬 사본을 파싱
+  (원본: https://new.real.download.dws.co.kr/common/master/kospi_code.mst.zip 등을 받아 압축 해제)
+- 종목코드 순으로 정렬된 고정 길이 레코드 파일(symbol_master.idx)로 저장
+- mmap + 이진 탐색으로 조회 → 프로세스 시작 시 파싱/로드 비용 없이 수 마이크로초에 조회
+- 종목명, 시장, 그룹(주식/ETF/ETN 등), 업종 분류, 기준가, 호가단위 제공
+
+사용 예:
+    python symbol_master.py --kospi kospi_code.mst --kosdaq kosdaq_code.mst   # 인덱스 생성
+
+    from symbol_master import SymbolIndex
+    index = SymbolIndex()
+    sym = index.get("005930")   # Symbol(code='005930', name='삼성전자', market='KOSPI', ...)
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+INDEX_FILE = "symbol_master.idx"
+MAGIC = b"HSMI"
+VERSION = 1
+
+# 마스터 파일 뒷부분(고정 길이 영역) 배치 - KIS 제공 마스터 파일 샘플 코드 기준
+#   tail_width: 고정 길이 영역 전체 폭
+#   base_price: (시작 위치, 폭) 기준가
+MASTER_LAYOUT = {
+    "KOSPI": {"tail_width": 228, "base_price": (41, 9)},
+    "KOSDAQ": {"tail_width": 222, "base_price": (38, 9)},
+}
+ETP_GROUPS = ("EF", "EN")  # 그룹코드: EF=ETF, EN=ETN (ST=주권)
+TICK_BANDS = (2000, 5000, 20000, 50000, 200000, 500000)   # 이 가격 미만이면 다음 단위 (microstructure.py도 사용)
+TICK_UNITS = (1, 5, 10, 50, 100, 500, 1000)
+
+_HEADER = struct.Struct("<4sHI")                 # magic, version, 레코드 수
+_RECORD = struct.Struct("<9s60s1s2s4s4s4sii")    # code, name, market, group, 업종 대/중/소, 기준가, 호가단위
+_MARKETS = {"KOSPI": b"P", "KOSDAQ": b"Q"}
+_MARKET_NAMES = {v: k for k, v in _MARKETS.items()}
+
+
+class Symbol(NamedTuple):
+    code: str
+    name: str
+    market: str
+    group: str
+    sector_large: str
+    sector_mid: str
+    sector_small: str
+    base_price: int
+    tick_size: int
+
+    @property
+    def is_etp(self) -> bool:
+        return self.group in ETP_GROUPS
+
+
+def tick_size(price: int, etp: bool = False) -> int:
+    """KRX 호가가격단위 (2023.01 개편 기준, KOSPI/KOSDAQ 공통, ETF/ETN은 5원)"""
+    if etp:
+        return 1 if price < 2000 else 5
+    return TICK_UNITS[bisect.bisect_right(TICK_BANDS, price)]
+
+
+# -----------------------------------------------------------
+# 1. 마스터 파일 파싱 및 인덱스 생성
+# -----------------------------------------------------------
+def parse_master(path: str, market: str) -> List[Symbol]:
+    layout = MASTER_LAYOUT[market]
+    width = layout["tail_width"]
+    bp_start, bp_width = layout["base_price"]
+
+    symbols = []
+    with open(path, "r", encoding="cp949") as f:
+        for row in f:
+            row = row.rstrip("\r\n")
+            if len(row) <= width + 21:
+                continue
+            head, tail = row[:-width], row[-width:]
+            code = head[0:9].strip()
+            name = head[21:].strip()
+            group = tail[0:2]
+            base_text = tail[bp_start:bp_start + bp_width].strip()
+            base_price = int(base_text) if base_text.isdigit() else 0
+            etp = group in ETP_GROUPS
+            symbols.append(Symbol(code, name, market, group, tail[3:7].strip(), tail[7:11].strip(),
+                                  tail[11:15].strip(), base_price, tick_size(base_price, etp)))
+    return symbols
+
+
+def build_index(symbols: List[Symbol], path: str = INDEX_FILE) -> int:
+    """종목코드 순으로 정렬한 고정 길이 레코드 파일 생성 (임시 파일 작성 후 교체)"""
+    ordered = sorted({s.code: s for s in symbols}.values(), key=lambda s: s.code)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(ordered)))
+        for s in ordered:
+            name = s.name.encode("utf-8")[:60]
+            f.write(_RECORD.pack(s.code.encode("ascii"), name, _MARKETS[s.market], s.group.encode("ascii"),
+                                 s.sector_large.encode("ascii"), s.sector_mid.encode("ascii"),
+                                 s.sector_small.encode("ascii"), s.base_price, s.tick_size))
+    os.replace(tmp, path)
+    return len(ordered)
+
+
+# -----------------------------------------------------------
+# 2. mmap 인덱스 조회
+# -----------------------------------------------------------
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", errors="ignore")
+
+
+def _to_symbol(fields) -> Symbol:
+    code, name, market, group, large, mid, small, base_price, tick = fields
+    return Symbol(_text(code), _text(name), _MARKET_NAMES[market], _text(group),
+                  _text(large), _text(mid), _text(small), base_price, tick)
+
+
+class SymbolIndex:
+    def __init__(self, path: str = INDEX_FILE):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"종목 인덱스 형식이 다릅니다: {path} (다시 생성하세요)")
+        self._cache: Dict[str, Optional[Symbol]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _code_at(self, i: int) -> bytes:
+        offset = _HEADER.size + i * _RECORD.size
+        return self._mm[offset:offset + 9].rstrip(b"\0")
+
+    def _symbol_at(self, i: int) -> Symbol:
+        return _to_symbol(_RECORD.unpack_from(self._mm, _HEADER.size + i * _RECORD.size))
+
+    def get(self, code: str) -> Optional[Symbol]:
+        """종목코드로 조회 (이진 탐색, 없으면 None)"""
+        if code in self._cache:
+            return self._cache[code]
+        key = code.encode("ascii")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._code_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = self._symbol_at(lo) if lo < self._count and self._code_at(lo) == key else None
+        self._cache[code] = found
+        return found
+
+    def __iter__(self) -> Iterator[Symbol]:
+        end = _HEADER.size + self._count * _RECORD.size
+        for fields in _RECORD.iter_unpack(self._mm[_HEADER.size:end]):
+            yield _to_symbol(fields)
+
+    def universe(self, market: Optional[str] = None, groups=("ST",)) -> List[Symbol]:
+        """시장/그룹 조건에 맞는 종목 목록 (기본: 주권만)"""
+        return [s for s in self if (market is None or s.market == market) and (not groups or s.group in groups)]
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="종목 마스터 인덱스 생성/조회")
+    parser.add_argument("--kospi", help="kospi_code.mst 경로")
+    parser.add_argument("--kosdaq", help="kosdaq_code.mst 경로")
+    parser.add_argument("--lookup", nargs="*", default=[], help="조회할 종목코드")
+    args = parser.parse_args()
+
+    if args.kospi or args.kosdaq:
+        symbols = []
+        if args.kospi:
+            symbols += parse_master(args.kospi, "KOSPI")
+        if args.kosdaq:
+            symbols += parse_master(args.kosdaq, "KOSDAQ")
+        count = build_index(symbols)
+        print(f"✅ 종목 인덱스 생성 완료: {INDEX_FILE} ({count:,}종목)")
+
+    if args.lookup:
+        index = SymbolIndex()
+        for code in args.lookup:
+            start = time.perf_counter()
+            sym = index.get(code)
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            print(f"🔎 {code}: {sym} ({elapsed_us:.1f}µs)")
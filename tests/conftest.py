@@ -0,0 +1,36 @@
+"""
+오프라인 동작 테스트 공용 설정 (API/토큰/네트워크 없이 실행)
+
+실행:
+    python -m pytest -q tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# 저장소 루트의 평면 모듈(tick_journal, risk_gate, ...)을 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def price_db(tmp_path):
+    """save_data.init_db와 같은 price_log 스키마만 있는 임시 DB (save_data는 토큰 모듈을 import해서 쓰지 않음)"""
+    path = str(tmp_path / "trading.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE price_log (
+        timestamp TEXT,
+        code TEXT,
+        price INTEGER,
+        volume INTEGER,
+        total_ask_qty INTEGER,
+        total_bid_qty INTEGER,
+        PRIMARY KEY (code, timestamp)
+    )
+    """)
+    conn.commit()
+    conn.close()
+    return path
@@ -0,0 +1,77 @@
+"""circuit_breaker: 오류 분류와 closed → open → half_open → closed 전이"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, classify
+
+
+def test_classify():
+    assert classify(200, {"rt_cd": "0"}) is None
+    assert classify(200, {"rt_cd": "1", "msg_cd": "APBK0013"}) is None   # 업무 오류는 정상 응답
+    assert classify(500, {"msg_cd": "EGW00201"}) == "rate_limit"
+    assert classify(200, {"msg_cd": "EGW00123"}) == "auth"
+    assert classify(502) == "outage"
+    assert classify(None) == "outage"                                    # 타임아웃/연결 실패
+
+
+def _expire(breaker):
+    breaker.open_until = 0.0   # 차단 시간이 지난 것으로
+
+
+def test_outage_opens_after_threshold_then_recovers():
+    breaker = CircuitBreaker(("/uapi/test", "TEST0001"))
+    threshold, base, _ = circuit_breaker.POLICY["outage"]
+    for _ in range(threshold - 1):
+        breaker.before()
+        breaker.record("outage", "HTTP 500")
+    assert breaker.state == CLOSED
+
+    breaker.before()
+    breaker.record("outage", "HTTP 500")
+    assert breaker.state == OPEN
+    assert base / 2 <= breaker.retry_in() <= base
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before()
+    assert info.value.key == ("/uapi/test", "TEST0001")
+
+    _expire(breaker)
+    breaker.before()                       # 시험 호출 1건 허용
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before()                   # 시험 호출 중 다른 호출은 차단
+    breaker.record(None)
+    assert (breaker.state, breaker.failures, breaker.trips) == (CLOSED, 0, 0)
+    breaker.before()
+
+
+def test_half_open_failure_reopens_with_longer_delay():
+    breaker = CircuitBreaker(("/uapi/test", ""))
+    _, base, _ = circuit_breaker.POLICY["rate_limit"]
+    breaker.record("rate_limit")           # 호출 제한은 1회에 차단
+    assert breaker.state == OPEN
+
+    _expire(breaker)
+    breaker.before()
+    breaker.record("rate_limit")
+    assert breaker.state == OPEN and breaker.trips == 2
+    assert base <= breaker.retry_in() <= 2 * base
+
+
+def test_auth_error_does_not_open():
+    breaker = CircuitBreaker(("/oauth2/tokenP", ""))
+    for _ in range(10):
+        breaker.before()
+        breaker.record("auth")
+    assert breaker.state == CLOSED
+    assert breaker.counts == {"auth": 10}
+
+
+def test_registry():
+    circuit_breaker.reset()
+    a = circuit_breaker.get("/uapi/a", "TR1")
+    assert circuit_breaker.get("/uapi/a", "TR1") is a
+    a.record("rate_limit", "EGW00201")
+    assert circuit_breaker.states()["TR1 /uapi/a"]["state"] == OPEN
+    circuit_breaker.reset()
+    assert circuit_breaker.states() == {}
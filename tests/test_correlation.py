@@ -0,0 +1,46 @@
+"""correlation.RollingCovariance: 증분 갱신 결과가 np.cov(최근 window 수익률)와 같은지"""
+
+import numpy as np
+import pytest
+
+from correlation import RollingCovariance
+
+
+def _prices(n_bars, n_codes, seed=11):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, size=(n_bars, n_codes)) + rng.normal(0, 0.01, size=(n_bars, 1))
+    return 10000 * np.exp(np.cumsum(returns, axis=0))
+
+
+@pytest.mark.parametrize("n_bars", [10, 61, 200])   # 링버퍼가 덜 찬 경우 / 딱 한 바퀴 / 여러 바퀴(재계산 포함)
+def test_matches_np_cov(n_bars):
+    codes = ["A", "B", "C", "D"]
+    prices = _prices(n_bars, len(codes))
+    cov = RollingCovariance(codes, window=60)
+    for row in prices:
+        cov.update(dict(zip(codes, row)))
+
+    returns = np.diff(np.log(prices), axis=0)[-60:]
+    np.testing.assert_allclose(cov.covariance(), np.cov(returns, rowvar=False), rtol=1e-9, atol=1e-15)
+    if len(returns) >= 20:
+        np.testing.assert_allclose(cov.correlation(), np.corrcoef(returns, rowvar=False), rtol=1e-9)
+
+
+def test_missing_price_counts_as_zero_return():
+    cov = RollingCovariance(["A", "B"], window=5)
+    cov.update({"A": 100.0, "B": 50.0})
+    cov.update({"A": 110.0})                          # B 가격 없음 → 직전 가격 유지
+    assert cov.returns[0].tolist() == pytest.approx([np.log(1.1), 0.0])
+    assert cov.covariance() is None                   # 봉 1개로는 계산하지 않음
+
+
+def test_add_codes_keeps_existing_state():
+    prices = _prices(30, 3)
+    cov = RollingCovariance(["A", "B"], window=60)
+    for row in prices:
+        cov.update({"A": row[0], "B": row[1]})
+    before = cov.covariance()
+    cov.add_codes(["C", "A"])
+    after = cov.covariance()
+    np.testing.assert_allclose(after[:2, :2], before)
+    assert after[2].tolist() == [0.0, 0.0, 0.0]
@@ -0,0 +1,64 @@
+"""delta_store: 블록 인코딩/디코딩 왕복, DeltaWriter → read_price_log 복원"""
+
+import random
+import sqlite3
+
+from delta_store import DeltaWriter, decode_block, encode_block, read_price_log
+from tick_journal import format_ts
+
+T0 = 1767225600.0
+
+
+def test_block_round_trip():
+    rng = random.Random(7)
+    rows, ts, price = [], 1767225600000, 35000
+    for _ in range(300):
+        ts += rng.choice((1000, 60000))
+        price += rng.randint(-50, 50)   # 음수 차이 포함 (zigzag)
+        rows.append((ts, price, rng.randint(0, 10 ** 9), rng.randint(0, 10 ** 6), rng.randint(0, 10 ** 6)))
+    assert decode_block(encode_block(rows), len(rows)) == rows
+
+
+def test_block_round_trip_extremes():
+    # zigzag는 i64 차이까지 (저널의 i64 필드끼리의 차이가 이 범위)
+    rows = [(0, 0, 0, 0, 0), (2 ** 61, -(2 ** 61), 1, -1, 2 ** 40), (1, 2 ** 61, 0, 0, 0)]
+    assert decode_block(encode_block(rows), len(rows)) == rows
+
+
+def test_writer_skips_unchanged_and_read_restores_rows(price_db):
+    writer = DeltaWriter(price_db, block_rows=4, flush_interval=0)
+    ticks = [
+        (T0, "069500", 35000, 100, 10, 20),
+        (T0 + 1, "069500", 35000, 100, 10, 20),   # 변동 없음 → 건너뜀
+        (T0 + 2, "069500", 35010, 150, 12, 18),
+        (T0 + 2, "005930", 71000, 5, 1, 1),
+        (T0 + 3, "069500", 34990, 180, 9, 25),
+        (T0 + 4, "069500", 35020, 200, 9, 25),
+        (T0 + 5, "069500", 35030, 210, 8, 25),   # 5번째 저장 → 두 번째 블록
+    ]
+    stored = [writer.append(*t) for t in ticks]
+    writer.close()
+    assert stored == [True, False, True, True, True, True, True]
+
+    with sqlite3.connect(price_db) as conn:
+        rows = read_price_log(conn, code="069500")
+        latest = read_price_log(conn, latest=2)
+    expected = [(format_ts(ts), code, price, volume, ask, bid)
+                for ts, code, price, volume, ask, bid in ticks if code == "069500"]
+    del expected[1]
+    assert rows == expected
+    assert [r[2] for r in latest] == [35030, 35020]
+
+
+def test_writer_resume_does_not_duplicate(price_db):
+    writer = DeltaWriter(price_db, flush_interval=0)
+    writer.append(T0, "069500", 35000, 100, 10, 20)
+    writer.close()
+
+    writer = DeltaWriter(price_db, flush_interval=0)   # 재시작: 마지막 블록/직전 값 복원
+    assert writer.append(T0, "069500", 35005, 100, 10, 20) is False      # 이미 저장된 시각
+    assert writer.append(T0 + 1, "069500", 35000, 100, 10, 20) is False  # 직전과 같음
+    assert writer.append(T0 + 2, "069500", 35005, 100, 10, 20) is True
+    writer.close()
+    with sqlite3.connect(price_db) as conn:
+        assert [r[2] for r in read_price_log(conn)] == [35000, 35005]
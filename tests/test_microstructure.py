@@ -0,0 +1,78 @@
+"""microstructure: 손으로 만든 호가창으로 지표 값 확인 (스트리밍/배치 결과 일치 포함)"""
+
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from microstructure import FEATURES, MicrostructureStream, compute, load_books
+from orderbook import LEVELS, init_orderbook_table, save_orderbook
+
+
+def _book(ask1, ask_qty, bid1, bid_qty, step=5):
+    """1호가만 잔량을 다르게 하고 2~10호가는 잔량 100씩"""
+    asks = [(ask1 + step * i, ask_qty if i == 0 else 100) for i in range(LEVELS)]
+    bids = [(bid1 - step * i, bid_qty if i == 0 else 100) for i in range(LEVELS)]
+    return asks, bids
+
+
+def test_first_snapshot_features():
+    stream = MicrostructureStream(etp_codes={"069500"})
+    f = stream.update(1_000, {"069500": _book(35005, 300, 35000, 100)})["069500"]
+
+    assert f["l1_imbalance"] == pytest.approx((100 - 300) / 400)
+    assert f["microprice"] == pytest.approx((35000 * 300 + 35005 * 100) / 400)
+    assert f["spread_ticks"] == pytest.approx(1.0)               # ETF 호가단위 5원
+    assert f["micro_offset"] == pytest.approx((f["microprice"] - 35002.5) / 5)
+    weights = 1 / np.arange(1, LEVELS + 1)
+    aw = 300 + 100 * weights[1:].sum()
+    bw = 100 + 100 * weights[1:].sum()
+    assert f["imbalance"] == pytest.approx((bw - aw) / (aw + bw))
+    for name in ("bid_depletion", "ask_depletion", "ofi"):
+        assert math.isnan(f[name])                               # 직전 스냅샷 없음
+
+
+def test_depletion_and_ofi():
+    stream = MicrostructureStream(etp_codes={"069500"})
+    stream.update(1_000, {"069500": _book(35005, 300, 35000, 100)})
+    # 2초 뒤: 매수1호가 잔량 100 → 40 (같은 가격), 매도1호가는 위로 밀림 (직전 300 전부 소진)
+    f = stream.update(3_000, {"069500": _book(35010, 50, 35000, 40)})["069500"]
+    assert f["bid_depletion"] == pytest.approx(60 / 2)
+    assert f["ask_depletion"] == pytest.approx(300 / 2)
+    # OFI = (매수: 40 - 100) - (매도: 호가 상승 → -300)
+    assert f["ofi"] == pytest.approx((40 - 100) - (0 - 300))
+
+
+def test_one_sided_book_is_nan():
+    stream = MicrostructureStream()
+    asks, _ = _book(35050, 10, 35000, 10)
+    bids = [(0, 0)] * LEVELS
+    f = stream.update(1_000, {"005930": (asks, bids)})["005930"]
+    for name in ("microprice", "spread_ticks", "micro_offset"):
+        assert math.isnan(f[name])
+    assert f["l1_imbalance"] == pytest.approx(-1.0)
+
+
+def test_batch_matches_stream(tmp_path):
+    snapshots = [
+        (1_000, "069500", _book(35005, 300, 35000, 100)),
+        (3_000, "069500", _book(35010, 50, 35000, 40)),
+        (1_000, "005930", _book(71100, 20, 71000, 30, step=100)),
+        (2_000, "005930", _book(71000, 5, 70900, 30, step=100)),
+    ]
+    conn = sqlite3.connect(str(tmp_path / "trading.db"))
+    init_orderbook_table(conn)
+    for ts, code, (asks, bids) in snapshots:
+        save_orderbook(conn, ts, code, asks, bids)
+    books = load_books(conn)
+    conn.close()
+    batch = compute(books, etp_codes={"069500"})
+
+    stream = MicrostructureStream(etp_codes={"069500"})
+    for ts, code, book in sorted(snapshots):
+        got = stream.update(ts, {code: book})[code]
+        row = next(i for i in range(len(books.ts_ms))
+                   if books.codes[books.code_idx[i]] == code and books.ts_ms[i] == ts)
+        for name in FEATURES:
+            np.testing.assert_allclose(got[name], batch[name][row], equal_nan=True)
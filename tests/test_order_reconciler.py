@@ -0,0 +1,83 @@
+"""order_reconciler: diff() 계획, execute()의 차단/전송 순서 (주문 함수는 테스트 안에서 대체)"""
+
+import time
+
+import remove_order
+from order_reconciler import LiveOrder, Plan, diff, execute, live_from_pending
+from risk_gate import Order, RiskGate, RiskLimits, Snapshot
+
+
+def test_live_from_pending():
+    pending = [
+        {"odno": "1", "pdno": "069500", "sll_buy_dvsn_cd": "02", "rmn_qty": "10", "ord_unpr": "35000"},
+        {"odno": "2", "pdno": "069500", "sll_buy_dvsn_cd": "01", "rmn_qty": "5", "ord_unpr": "35100"},
+        {"odno": "3", "pdno": "069500", "sll_buy_dvsn_cd": "02", "rmn_qty": "0", "ord_unpr": "34900"},
+    ]
+    assert live_from_pending(pending) == [LiveOrder("1", "069500", "buy", 10, 35000),
+                                          LiveOrder("2", "069500", "sell", 5, 35100)]
+
+
+def test_diff_keep_amend_replace_cancel_place():
+    live = [
+        LiveOrder("1", "069500", "buy", 10, 34900),   # 그대로
+        LiveOrder("2", "069500", "buy", 10, 34950),   # → 34960 x 5 (수량 감소: 정정)
+        LiveOrder("3", "069500", "buy", 10, 35000),   # → 35010 x 20 (수량 증가: 취소 후 재주문)
+        LiveOrder("4", "069500", "sell", 3, 35500),   # desired에 매도 없음 → 취소
+        LiveOrder("5", "005930", "buy", 1, 70000),    # 대상 종목 아님 → 건드리지 않음
+    ]
+    desired = [
+        Order("069500", "buy", 10, 34900),
+        Order("069500", "buy", 5, 34960),
+        Order("069500", "buy", 20, 35010),
+        Order("069500", "buy", 10, 35050),            # 짝 없음 → 신규
+    ]
+    plan = diff(desired, live)
+    assert plan.keep == [live[0]]
+    assert plan.amend == [(live[1], desired[1])]
+    assert plan.replace == [(live[2], desired[2])]
+    assert plan.cancel == [live[3]]
+    assert plan.place == [desired[3]]
+    assert plan.actions == 1 + 1 + 1 + 2
+
+
+def test_diff_scope_and_flat():
+    live = [LiveOrder("1", "069500", "buy", 10, 35000), LiveOrder("2", "005930", "buy", 1, 70000)]
+    plan = diff([], live, codes=["069500"])   # --flat: 대상 종목 미체결 전부 취소
+    assert plan.cancel == [live[0]]
+    assert diff([], live) == Plan([], [], [], [], [])
+    assert diff([Order("069500", "buy", 10, 35000)], live).keep == [live[0]]
+
+
+class _Account:
+    label = "test"
+    cano = "00000000"
+    acnt_prdt_cd = "01"
+
+    def token(self):
+        return "token"
+
+    def credentials(self):
+        return "key", "secret", "https://example.invalid"
+
+
+def test_execute_blocked_replace_keeps_live_order_and_cancels_first(monkeypatch):
+    calls = []
+    monkeypatch.setattr(remove_order, "cancel_order", lambda *a, **kw: calls.append(("cancel", a[6])) or True)
+    monkeypatch.setattr(remove_order, "amend_order", lambda *a, **kw: calls.append(("amend", a[6])) or {})
+    monkeypatch.setattr(remove_order, "place_order", lambda *a, **kw: calls.append(("place", a[9])) or {})
+
+    gate = RiskGate(limits=RiskLimits(max_open_orders=2), baseline_file=None)
+    gate.apply(Snapshot(refreshed_at=time.time(), total_eval=100_000_000, cash=100_000_000,
+                        open_orders={"069500": 2, "005930": 1}))
+    live = [LiveOrder("1", "069500", "buy", 10, 35000), LiveOrder("2", "069500", "sell", 1, 36000),
+            LiveOrder("3", "005930", "buy", 10, 70000)]
+    plan = Plan(keep=[], amend=[], cancel=[live[1]],
+                place=[Order("069500", "buy", 1, 34000)],          # 취소가 반영되어야 미체결 한도 통과
+                replace=[(live[0], Order("069500", "buy", 20, 35100)),
+                         (live[2], Order("005930", "buy", 1000, 70000))])   # 1회 주문 한도 초과 → 차단
+
+    result = execute(plan, _Account(), gate=gate, workers=1)
+    assert result == {"amended": 0, "cancelled": 2, "placed": 2, "blocked": 1, "failed": 0}
+    assert ("cancel", "3") not in calls                       # 막힌 재주문의 기존 주문은 유지
+    kinds = [kind for kind, _ in calls]
+    assert kinds == ["cancel", "cancel", "place", "place"]    # 취소 먼저
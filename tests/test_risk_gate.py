@@ -0,0 +1,83 @@
+"""risk_gate: 스냅샷 생성과 한도별 차단 (API 호출 없이 apply()로 스냅샷 주입)"""
+
+import time
+
+from risk_gate import Order, RiskGate, RiskLimits, Snapshot, build_snapshot
+
+TOTAL = 10_000_000   # 총평가 1,000만원 → 1회/종목 한도 60만원
+
+
+def _gate(tmp_path=None, **snapshot):
+    values = dict(refreshed_at=time.time(), total_eval=TOTAL, cash=TOTAL)
+    values.update(snapshot)
+    baseline = str(tmp_path / "risk_baseline.json") if tmp_path is not None else None
+    gate = RiskGate(limits=RiskLimits(), baseline_file=baseline)
+    gate.apply(Snapshot(**values))
+    return gate
+
+
+def test_build_snapshot_uses_d2_cash_and_prev_day_eval():
+    balance = {
+        "output1": [{"pdno": "069500", "hldg_qty": "10", "evlu_amt": "350000"},
+                    {"pdno": "005930", "hldg_qty": "0", "evlu_amt": "0"}],
+        "output2": [{"tot_evlu_amt": "10000000", "dnca_tot_amt": "5000000", "prvs_rcdl_excc_amt": "3000000",
+                     "bfdy_tot_asst_evlu_amt": "10200000"}],
+    }
+    pending = [{"pdno": "069500"}, {"pdno": "069500"}]
+    snap = build_snapshot(balance, pending, refreshed_at=1.0)
+    assert (snap.total_eval, snap.cash, snap.prev_day_eval) == (10_000_000, 3_000_000, 10_200_000)
+    assert snap.positions == {"069500": (10, 350000)}
+    assert snap.open_orders == {"069500": 2}
+
+
+def test_fail_closed_without_fresh_snapshot():
+    gate = RiskGate(baseline_file=None)
+    assert not gate.check(Order("069500", "buy", 1, 35000)).ok
+    gate = _gate(refreshed_at=time.time() - RiskLimits().max_snapshot_age - 1)
+    assert "오래됨" in gate.check(Order("069500", "buy", 1, 35000)).reason
+
+
+def test_order_and_position_limits():
+    gate = _gate(positions={"069500": (10, 350_000)})
+    assert gate.check(Order("069500", "buy", 17, 35000)).ok is False        # 59.5만 + 보유 35만 > 60만
+    assert gate.check(Order("005930", "buy", 17, 35000)).ok                 # 59.5만 ≤ 60만
+    assert "1회 주문 한도" in gate.check(Order("005930", "buy", 18, 35000)).reason
+
+    gate.record(Order("005930", "buy", 10, 35000))                          # 보낸 주문도 비중에 반영
+    assert "종목 비중" in gate.check(Order("005930", "buy", 10, 35000)).reason
+
+
+def test_cash_open_orders_and_sell_limits():
+    gate = _gate(cash=500_000, positions={"069500": (3, 105_000)}, open_orders={"069500": 2})
+    assert "현금" in gate.check(Order("000660", "buy", 3, 200_000)).reason
+
+    assert gate.check(Order("069500", "sell", 3, 35000)).ok
+    gate.record(Order("069500", "sell", 3, 35000))
+    assert "미체결" in gate.check(Order("069500", "sell", 1, 35000)).reason   # 2 + 1건 = 한도 3
+    gate.record_cancel(Order("069500", "buy", 1, 34000))
+    assert "매도 가능 수량" in gate.check(Order("069500", "sell", 1, 35000)).reason
+
+    # 재주문은 기존 주문을 대신하므로 미체결 수가 늘지 않음
+    old = Order("069500", "buy", 1, 34000)
+    assert gate.check(Order("069500", "buy", 2, 34000), replaces=old).ok
+
+
+def test_daily_loss_uses_prev_day_eval():
+    gate = _gate(prev_day_eval=10_250_000)    # 전일 대비 -2.4%
+    assert "일일 손실" in gate.check(Order("069500", "buy", 1, 35000)).reason
+    assert gate.check(Order("069500", "sell", 0, 35000)).ok is False         # 수량 오류
+
+
+def test_daily_loss_baseline_survives_restart(tmp_path):
+    _gate(tmp_path, total_eval=TOTAL)                          # 그날 첫 총평가 저장
+    gate = _gate(tmp_path, total_eval=TOTAL - 250_000)         # 장중 재시작 (-2.5%)
+    assert gate.day_start_eval == TOTAL
+    assert "일일 손실" in gate.check(Order("069500", "buy", 1, 35000)).reason
+
+
+def test_amend_only_checks_added_buy_amount():
+    gate = _gate(cash=400_000)
+    old = Order("069500", "buy", 10, 35000)
+    assert gate.check_amend(old, Order("069500", "buy", 5, 35000)).ok          # 금액 감소
+    assert gate.check_amend(old, Order("069500", "buy", 11, 35000)).ok         # 3.5만 증가
+    assert not gate.check_amend(old, Order("069500", "buy", 30, 35000)).ok     # 105만 > 1회 한도
@@ -0,0 +1,46 @@
+"""signal_engine.RollingRSI: analysis.calculate_rsi(pandas)와 같은 값인지"""
+
+import math
+import random
+
+import pytest
+
+from signal_engine import RollingRSI, rsi_zone
+
+
+def _prices(n=500, seed=3):
+    rng = random.Random(seed)
+    prices = [35000]
+    for _ in range(n - 1):
+        prices.append(prices[-1] + rng.choice((-10, -5, 0, 0, 5, 10)))
+    prices[100:120] = [prices[99]] * 20        # 변동 없는 구간 (gain = loss = 0)
+    prices[200:220] = [prices[199] + 5 * i for i in range(20)]   # 상승만 (loss = 0)
+    return prices
+
+
+def test_matches_pandas_rsi():
+    pd = pytest.importorskip("pandas")
+    import analysis
+
+    prices = _prices()
+    expected = analysis.calculate_rsi(pd.Series(prices, dtype=float)).tolist()
+    rsi = RollingRSI()
+    for price, want in zip(prices, expected):
+        got = rsi.update(price)
+        if math.isnan(want):
+            assert math.isnan(got)
+        else:
+            assert got == pytest.approx(want, abs=1e-9)
+
+
+def test_warmup_and_edge_cases():
+    rsi = RollingRSI(period=3)
+    assert [math.isnan(rsi.update(p)) for p in (100, 101, 102)] == [True, True, True]
+    assert rsi.update(103) == 100.0             # 손실 없음
+    for p in (103, 103, 103):
+        value = rsi.update(p)
+    assert math.isnan(value)                    # 이익/손실 모두 0
+    for p in (102, 101, 100):
+        value = rsi.update(p)
+    assert value == 0.0
+    assert rsi_zone(value) == "oversold"
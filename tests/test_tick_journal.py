@@ -0,0 +1,79 @@
+"""tick_journal: 잘린/깨진 레코드 처리, 재적재 멱등성, JournalTailer"""
+
+import sqlite3
+
+from tick_journal import JournalTailer, TickJournal, encode_tick, read_records, replay_journal
+
+T0 = 1767225600.0   # 2026-01-01 00:00:00 UTC
+
+
+def _write_ticks(path, n=3):
+    journal = TickJournal(path, fsync=False)
+    for i in range(n):
+        journal.append(T0 + i, "069500", 35000 + i, 100 * i, 10, 20, received=T0 + i + 0.05)
+    journal.close()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "ticks.journal")
+    _write_ticks(path)
+    records = list(read_records(path))
+    assert [r[2] for r in records] == [35000, 35001, 35002]
+    ts_ms, code, price, volume, ask_qty, bid_qty, recv_ms = records[1]
+    assert (ts_ms, code, volume, ask_qty, bid_qty, recv_ms) == (int(T0 * 1000) + 1000, "069500", 100, 10, 20,
+                                                                 int(T0 * 1000) + 1050)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = str(tmp_path / "ticks.journal")
+    _write_ticks(path)
+    record = encode_tick(T0 + 10, "069500", 1, 1, 1, 1)
+    with open(path, "ab") as f:
+        f.write(record[:len(record) // 2])   # 기록 도중 종료
+
+    assert len(list(read_records(path))) == 3
+
+
+def test_corrupt_record_stops_reading(tmp_path):
+    path = str(tmp_path / "ticks.journal")
+    _write_ticks(path)
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    size = len(encode_tick(T0, "069500", 0, 0, 0, 0))
+    data[size + 10] ^= 0xFF   # 두 번째 레코드 본문 손상 → CRC 불일치
+    with open(path, "wb") as f:
+        f.write(data)
+
+    records = list(read_records(path))
+    assert [r[2] for r in records] == [35000]
+
+
+def test_replay_is_idempotent(tmp_path, price_db):
+    path = str(tmp_path / "ticks.journal")
+    _write_ticks(path)
+    assert replay_journal(path, price_db) == 3
+    assert list(read_records(path)) == []   # 재적재 후 비움
+
+    _write_ticks(path)   # 같은 틱이 다시 남아 있어도 중복 적재하지 않음
+    assert replay_journal(path, price_db) == 0
+    with sqlite3.connect(price_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM price_log").fetchone()[0] == 3
+
+
+def test_tailer_waits_for_partial_record_and_follows_rotate(tmp_path):
+    path = str(tmp_path / "ticks.journal")
+    journal = TickJournal(path, fsync=False)
+    tailer = JournalTailer(path, from_end=False)
+
+    record = encode_tick(T0, "069500", 35000, 1, 1, 1)
+    with open(path, "ab") as f:
+        f.write(record[:5])
+    assert tailer.poll() == []
+    with open(path, "ab") as f:
+        f.write(record[5:])
+    assert [r[2] for r in tailer.poll()] == [35000]
+
+    journal.rotate()
+    journal.append(T0 + 1, "069500", 35005, 1, 1, 1)
+    assert [r[2] for r in tailer.poll()] == [35005]   # 같은 크기의 새 파일이어도 처음부터 읽음
+    journal.close()
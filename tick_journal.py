@@ -0,0 +1,226 @@
+"""
+tick_journal.py: 수집 틱의 크래시 안전 추가 전용(append-only) 저널
+- 수신한 스냅샷을 SQLite보다 먼저 바이너리 저널 파일에 기록 (write + fsync)
+- 레코드 형식: [본문 길이 u16][CRC32 u32][본문]
+  본문 = 표본시각(ms, i64) + 종목코드(9바이트) + 현재가/거래량/매도잔량/매수잔량(i64 x4) + 수신시각(ms, i64)
+  (표본시각은 스케줄러 경계 시각, 수신시각은 API 응답을 받은 실제 시각)
+- 재시작 시 replay_journal()로 price_log에 아직 없는 틱을 멱등적으로 적재
+- 체크포인트(저널 비우기)도 먼저 저널 내용을 같은 방식으로 재적재한 뒤에만 비움
+  (DB 저장이 실패한 틱이 저널에만 남아 있어도 잃지 않음)
+- 끝부분이 잘리거나 깨진 레코드(기록 도중 종료)는 버림
+- JournalTailer로 다른 프로세스가 새로 기록한 틱을 따라 읽을 수 있음 (signal_engine.py)
+
+사용 예:
+    from tick_journal import TickJournal, replay_journal, format_ts
+
+    replay_journal("ticks.journal", "trading.db")   # 시작 시 1회
+    journal = TickJournal("ticks.journal")
+    journal.append(scheduled_at, "069500", price, volume, ask_qty, bid_qty, received=time.time())
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import sqlite3
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+JOURNAL_FILE = "ticks.journal"
+JOURNAL_MAX_BYTES = 16 * 1024 * 1024  # 이 크기를 넘으면 DB에 재적재/동기화 후 저널 비움
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_HEADER = struct.Struct("<HI")        # 본문 길이, CRC32
+_TICK = struct.Struct("<q9sqqqqq")    # ts_ms, code(최대 9자리), price, volume, ask_qty, bid_qty, recv_ms
+_TICK_V1 = struct.Struct("<q9sqqqq")  # 수신시각 필드가 없던 이전 형식 (읽기만 지원)
+
+# (ts_ms, code, price, volume, ask_qty, bid_qty, recv_ms)
+Tick = Tuple[int, str, int, int, int, int, int]
+
+
+def format_ts(ts: float) -> str:
+    """epoch 초 → price_log timestamp 문자열 (1초 미만 주기일 때만 .mmm 밀리초를 붙임)"""
+    ms = int(round(ts * 1000))
+    text = datetime.datetime.fromtimestamp(ms // 1000).strftime(TS_FORMAT)
+    return text if ms % 1000 == 0 else f"{text}.{ms % 1000:03d}"
+
+
+def encode_tick(ts: float, code: str, price: int, volume: int, ask_qty: int, bid_qty: int,
+                received: Optional[float] = None) -> bytes:
+    received = ts if received is None else received
+    body = _TICK.pack(int(round(ts * 1000)), code.encode("ascii"), price, volume or 0, ask_qty, bid_qty,
+                      int(round(received * 1000)))
+    return _HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def _parse(data: bytes, offset: int = 0) -> Tuple[List[Tick], int, bool]:
+    """
+    data[offset:]의 레코드 파싱
+
+    Returns:
+        (레코드 목록, 마지막 온전한 레코드 다음 위치, 손상 레코드 발견 여부)
+    """
+    records = []
+    while offset + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        body = data[start:start + length]
+        if len(body) < length:
+            break  # 아직 기록 중인 레코드
+        if zlib.crc32(body) != crc or length not in (_TICK.size, _TICK_V1.size):
+            return records, offset, True
+        if length == _TICK.size:
+            ts_ms, code, price, volume, ask_qty, bid_qty, recv_ms = _TICK.unpack(body)
+        else:
+            ts_ms, code, price, volume, ask_qty, bid_qty = _TICK_V1.unpack(body)
+            recv_ms = ts_ms
+        records.append((ts_ms, code.rstrip(b"\0").decode("ascii"), price, volume, ask_qty, bid_qty, recv_ms))
+        offset = start + length
+    return records, offset, False
+
+
+def read_records(path: str) -> Iterator[Tick]:
+    """저널의 유효한 레코드를 순서대로 반환. 잘리거나 깨진 지점에서 멈춤"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+
+    records, offset, corrupted = _parse(data)
+    yield from records
+    if corrupted or offset < len(data):
+        print(f"⚠️ [저널] {offset}바이트 지점 이후 손상/미완성 레코드 무시")
+
+
+class JournalTailer:
+    """
+    다른 프로세스(수집기)가 기록 중인 저널을 따라 읽음 (tail -f)
+    - 기록 도중인 레코드는 다음 poll()에서 읽음
+    - 체크포인트/복구로 저널이 비워지거나 rotate()로 새 파일이 되면 처음부터 다시 읽음
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, from_end: bool = True):
+        self.path = path
+        self.offset = os.path.getsize(path) if from_end and os.path.exists(path) else 0
+        self.inode = os.stat(path).st_ino if os.path.exists(path) else None
+
+    def poll(self) -> List[Tick]:
+        if not os.path.exists(self.path):
+            return []
+        stat = os.stat(self.path)
+        size = stat.st_size
+        if size < self.offset or stat.st_ino != self.inode:
+            self.offset = 0  # 저널이 비워졌거나 새 파일로 교체됨
+            self.inode = stat.st_ino
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        records, consumed, corrupted = _parse(data)
+        self.offset += consumed
+        if corrupted:
+            print(f"⚠️ [저널] {self.offset}바이트 지점 손상 레코드 - 현재 끝으로 건너뜀")
+            self.offset = size
+        return records
+
+
+class TickJournal:
+    def __init__(self, path: str = JOURNAL_FILE, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._f = open(path, "ab")
+
+    def append(self, ts: float, code: str, price: int, volume: int, ask_qty: int, bid_qty: int,
+               received: Optional[float] = None) -> None:
+        self._f.write(encode_tick(ts, code, price, volume, ask_qty, bid_qty, received))
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+
+    def size(self) -> int:
+        return self._f.tell()
+
+    def checkpoint(self, db_file: str, writer=None) -> int:
+        """
+        저널 내용을 price_log에 재적재(INSERT OR IGNORE)하고 DB 파일을 디스크에 강제 동기화한 뒤 저널을 비움
+        (저장 중 오류로 DB에 못 들어간 틱이 있어도 비우기 전에 반영됨)
+        writer: 델타 저장 중이면 DeltaWriter - price_log 대신 델타 블록에 재적재
+
+        Returns:
+            재적재로 새로 들어간 행 수 (정상이면 0)
+        """
+        self._f.flush()
+        inserted = _restore(db_file, read_records(self.path), writer)
+        if inserted:
+            print(f"♻️ [저널] 체크포인트 전 DB에 없던 {inserted}건을 반영했습니다.")
+        with open(db_file, "rb+") as db:
+            os.fsync(db.fileno())
+        self._f.truncate(0)
+        self._f.seek(0)
+        if self.fsync:
+            os.fsync(self._f.fileno())
+        return inserted
+
+    def rotate(self) -> None:
+        """
+        지금까지의 저널을 path.1로 옮기고 새 파일로 시작 (DB에 반영하지 않는 실시간 피드 전용 저널용)
+        JournalTailer는 파일이 바뀐 것을 보고 새 파일을 처음부터 읽음
+        """
+        self._f.close()
+        os.replace(self.path, self.path + ".1")
+        self._f = open(self.path, "ab")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _insert_price_log(db_file: str, records) -> int:
+    """틱 레코드를 price_log에 적재 (이미 있는 (code, timestamp)는 건너뜀). 새로 적재된 행 수 반환"""
+    rows = [
+        (format_ts(ts_ms / 1000), code, price, volume, ask_qty, bid_qty)
+        for ts_ms, code, price, volume, ask_qty, bid_qty, _ in records
+    ]
+    if not rows:
+        return 0
+
+    conn = sqlite3.connect(db_file)
+    before = conn.total_changes
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO price_log
+        (timestamp, code, price, volume, total_ask_qty, total_bid_qty)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.commit()
+    inserted = conn.total_changes - before
+    conn.close()
+    return inserted
+
+
+def _restore(db_file: str, records, writer=None) -> int:
+    """writer(DeltaWriter)가 있으면 델타 블록에, 없으면 price_log에 재적재"""
+    if writer is not None:
+        return writer.replay(records)
+    return _insert_price_log(db_file, records)
+
+
+def replay_journal(path: str = JOURNAL_FILE, db_file: str = "trading.db", writer=None) -> int:
+    """
+    저널의 틱을 price_log에 적재 (이미 있는 (code, timestamp)는 건너뜀) 후 저널을 비움
+    writer: 델타 저장 중이면 DeltaWriter - 델타 모드가 건너뛴 변동 없는 틱까지 전체 행으로 쓰지 않도록 델타 블록에 재적재
+
+    Returns:
+        새로 적재된 행 수
+    """
+    records = list(read_records(path))
+    inserted = _restore(db_file, records, writer)
+    if os.path.exists(path):
+        open(path, "wb").close()
+    if records:
+        target = "델타 블록" if writer is not None else "price_log"
+        print(f"♻️ [저널] {len(records)}건 중 {inserted}건을 {target}에 복구했습니다.")
+    return inserted
@@ -13,15 +13,31 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple, Dict, Any
 
-import requests
+import kis_http
 
 TOKEN_FILE = "token-expire.json"
 SECURITY_MARGIN = 60 * 10  # 만료 10분 전이면 갱신
 
+# 상주 프로세스(daemon, 수집기)가 매 호출마다 파일을 다시 읽지 않도록 하는 메모리 캐시
+# {(token_file, 종류): (값, 만료 timestamp)}
+_memory_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+
+# 여러 스레드(다계좌 동시 조회)가 같은 토큰을 중복 발급하지 않도록 발급 구간을 직렬화
+_issue_lock = threading.Lock()
+
+
+def _cache_get(token_file: str, kind: str) -> Optional[str]:
+    cached = _memory_cache.get((token_file, kind))
+    if cached and time.time() < cached[1] - SECURITY_MARGIN:
+        return cached[0]
+    return None
+
 # -----------------------------------------------------------
 # 내부 유틸리티: JSON 파일 읽기/쓰기 (병합 모드)
 # -----------------------------------------------------------
@@ -57,7 +73,7 @@ def _save_new_token(app_key: str, app_secret: str, url_base: str, token_file: st
 
     print("🔄 [API] 새 접근 토큰 발급 시도...")
     try:
-        res = requests.post(url, headers=headers, data=json.dumps(body), timeout=10)
+        res = kis_http.post(url, headers=headers, data=json.dumps(body), timeout=10)
         if res.status_code != 200:
             print(f"❌ [API] 발급 실패 코드: {res.status_code}, 메시지: {res.text}")
             return None
@@ -78,7 +94,9 @@ def _save_new_token(app_key: str, app_secret: str, url_base: str, token_file: st
             "token_expiry_ts": expiry_utc.timestamp(),
             "token_expiry_dt": expiry_kst.strftime("%Y-%m-%d %H:%M:%S"),
         }
-        _update_json(token_file, token_data)
+        if not kis_http.replaying():  # 재생 중에는 가짜 토큰으로 실제 토큰 파일을 덮어쓰지 않음
+            _update_json(token_file, token_data)
+        _memory_cache[(token_file, "access_token")] = (access_token, token_data["token_expiry_ts"])
 
         print(f"✅ [API] 토큰 갱신 완료 (만료: {token_data['token_expiry_dt']})")
         return access_token
@@ -88,14 +106,23 @@ def _save_new_token(app_key: str, app_secret: str, url_base: str, token_file: st
 
 def get_token_for_api(app_key: str, app_secret: str, url_base: str, token_file: str = TOKEN_FILE) -> Optional[str]:
     """유효한 REST API 토큰 반환"""
+    cached = _cache_get(token_file, "access_token")
+    if cached:
+        return cached
+
     data = _load_json(token_file)
     access_token = data.get("access_token")
     expiry_ts = float(data.get("token_expiry_ts", 0))
 
     if access_token and time.time() < expiry_ts - SECURITY_MARGIN:
+        _memory_cache[(token_file, "access_token")] = (access_token, expiry_ts)
         return access_token
     
-    return _save_new_token(app_key, app_secret, url_base, token_file)
+    with _issue_lock:
+        cached = _cache_get(token_file, "access_token")  # 대기 중 다른 스레드가 발급했을 수 있음
+        if cached:
+            return cached
+        return _save_new_token(app_key, app_secret, url_base, token_file)
 
 
 # -----------------------------------------------------------
@@ -113,7 +140,7 @@ def _save_new_websocket_key(app_key: str, app_secret: str, url_base: str, token_
 
     print("🔄 [WS] 새 웹소켓 접속키 발급 시도...")
     try:
-        res = requests.post(url, headers=headers, data=json.dumps(body), timeout=10)
+        res = kis_http.post(url, headers=headers, data=json.dumps(body), timeout=10)
         if res.status_code != 200:
             print(f"❌ [WS] 발급 실패 코드: {res.status_code}, 메시지: {res.text}")
             return None
@@ -132,7 +159,9 @@ def _save_new_websocket_key(app_key: str, app_secret: str, url_base: str, token_
             "ws_expiry_ts": expiry_utc.timestamp(),
             "ws_expiry_dt": expiry_kst.strftime("%Y-%m-%d %H:%M:%S"),
         }
-        _update_json(token_file, ws_data)
+        if not kis_http.replaying():
+            _update_json(token_file, ws_data)
+        _memory_cache[(token_file, "websocket_key")] = (approval_key, ws_data["ws_expiry_ts"])
 
         print(f"✅ [WS] 키 갱신 완료 (만료예상: {ws_data['ws_expiry_dt']})")
         return approval_key
@@ -142,17 +171,48 @@ def _save_new_websocket_key(app_key: str, app_secret: str, url_base: str, token_
 
 def get_websocket_key(app_key: str, app_secret: str, url_base: str, token_file: str = TOKEN_FILE) -> Optional[str]:
     """유효한 웹소켓 접속키 반환"""
+    cached = _cache_get(token_file, "websocket_key")
+    if cached:
+        return cached
+
     data = _load_json(token_file)
     ws_key = data.get("websocket_key")
     expiry_ts = float(data.get("ws_expiry_ts", 0))
 
     # 웹소켓 키가 있고 유효기간이 남았으면 재사용
     if ws_key and time.time() < expiry_ts - SECURITY_MARGIN:
+        _memory_cache[(token_file, "websocket_key")] = (ws_key, expiry_ts)
         return ws_key
     
     return _save_new_websocket_key(app_key, app_secret, url_base, token_file)
 
 
+# -----------------------------------------------------------
+# 3. 장 시작 전 예열 (warmup.py)
+# -----------------------------------------------------------
+def refresh_before(app_key: str, app_secret: str, url_base: str, until_ts: float,
+                   token_file: str = TOKEN_FILE, websocket: bool = False) -> Dict[str, Optional[str]]:
+    """
+    until_ts(장 마감 시각 등) 전에 만료될 토큰/웹소켓 키는 지금 미리 재발급 (장중 재발급 방지)
+    {"access_token": ..., "websocket_key": ...} 반환
+    """
+    data = _load_json(token_file)
+    result: Dict[str, Optional[str]] = {}
+    kinds = [("access_token", "token_expiry_ts", _save_new_token, get_token_for_api)]
+    if websocket:
+        kinds.append(("websocket_key", "ws_expiry_ts", _save_new_websocket_key, get_websocket_key))
+
+    for kind, expiry_field, issue, get in kinds:
+        cached = _memory_cache.get((token_file, kind))
+        expiry_ts = cached[1] if cached else float(data.get(expiry_field, 0))
+        if expiry_ts - SECURITY_MARGIN < until_ts:
+            with _issue_lock:
+                result[kind] = issue(app_key, app_secret, url_base, token_file)
+        else:
+            result[kind] = get(app_key, app_secret, url_base, token_file)
+    return result
+
+
 # -----------------------------------------------------------
 # CLI: 상태 점검 및 테스트
 # -----------------------------------------------------------
@@ -1,13 +1,23 @@
 import sqlite3
-import pandas as pd
+import daemon
 
-# DB 연결
-conn = sqlite3.connect("trading.db")
+# 상주 데몬이 떠 있으면 데몬의 warm DB 연결로 바로 조회
+reply = daemon.call("latest", table="price_log", limit=5)
 
-# 저장된 데이터 불러오기 (최근 5개만)
-df = pd.read_sql("SELECT * FROM price_log ORDER BY timestamp DESC LIMIT 5", conn)
+if reply is not None:
+    print("\n📊 [최근 수집된 데이터 5건]")
+    print(reply["text"])
+else:
+    import pandas as pd
+    from delta_store import read_price_log, PRICE_LOG_COLUMNS
 
-print("\n📊 [최근 수집된 데이터 5건]")
-print(df)
+    # DB 연결
+    conn = sqlite3.connect("trading.db")
 
-conn.close()
\ No newline at end of file
+    # 저장된 데이터 불러오기 (최근 5개만, 델타 저장분 포함)
+    df = pd.DataFrame(read_price_log(conn, latest=5), columns=PRICE_LOG_COLUMNS)
+
+    print("\n📊 [최근 수집된 데이터 5건]")
+    print(df)
+
+    conn.close()
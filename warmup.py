@@ -0,0 +1,197 @@
+"""
+warmup.py: 장 시작 전 예열 (09:00 첫 주기가 100번째 주기와 같은 시간에 끝나도록)
+- 토큰/웹소켓 접속키: 장 마감 전에 만료될 것은 지금 미리 재발급 (장중 /oauth2/tokenP 재발급 방지)
+- HTTP: DNS 조회 + TCP/TLS 연결을 미리 맺어 공용 세션 풀에 유지 (kis_http.prewarm)
+- DB: init_db(스키마 점검/ALTER TABLE 시도) + PRAGMA quick_check + 최근 행 조회로 페이지 캐시 적재
+- 종목 마스터 인덱스(symbol_master.idx) 전체를 한 번 읽어 페이지 캐시 적재
+- 지표 상태: SignalEngine을 넘기면 DB 과거 행으로 미리 채움
+- 무거운 모듈(pandas, numpy) import를 미리 해 둠
+- 각 단계 소요 시간을 출력 (다른 프로세스에서 실행해도 토큰 파일/OS 페이지 캐시 효과는 공유됨)
+
+사용 예:
+    import warmup
+    warmup.wait_and_run(lead_minutes=5)      # 장 시작 5분 전까지 대기 후 예열 (수집기 --warmup)
+
+실행:
+    python warmup.py                 # 지금 바로 예열
+    python warmup.py --wait 10       # 장 시작 10분 전까지 기다렸다가 예열
+"""
+
+from __future__ import annotations
+
+import datetime
+import importlib
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+
+DB_FILE = "trading.db"
+LEAD_MINUTES = 5          # 장 시작 몇 분 전에 예열할지
+CONNECTIONS = 4           # 미리 맺어 둘 HTTP 연결 수
+SEED_HOURS = 24           # 지표 상태를 채울 과거 구간 (시간)
+HEAVY_MODULES = ("pandas", "numpy")
+
+
+def _timed(results: Dict[str, Dict], name: str, func) -> None:
+    started = time.perf_counter()
+    try:
+        detail = func()
+        ok = True
+    except Exception as e:
+        detail, ok = str(e), False
+    ms = (time.perf_counter() - started) * 1000
+    results[name] = {"ok": ok, "ms": round(ms, 1), "detail": detail}
+    print(f"   {'✅' if ok else '⚠️'} {name}: {ms:.0f}ms" + (f" ({detail})" if detail not in (None, "") else ""))
+
+
+# -----------------------------------------------------------
+# 1. 단계별 예열
+# -----------------------------------------------------------
+def warm_tokens(accounts, until_ts: float, websocket: bool = False) -> str:
+    from token_manage import refresh_before
+
+    seen = set()
+    for account in accounts:
+        app_key, app_secret, url_base = account.credentials()
+        if (app_key, account.token_file) in seen:
+            continue
+        seen.add((app_key, account.token_file))
+        result = refresh_before(app_key, app_secret, url_base, until_ts, account.token_file, websocket)
+        missing = [kind for kind, value in result.items() if not value]
+        if missing:
+            raise RuntimeError(f"{account.label} 발급 실패: {', '.join(missing)}")
+    return f"앱키 {len(seen)}개"
+
+
+def warm_http(url_bases, connections: int = CONNECTIONS) -> str:
+    import kis_http
+
+    opened = sum(kis_http.prewarm(url, connections) for url in url_bases)
+    return f"연결 {opened}개"
+
+
+def warm_db(db_file: str = DB_FILE) -> str:
+    import contextlib
+    import io
+    import save_data
+    from delta_store import read_price_log
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_data.init_db(db_file)
+    conn = sqlite3.connect(db_file)
+    try:
+        check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise RuntimeError(f"quick_check: {check}")
+        read_price_log(conn, latest=5)
+    finally:
+        conn.close()
+    return f"{os.path.getsize(db_file) / 1024 / 1024:.1f}MB"
+
+
+def warm_symbols(path: Optional[str] = None) -> str:
+    from symbol_master import INDEX_FILE, SymbolIndex
+
+    path = path or INDEX_FILE
+    if not os.path.exists(path):
+        return "인덱스 없음 (건너뜀)"
+    index = SymbolIndex(path)
+    count = sum(1 for _ in index)
+    index.close()
+    return f"{count:,}종목"
+
+
+def warm_signals(engine, db_file: str = DB_FILE, hours: float = SEED_HOURS) -> str:
+    from delta_store import read_price_log
+
+    since = (datetime.datetime.now() - datetime.timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = read_price_log(conn, since=since)
+    finally:
+        conn.close()
+    engine.seed(rows)
+    return f"{len(rows):,}행, {len(engine.rsi)}종목"
+
+
+def warm_imports(modules=HEAVY_MODULES) -> str:
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return ", ".join(loaded) or "없음"
+
+
+# -----------------------------------------------------------
+# 2. 전체 예열 / 장 시작 전 대기
+# -----------------------------------------------------------
+def run(accounts=None, engine=None, websocket: bool = False, connections: int = CONNECTIONS,
+        db_file: str = DB_FILE) -> Dict[str, Dict]:
+    """예열 단계를 순서대로 실행하고 {단계: {"ok", "ms", "detail"}} 반환 (실패해도 다음 단계 진행)"""
+    if accounts is None:
+        from accounts import load_accounts
+        accounts = load_accounts()
+    from market_calendar import KST, REGULAR_CLOSE, MarketCalendar, now_kst
+
+    today = now_kst().date()
+    session = MarketCalendar().session(today)   # 수능일 등 폐장이 늦는 날 반영
+    close_ts = (session[1] if session else datetime.datetime.combine(today, REGULAR_CLOSE, tzinfo=KST)).timestamp()
+    url_bases = sorted({account.credentials()[2] for account in accounts})
+
+    print("🔥 [예열] 시작")
+    started = time.perf_counter()
+    results: Dict[str, Dict] = {}
+    _timed(results, "토큰", lambda: warm_tokens(accounts, close_ts, websocket))
+    _timed(results, "HTTP 연결", lambda: warm_http(url_bases, connections))
+    _timed(results, "DB", lambda: warm_db(db_file))
+    _timed(results, "종목 마스터", warm_symbols)
+    if engine is not None:
+        _timed(results, "지표 상태", lambda: warm_signals(engine, db_file))
+    _timed(results, "모듈 import", warm_imports)
+    print(f"🔥 [예열] 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+    return results
+
+
+def seconds_until_warmup(lead_minutes: float = LEAD_MINUTES, now: Optional[datetime.datetime] = None) -> float:
+    """다음 정규장 개장(krx_holidays.json 반영) lead_minutes분 전까지 남은 시간 (오늘 장중이면 0)"""
+    from market_calendar import MarketCalendar, now_kst, to_kst
+
+    now = to_kst(now) if now else now_kst()   # 개장 시각은 KST 기준 (호스트 시간대와 무관)
+    calendar = MarketCalendar()
+    session = calendar.session(now.date())
+    if session is not None and session[0] <= now < session[1]:
+        return 0.0
+    next_open = calendar.next_open(now)
+    if next_open is None:
+        return 0.0
+    target = next_open - datetime.timedelta(minutes=lead_minutes)
+    return max(0.0, (target - now).total_seconds())
+
+
+def wait_and_run(lead_minutes: float = LEAD_MINUTES, **kwargs) -> Dict[str, Dict]:
+    """다음 장 시작 lead_minutes분 전까지 대기한 뒤 예열 (장중이거나 이미 지났으면 바로 예열)"""
+    wait = seconds_until_warmup(lead_minutes)
+    if wait > 0:
+        print(f"⏳ [예열] 장 시작 {lead_minutes:g}분 전까지 {wait / 60:.0f}분 대기")
+        time.sleep(wait)
+    return run(**kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="장 시작 전 예열")
+    parser.add_argument("--wait", type=float, metavar="MIN", help="장 시작 MIN분 전까지 기다렸다가 예열")
+    parser.add_argument("--ws", action="store_true", help="웹소켓 접속키도 미리 발급")
+    parser.add_argument("--connections", type=int, default=CONNECTIONS, help="미리 맺을 HTTP 연결 수")
+    args = parser.parse_args()
+
+    if args.wait is not None:
+        results = wait_and_run(args.wait, websocket=args.ws, connections=args.connections)
+    else:
+        results = run(websocket=args.ws, connections=args.connections)
+    exit(0 if all(r["ok"] for r in results.values()) else 1)
@@ -0,0 +1,480 @@
+"""
+ws_mux.py: KIS 웹소켓 실시간 시세 멀티플렉서 (여러 세션/접속키에 구독 분산)
+- 웹소켓 세션(접속키) 1개당 실시간 등록은 41건 제한 → accounts.json의 앱키마다 세션을 열어 나눠 등록
+  (접속키는 앱키별로 1개이므로 세션 수 = 서로 다른 앱키 수)
+- 관심 종목이 바뀌면 set_watchlist()로 차이만 등록/해제 (기존 등록은 같은 세션에 유지)
+  DOWN_AFTER 넘게 연결이 안 되는 세션(접속 실패하는 접속키 등)의 구독은 rebalance()로 살아 있는 세션에 옮김
+- 끊기면 지수 백오프로 재접속 후 자동 재등록, PINGPONG 응답
+- 모든 세션의 체결(H0STCNT0)/호가(H0STASP0)를 거래소 시각 순으로 합친 단일 피드 제공
+- 세션별 지연(거래소 시각 → 수신 시각), 수신량, 재접속 횟수 집계
+- websocket-client 패키지 필요 (pip install websocket-client)
+
+실행:
+    python ws_mux.py --codes 069500 005930 000660
+    python ws_mux.py --codes-file watchlist.txt --journal    # 체결을 웹소켓 전용 틱 저널(ws_ticks.journal)에 기록
+    python signal_engine.py --journal ws_ticks.journal       # 그 저널을 구독
+    (수집기의 ticks.journal과 분리: 수집기 재시작 복구/체크포인트와 섞이지 않고,
+     price_log에 적재하지 않는 실시간 피드라 WS_JOURNAL_MAX_BYTES를 넘으면 .1로 넘기고 새 파일에 씀)
+"""
+
+from __future__ import annotations
+
+import datetime
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import websocket  # websocket-client
+except ImportError:
+    websocket = None
+
+WS_URL = "ws://ops.koreainvestment.com:21000"   # 모의투자: ws://ops.koreainvestment.com:31000
+MAX_SUBSCRIPTIONS = 41       # 세션당 실시간 등록 한도
+DEFAULT_TR_IDS = ("H0STCNT0", "H0STASP0")   # 주식 체결가, 주식 호가
+FIELD_COUNTS = {"H0STCNT0": 46, "H0STASP0": 59}   # 레코드당 필드 수 (한 메시지에 여러 건이 붙어 올 수 있음)
+SUBSCRIBE_INTERVAL = 0.05    # 등록 요청 간격 (초)
+RECV_TIMEOUT = 60            # 이 시간 동안 아무 메시지(PINGPONG 포함)도 없으면 재접속
+RECONNECT_MIN, RECONNECT_MAX = 1.0, 60.0
+DOWN_AFTER = 30.0            # 이 시간 넘게 연결이 안 된 세션의 구독은 다른 세션으로 옮김 (초)
+REBALANCE_EVERY = 5.0        # 죽은 세션 구독 재배치 확인 간격 (초)
+HOLD_MS = 200                # 합친 피드에서 늦게 도착한 세션을 기다리는 시간
+LAG_WINDOW = 2000
+WS_JOURNAL_FILE = "ws_ticks.journal"          # --journal 기본 경로 (수집기의 ticks.journal과 분리)
+WS_JOURNAL_MAX_BYTES = 16 * 1024 * 1024      # 이 크기를 넘으면 .1로 넘기고 새 파일 (실시간 피드 전용, 최대 2개)
+KST = datetime.timezone(datetime.timedelta(hours=9))   # 체결 시각(HHMMSS)은 한국 시간
+
+Sub = Tuple[str, str]        # (tr_id, 종목코드)
+
+
+class WsEvent(NamedTuple):
+    exch_ms: int             # 거래소 시각 (초 단위 정밀도)
+    recv_ms: int             # 수신 시각
+    session: str
+    tr_id: str
+    code: str
+    fields: List[str]
+
+
+def _midnight_ms() -> int:
+    """오늘(KST) 0시의 epoch ms (호스트 시간대와 무관)"""
+    today = datetime.datetime.combine(datetime.datetime.now(KST).date(), datetime.time(), tzinfo=KST)
+    return int(today.timestamp() * 1000)
+
+
+def _exchange_ms(hhmmss: str, midnight_ms: int) -> int:
+    """HHMMSS (오늘, KST) → epoch ms"""
+    try:
+        return midnight_ms + (int(hhmmss[0:2]) * 3600 + int(hhmmss[2:4]) * 60 + int(hhmmss[4:6])) * 1000
+    except (ValueError, IndexError):
+        return 0
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# -----------------------------------------------------------
+# 1. 세션 (접속키 1개 = 웹소켓 연결 1개)
+# -----------------------------------------------------------
+class Session:
+    def __init__(self, name: str, approval_key: str, sink, url: str = WS_URL, capacity: int = MAX_SUBSCRIPTIONS):
+        self.name = name
+        self.approval_key = approval_key
+        self.url = url
+        self.capacity = capacity
+        self.sink = sink                     # WsEvent를 받을 함수
+        self.subs: Set[Sub] = set()          # 등록해야 할 구독
+        self.confirmed: Set[Sub] = set()     # 서버가 등록 성공을 알려 온 구독
+        self.messages = 0
+        self.connects = 0
+        self.last_recv = 0.0
+        self.lags = deque(maxlen=LAG_WINDOW)
+        self.down_since: Optional[float] = None   # 연결이 없어진 시각 (연결 중이면 None)
+        self._ws = None
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def free(self) -> int:
+        return self.capacity - len(self.subs)
+
+    @property
+    def down(self) -> bool:
+        """DOWN_AFTER 넘게 연결이 없음 (접속키가 한 번도 연결되지 않은 경우 포함)"""
+        return self.down_since is not None and time.time() - self.down_since > DOWN_AFTER
+
+    def _send_sub(self, sub: Sub, tr_type: str) -> None:
+        tr_id, code = sub
+        msg = json.dumps({
+            "header": {"approval_key": self.approval_key, "custtype": "P", "tr_type": tr_type,
+                       "content-type": "utf-8"},
+            "body": {"input": {"tr_id": tr_id, "tr_key": code}},
+        })
+        with self._send_lock:
+            if self._ws is not None:
+                self._ws.send(msg)
+        time.sleep(SUBSCRIBE_INTERVAL)
+
+    def subscribe(self, sub: Sub) -> None:
+        self.subs.add(sub)
+        if self._ws is not None:
+            self._send_sub(sub, "1")
+
+    def unsubscribe(self, sub: Sub) -> None:
+        self.subs.discard(sub)
+        self.confirmed.discard(sub)
+        if self._ws is not None:
+            self._send_sub(sub, "2")
+
+    # 수신 처리 -------------------------------------------------
+    def _handle(self, msg: str) -> None:
+        recv_ms = int(time.time() * 1000)
+        self.last_recv = recv_ms / 1000
+        if msg[:1] in ("0", "1"):
+            encrypted, tr_id, count, payload = msg.split("|", 3)
+            if encrypted == "1":
+                return  # 암호화 데이터(체결통보)는 구독하지 않음
+            fields = payload.split("^")
+            n = int(count)
+            width = FIELD_COUNTS.get(tr_id) or len(fields) // n
+            midnight_ms = _midnight_ms()
+            for i in range(n):
+                record = fields[i * width:(i + 1) * width]
+                exch_ms = _exchange_ms(record[1], midnight_ms)
+                if exch_ms:
+                    self.lags.append(recv_ms - exch_ms)
+                self.messages += 1
+                self.sink(WsEvent(exch_ms or recv_ms, recv_ms, self.name, tr_id, record[0], record))
+            return
+
+        data = json.loads(msg)
+        header = data.get("header", {})
+        tr_id = header.get("tr_id")
+        if tr_id == "PINGPONG":
+            with self._send_lock:
+                if self._ws is not None:
+                    self._ws.pong(msg)
+            return
+        body = data.get("body", {})
+        sub = (tr_id, header.get("tr_key"))
+        if body.get("rt_cd") == "0":
+            if body.get("msg1", "").startswith("SUBSCRIBE SUCCESS"):
+                self.confirmed.add(sub)
+        else:
+            print(f"⚠️ [WS:{self.name}] {tr_id} {header.get('tr_key')} 등록 실패: {body.get('msg1')}")
+            self.confirmed.discard(sub)
+
+    def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while not self._stop.is_set():
+            try:
+                ws = websocket.create_connection(self.url, timeout=10)
+            except Exception as e:
+                print(f"❌ [WS:{self.name}] 접속 실패: {e} ({delay:.0f}초 후 재시도)")
+                self._stop.wait(delay + random.uniform(0, delay / 2))
+                delay = min(RECONNECT_MAX, delay * 2)
+                continue
+
+            ws.settimeout(RECV_TIMEOUT)
+            with self._send_lock:
+                self._ws = ws
+            self.down_since = None
+            self.connects += 1
+            self.confirmed.clear()
+            delay = RECONNECT_MIN
+            print(f"🔌 [WS:{self.name}] 연결 (#{self.connects}), 구독 {len(self.subs)}건 등록")
+            try:
+                for sub in sorted(self.subs):   # 재접속 시 자동 재등록
+                    self._send_sub(sub, "1")
+                while not self._stop.is_set():
+                    msg = ws.recv()
+                    if not msg:
+                        raise ConnectionError("서버가 연결을 닫음")
+                    self._handle(msg)
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"⚠️ [WS:{self.name}] 연결 끊김: {e}")
+            finally:
+                with self._send_lock:
+                    self._ws = None
+                self.down_since = time.time()
+                try:
+                    ws.close()
+                except Exception:
+                    pass
+            self._stop.wait(delay)
+
+    def start(self) -> None:
+        self.down_since = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"ws-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._send_lock:
+            if self._ws is not None:
+                self._ws.close()
+
+    def stats(self) -> Dict:
+        lags = list(self.lags)
+        return {
+            "subs": len(self.subs),
+            "confirmed": len(self.confirmed),
+            "messages": self.messages,
+            "connects": self.connects,
+            "connected": self._ws is not None,
+            "idle_s": round(time.time() - self.last_recv, 1) if self.last_recv else None,
+            "lag_p50_ms": _percentile(lags, 0.5),
+            "lag_p99_ms": _percentile(lags, 0.99),
+        }
+
+
+# -----------------------------------------------------------
+# 2. 합친 피드 (거래소 시각 순 정렬)
+# -----------------------------------------------------------
+class MergedFeed:
+    """세션들이 넣은 이벤트를 HOLD_MS 만큼 모았다가 (거래소 시각, 수신 시각) 순으로 내보냄"""
+
+    def __init__(self, hold_ms: int = HOLD_MS):
+        self.hold_ms = hold_ms
+        self.late = 0            # 이미 내보낸 시각보다 이른 이벤트 수 (hold_ms가 부족하다는 신호)
+        self._in: "queue.Queue[WsEvent]" = queue.Queue()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._last_exch = 0
+
+    def put(self, event: WsEvent) -> None:
+        self._in.put(event)
+
+    def __iter__(self) -> Iterator[WsEvent]:
+        while True:
+            timeout = self.hold_ms / 1000
+            if self._heap:
+                timeout = max(0.0, (self._heap[0][1] + self.hold_ms) / 1000 - time.time())
+            try:
+                event = self._in.get(timeout=timeout)
+                heapq.heappush(self._heap, (event.exch_ms, event.recv_ms, next(self._seq), event))
+                while True:  # 쌓인 것은 한 번에 옮김
+                    event = self._in.get_nowait()
+                    heapq.heappush(self._heap, (event.exch_ms, event.recv_ms, next(self._seq), event))
+            except queue.Empty:
+                pass
+
+            ready = time.time() * 1000 - self.hold_ms
+            while self._heap and self._heap[0][1] <= ready:
+                event = heapq.heappop(self._heap)[3]
+                if event.exch_ms < self._last_exch:
+                    self.late += 1
+                self._last_exch = max(self._last_exch, event.exch_ms)
+                yield event
+
+
+# -----------------------------------------------------------
+# 3. 멀티플렉서 (구독 배분 / 회전)
+# -----------------------------------------------------------
+class WsMultiplexer:
+    def __init__(self, url: str = WS_URL, capacity: int = MAX_SUBSCRIPTIONS, hold_ms: int = HOLD_MS):
+        if websocket is None:
+            raise ImportError("websocket-client 패키지가 필요합니다: pip install websocket-client")
+        self.url = url
+        self.capacity = capacity
+        self.feed = MergedFeed(hold_ms)
+        self.sessions: List[Session] = []
+        self.assignment: Dict[Sub, Session] = {}
+        self.dropped: Set[Sub] = set()   # 한도 초과로 등록하지 못한 구독
+        self._lock = threading.Lock()
+
+    def add_session(self, name: str, approval_key: str) -> Session:
+        session = Session(name, approval_key, self.feed.put, self.url, self.capacity)
+        self.sessions.append(session)
+        return session
+
+    @classmethod
+    def from_accounts(cls, accounts, **kwargs) -> "WsMultiplexer":
+        """accounts.py 등록부의 서로 다른 앱키마다 접속키를 받아 세션 생성"""
+        from token_manage import get_websocket_key
+
+        mux = cls(**kwargs)
+        seen = set()
+        for account in accounts:
+            app_key, app_secret, url_base = account.credentials()
+            if app_key in seen:
+                continue
+            seen.add(app_key)
+            approval_key = get_websocket_key(app_key, app_secret, url_base, account.token_file)
+            if approval_key:
+                mux.add_session(account.name, approval_key)
+        return mux
+
+    @property
+    def capacity_total(self) -> int:
+        return self.capacity * len(self.sessions)
+
+    def set_watchlist(self, codes: List[str], tr_ids=DEFAULT_TR_IDS) -> Dict[str, int]:
+        """원하는 구독 목록으로 맞춤 (차이만 등록/해제). {"added", "removed", "dropped"} 반환"""
+        desired = [(tr_id, code) for code in dict.fromkeys(codes) for tr_id in tr_ids]
+        desired_set = set(desired)
+        with self._lock:
+            removed = [sub for sub in self.assignment if sub not in desired_set]
+            for sub in removed:
+                self.assignment.pop(sub).unsubscribe(sub)
+
+            self._rebalance()
+            added = 0
+            self.dropped = set()
+            for sub in desired:
+                if sub in self.assignment:
+                    continue
+                session = self._pick()
+                if session is None:
+                    self.dropped.add(sub)
+                    continue
+                session.subscribe(sub)
+                self.assignment[sub] = session
+                added += 1
+
+        if self.dropped:
+            print(f"⚠️ [WS] 등록 한도 초과: {len(self.dropped)}건 미등록 "
+                  f"(세션 {len(self.sessions)}개 x {self.capacity}건, accounts.json에 앱키 추가 필요)")
+        return {"added": added, "removed": len(removed), "dropped": len(self.dropped)}
+
+    def _pick(self) -> Optional[Session]:
+        """여유가 가장 많은 세션 (연결된 세션 우선, 전부 죽었으면 재접속 때 등록되도록 아무 세션)"""
+        for candidates in ([s for s in self.sessions if not s.down], self.sessions):
+            session = max(candidates, key=lambda s: s.free, default=None)
+            if session is not None and session.free > 0:
+                return session
+        return None
+
+    def _rebalance(self) -> int:
+        """죽은 세션의 구독을 여유 있는 살아 있는 세션으로 옮김. 옮긴 건수 반환 (self._lock 안에서 호출)"""
+        moved = 0
+        for sub, session in list(self.assignment.items()):
+            if not session.down:
+                continue
+            target = max((s for s in self.sessions if not s.down), key=lambda s: s.free, default=None)
+            if target is None or target.free <= 0:
+                break
+            session.unsubscribe(sub)
+            target.subscribe(sub)
+            self.assignment[sub] = target
+            moved += 1
+        if moved:
+            print(f"🔀 [WS] 연결 안 되는 세션의 구독 {moved}건을 다른 세션으로 옮김")
+        return moved
+
+    def rebalance(self) -> int:
+        with self._lock:
+            return self._rebalance()
+
+    def start(self) -> None:
+        for session in self.sessions:
+            session.start()
+
+    def stop(self) -> None:
+        for session in self.sessions:
+            session.stop()
+
+    def events(self) -> Iterator[WsEvent]:
+        return iter(self.feed)
+
+    def report(self) -> None:
+        print(f"📡 [WS] 세션 {len(self.sessions)}개 | 구독 {len(self.assignment)}/{self.capacity_total} | "
+              f"순서 역전 {self.feed.late}건")
+        for session in self.sessions:
+            s = session.stats()
+            state = "🟢" if s["connected"] else "🔴"
+            print(f"   {state} {session.name}: 구독 {s['confirmed']}/{s['subs']} | 수신 {s['messages']:,} | "
+                  f"재접속 {s['connects'] - 1 if s['connects'] else 0} | "
+                  f"지연 p50 {s['lag_p50_ms']:.0f}ms / p99 {s['lag_p99_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+    import key
+    from accounts import load_accounts
+
+    parser = argparse.ArgumentParser(description="웹소켓 실시간 시세 멀티플렉서")
+    parser.add_argument("--codes", nargs="*", default=[], help="관심 종목")
+    parser.add_argument("--codes-file", help="관심 종목 파일 (한 줄에 하나, 변경 시 자동 반영)")
+    parser.add_argument("--tr", nargs="*", default=list(DEFAULT_TR_IDS), help="구독할 TR_ID")
+    parser.add_argument("--journal", nargs="?", const=WS_JOURNAL_FILE, metavar="PATH",
+                        help=f"체결을 웹소켓 전용 틱 저널에 기록 (기본: {WS_JOURNAL_FILE})")
+    parser.add_argument("--quiet", action="store_true", help="이벤트 출력 생략 (리포트만)")
+    parser.add_argument("--report-every", type=float, default=30, help="세션 리포트 출력 간격 (초)")
+    args = parser.parse_args()
+
+    def watchlist() -> List[str]:
+        codes = list(args.codes)
+        if args.codes_file:
+            with open(args.codes_file, "r", encoding="utf-8") as f:
+                codes += [line.strip() for line in f if line.strip()]
+        return codes
+
+    mux = WsMultiplexer.from_accounts(load_accounts(), url=getattr(key, "WS_URL", WS_URL))
+    if not mux.sessions:
+        print("💥 웹소켓 접속키를 하나도 받지 못했습니다.")
+        exit(1)
+    print(f"🚀 [WS] {mux.set_watchlist(watchlist(), args.tr)}")
+    mux.start()
+
+    # 관심 종목 파일이 바뀌면 구독 회전, 연결 안 되는 세션의 구독은 다른 세션으로
+    def watch_file():
+        last = None
+        while True:
+            if args.codes_file:
+                codes = watchlist()
+                if last is not None and codes != last:
+                    print(f"🔄 [WS] 관심 종목 변경: {mux.set_watchlist(codes, args.tr)}")
+                last = codes
+            mux.rebalance()
+            time.sleep(REBALANCE_EVERY)
+
+    threading.Thread(target=watch_file, daemon=True).start()
+
+    journal = None
+    if args.journal:
+        from tick_journal import JOURNAL_FILE, TickJournal
+        if os.path.abspath(args.journal) == os.path.abspath(JOURNAL_FILE):
+            parser.error(f"{JOURNAL_FILE}은 수집기(save_data.py) 저널입니다. 다른 경로를 지정하세요.")
+        journal = TickJournal(args.journal, fsync=False)
+    books: Dict[str, Tuple[int, int]] = {}   # 종목: (총매도잔량, 총매수잔량) 최근 호가
+
+    last_report = time.monotonic()
+    try:
+        for ev in mux.events():
+            if ev.tr_id == "H0STASP0":
+                books[ev.code] = (int(ev.fields[43] or 0), int(ev.fields[44] or 0))
+            elif ev.tr_id == "H0STCNT0":
+                # CNTG_VOL(12)은 이번 체결 수량, ACML_VOL(13)은 누적 거래량 - 저널/price_log의 volume은 누적
+                price, trade_qty, volume = int(ev.fields[2] or 0), int(ev.fields[12] or 0), int(ev.fields[13] or 0)
+                if journal is not None:
+                    ask, bid = books.get(ev.code, (0, 0))
+                    journal.append(ev.exch_ms / 1000, ev.code, price, volume, ask, bid, received=ev.recv_ms / 1000)
+                    if journal.size() > WS_JOURNAL_MAX_BYTES:
+                        journal.rotate()   # 실시간 피드 전용: 구독자(JournalTailer)는 새 파일을 처음부터 읽음
+                if not args.quiet:
+                    print(f"💹 {ev.fields[1]} {ev.code} {price:,}원 x {trade_qty:,} (누적 {volume:,}) "
+                          f"({ev.session}, 지연 {ev.recv_ms - ev.exch_ms}ms)")
+            if time.monotonic() - last_report >= args.report_every:
+                mux.report()
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mux.stop()
+        mux.report()
+        if journal is not None:
+            journal.close()